@@ -1,6 +1,7 @@
 from django.contrib import admin
 from .models import (Amenity, VenueCategory, Venue, VenueImage, Room, RoomImage, 
-                     TimeSlot, Booking, Review, Favorite)
+                     TimeSlot, Booking, Review, Favorite, RoomSchedule, SlotException,
+                     ReservationHold, RecurrenceRule, VenueScore)
 
 
 @admin.register(Amenity)
@@ -58,12 +59,22 @@ class TimeSlotInline(admin.TabularInline):
     extra = 1
 
 
+class RoomScheduleInline(admin.StackedInline):
+    model = RoomSchedule
+    extra = 0
+
+
+class SlotExceptionInline(admin.TabularInline):
+    model = SlotException
+    extra = 0
+
+
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
     list_display = ['name', 'venue', 'capacity', 'price_per_hour', 'is_active']
     list_filter = ['is_active', 'venue']
     search_fields = ['name', 'description', 'venue__name']
-    inlines = [RoomImageInline, TimeSlotInline]
+    inlines = [RoomImageInline, RoomScheduleInline, SlotExceptionInline, TimeSlotInline]
 
 
 @admin.register(Booking)
@@ -82,6 +93,22 @@ class BookingAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(RecurrenceRule)
+class RecurrenceRuleAdmin(admin.ModelAdmin):
+    list_display = ['room', 'user', 'frequency', 'interval', 'first_start', 'materialized_until', 'is_active']
+    list_filter = ['frequency', 'is_active']
+    search_fields = ['user__email', 'room__name', 'room__venue__name']
+    readonly_fields = ['materialized_until']
+
+
+@admin.register(ReservationHold)
+class ReservationHoldAdmin(admin.ModelAdmin):
+    list_display = ['hold_id', 'user', 'room', 'start_time', 'end_time', 'expires_at']
+    list_filter = ['expires_at']
+    search_fields = ['hold_id', 'user__email', 'room__name']
+    readonly_fields = ['hold_id']
+
+
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ['user', 'venue', 'rating', 'created_at']
@@ -94,3 +121,10 @@ class FavoriteAdmin(admin.ModelAdmin):
     list_display = ['user', 'venue', 'created_at']
     list_filter = ['created_at']
     search_fields = ['user__email', 'venue__name']
+
+
+@admin.register(VenueScore)
+class VenueScoreAdmin(admin.ModelAdmin):
+    list_display = ['venue', 'score', 'bookings', 'favorites', 'reviews', 'decayed_at']
+    search_fields = ['venue__name']
+    readonly_fields = ['venue', 'score', 'bookings', 'favorites', 'reviews', 'decayed_at']
@@ -8,7 +8,7 @@ from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
 from django.contrib.admin.views.decorators import staff_member_required
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.views.decorators.http import require_POST
 import json
 
@@ -17,6 +17,7 @@ from .models import (
     Review, TimeSlot, VenueCategory, Amenity
 )
 from accounts.models import CustomUser
+from . import keyset, search
 
 from .forms import VenueForm, VenueImageForm, RoomForm, RoomImageForm, AmenityForm, CategoryForm
 from payments.models import Transaction, Invoice, PaymentDistribution
@@ -25,6 +26,16 @@ from payments.models import Transaction, Invoice, PaymentDistribution
 def is_admin(user):
     return user.is_authenticated and user.user_type == 'admin'
 
+# Pagination: by cursor on the list ordering, by page number for ranked search results
+def paginate_list(request, queryset, per_page=10):
+    if keyset.keyset_ordering(queryset) is None:
+        paginator = Paginator(queryset, per_page)
+        return paginator, paginator.get_page(request.GET.get('page', 1))
+    try:
+        return None, keyset.paginate(queryset, request.GET.get('cursor'), per_page)
+    except keyset.InvalidCursor:
+        raise Http404("Invalid cursor")
+
 # Dashboard
 @login_required
 @user_passes_test(is_admin)
@@ -195,21 +206,14 @@ def admin_venues(request):
     q = request.GET.get('q')
     category_id = request.GET.get('category')
     
-    if q:
-        venues_list = venues_list.filter(
-            Q(name__icontains=q) | 
-            Q(city__icontains=q) | 
-            Q(state__icontains=q) |
-            Q(country__icontains=q)
-        )
-    
     if category_id:
         venues_list = venues_list.filter(category_id=category_id)
     
+    if q:
+        venues_list = search.search_venues(venues_list, q)
+    
     # Pagination
-    paginator = Paginator(venues_list, 10)
-    page = request.GET.get('page', 1)
-    venues = paginator.get_page(page)
+    paginator, venues = paginate_list(request, venues_list)
     
     context = {
         'active_tab': 'venues',
@@ -365,9 +369,7 @@ def admin_rooms(request):
         rooms_list = rooms_list.filter(venue_id=venue_id)
     
     # Pagination
-    paginator = Paginator(rooms_list, 10)
-    page = request.GET.get('page', 1)
-    rooms = paginator.get_page(page)
+    paginator, rooms = paginate_list(request, rooms_list)
     
     context = {
         'active_tab': 'rooms',
@@ -487,9 +489,7 @@ def admin_bookings(request):
         bookings_list = bookings_list.filter(status=status)
     
     # Pagination
-    paginator = Paginator(bookings_list, 10)
-    page = request.GET.get('page', 1)
-    bookings = paginator.get_page(page)
+    paginator, bookings = paginate_list(request, bookings_list)
     
     context = {
         'active_tab': 'bookings',
@@ -510,20 +510,14 @@ def admin_reviews(request):
     q = request.GET.get('q')
     rating = request.GET.get('rating')
     
-    if q:
-        reviews_list = reviews_list.filter(
-            Q(comment__icontains=q) | 
-            Q(user__email__icontains=q) |
-            Q(venue__name__icontains=q)
-        )
-    
     if rating:
         reviews_list = reviews_list.filter(rating=rating)
     
+    if q:
+        reviews_list = search.search_reviews(reviews_list, q)
+    
     # Pagination
-    paginator = Paginator(reviews_list, 10)
-    page = request.GET.get('page', 1)
-    reviews = paginator.get_page(page)
+    paginator, reviews = paginate_list(request, reviews_list)
     
     context = {
         'active_tab': 'reviews',
@@ -557,9 +551,7 @@ def admin_users(request):
         users_list = users_list.filter(user_type=user_type)
     
     # Pagination
-    paginator = Paginator(users_list, 10)
-    page = request.GET.get('page', 1)
-    users = paginator.get_page(page)
+    paginator, users = paginate_list(request, users_list)
     
     context = {
         'active_tab': 'users',
@@ -0,0 +1,63 @@
+"""
+Amenity bitmasks for venues and rooms.
+
+Each ``Amenity`` owns one bit position (0-62, so masks fit a signed 64-bit
+integer) and every ``Venue`` and ``Room`` stores the OR of its amenities' bits
+in ``amenity_mask``. The masks follow the many-to-many relations through
+``m2m_changed``, so "has all of these amenities" is the single-table
+predicate ``amenity_mask & required = required`` on SQLite and PostgreSQL
+alike, instead of one join per amenity.
+"""
+
+from django.db.models import F, Q
+from django.db.models.lookups import Exact, GreaterThan
+
+
+MAX_BITS = 63
+
+
+def next_free_bit(taken):
+    """Lowest bit position not in ``taken``, or None once all are assigned"""
+    taken = set(taken)
+    for bit in range(MAX_BITS):
+        if bit not in taken:
+            return bit
+    return None
+
+
+def mask_for(bits):
+    mask = 0
+    for bit in bits:
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+
+def refresh_masks(model, pks):
+    """Recompute ``amenity_mask`` for the given venues or rooms from their amenities"""
+    pks = set(pks)
+    if not pks:
+        return
+    bits = {pk: [] for pk in pks}
+    rows = model.amenities.through.objects.filter(**{f'{model._meta.model_name}_id__in': pks}).values_list(
+        f'{model._meta.model_name}_id', 'amenity__bit'
+    )
+    for pk, bit in rows:
+        bits[pk].append(bit)
+    for pk, owned in bits.items():
+        model.objects.filter(pk=pk).update(amenity_mask=mask_for(owned))
+
+
+def clear_bit(model, bit):
+    """Drop ``bit`` from every mask, e.g. when its amenity is deleted"""
+    model.objects.filter(has_any(1 << bit)).update(amenity_mask=F('amenity_mask').bitand(~(1 << bit)))
+
+
+def has_all(required):
+    """Condition matching rows whose mask contains every bit of ``required``"""
+    return Q(Exact(F('amenity_mask').bitand(required), required))
+
+
+def has_any(mask):
+    """Condition matching rows whose mask shares at least one bit with ``mask``"""
+    return Q(GreaterThan(F('amenity_mask').bitand(mask), 0))
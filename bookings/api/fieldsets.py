@@ -0,0 +1,238 @@
+"""
+Sparse fieldsets and on-demand expansion.
+
+``?fields=id,name,rooms.name`` keeps only the named fields (dots reach into
+nested serializers) and ``?expand=room`` swaps a related id for the nested
+object named in the serializer's ``Meta.expandable_fields``; naming subfields
+of an expandable field (``fields=room.name``) expands it too.
+
+The queryset is then planned from the fields that are left: concrete fields
+go into ``only()``, forward relations into ``select_related()`` and nested
+lists into ``prefetch_related()``, so nothing the response does not show is
+loaded. A ``SerializerMethodField`` that reads a relation says how to load it
+with a ``prefetch_<field>`` method; any other method field, or a source that
+is not a model field, keeps that model's columns fully loaded.
+
+Both only apply to reads; writes see the full serializer.
+"""
+
+import copy
+import sys
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_tree(value):
+    """{'rooms': {'name': {}}} from 'rooms.name'; None when not given"""
+    if value is None:
+        return None
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+def is_read(request):
+    return request is not None and request.method in SAFE_METHODS
+
+
+class SparseFieldsMixin:
+    """Serializer narrowed by the request's ``?fields=`` and ``?expand=``"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self._context.get('request')
+        if is_read(request):
+            self.select_fields(
+                parse_tree(request.query_params.get('fields')),
+                parse_tree(request.query_params.get('expand'))
+            )
+
+    def expandable_fields(self):
+        return getattr(getattr(self, 'Meta', None), 'expandable_fields', {})
+
+    def expanded_field(self, name):
+        serializer_class = self.expandable_fields()[name]
+        if isinstance(serializer_class, str):
+            if '.' in serializer_class:
+                serializer_class = import_string(serializer_class)
+            else:
+                serializer_class = getattr(sys.modules[type(self).__module__], serializer_class)
+        return serializer_class(read_only=True)
+
+    def select_fields(self, fields=None, expand=None, path=''):
+        """Drop fields not in ``fields`` and expand those in ``expand``, recursively"""
+        expand = expand or {}
+        expandable = self.expandable_fields()
+        unknown = [f'{path}{name}' for name in (fields or {}) if name not in self.fields]
+        if unknown:
+            raise serializers.ValidationError({'fields': [f'Unknown field: {name}' for name in unknown]})
+        unknown = [f'{path}{name}' for name in expand if name not in expandable]
+        if unknown:
+            raise serializers.ValidationError({'expand': [f'Cannot expand: {name}' for name in unknown]})
+
+        if fields:
+            for name in list(self.fields):
+                if name not in fields:
+                    self.fields.pop(name)
+        for name in expandable:
+            if name in self.fields and (name in expand or (fields or {}).get(name)):
+                self.fields[name] = self.expanded_field(name)
+
+        for name, field in self.fields.items():
+            child = getattr(field, 'child', field)
+            subfields = (fields or {}).get(name) or None
+            if isinstance(child, SparseFieldsMixin) and (subfields or expand.get(name)):
+                child.select_fields(subfields, expand.get(name), f'{path}{name}.')
+
+
+class Plan:
+    """Columns, joins and prefetches one queryset needs"""
+
+    def __init__(self):
+        self.only = set()
+        self.select = set()
+        self.prefetch = []
+        # Relation paths ('' for the model itself) whose columns must all load
+        self.full = set()
+
+    def join(self, prefix, name):
+        return f'{prefix}__{name}' if prefix else name
+
+    def only_lookups(self):
+        if '' in self.full:
+            return None
+        return sorted(
+            lookup for lookup in self.only
+            if not any(lookup.startswith(f'{path}__') for path in self.full)
+        )
+
+
+def _follow(model, prefix, attrs, plan):
+    """Select the forward relations along a dotted source and load its last field"""
+    for position, attr in enumerate(attrs):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            plan.full.add(prefix)
+            return
+        lookup = plan.join(prefix, attr)
+        if position == len(attrs) - 1:
+            if field.concrete:
+                plan.only.add(lookup)
+            else:
+                plan.full.add(prefix)
+            return
+        if not (field.many_to_one or field.one_to_one) or not field.concrete:
+            plan.full.add(prefix)
+            return
+        plan.only.add(lookup)
+        plan.select.add(lookup)
+        model, prefix = field.related_model, lookup
+
+
+def _nested_queryset(serializer, model):
+    """Queryset for a prefetched list of ``serializer``, planned from its fields"""
+    plan = Plan()
+    _collect(serializer, model, '', plan)
+    queryset = model._default_manager.all()
+    if plan.select:
+        queryset = queryset.select_related(*sorted(plan.select))
+    if plan.prefetch:
+        queryset = queryset.prefetch_related(*plan.prefetch)
+    return queryset, plan
+
+
+def _collect(serializer, model, prefix, plan, annotations=()):
+    plan.only.add(plan.join(prefix, model._meta.pk.name))
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            loader = getattr(serializer, f'prefetch_{name}', None)
+            if loader is None:
+                plan.full.add(prefix)
+            else:
+                lookup = copy.copy(loader())
+                if prefix:
+                    lookup.add_prefix(prefix)
+                plan.prefetch.append(lookup)
+            continue
+        if field.source == '*':
+            plan.full.add(prefix)
+            continue
+        if len(field.source_attrs) > 1:
+            _follow(model, prefix, field.source_attrs, plan)
+            continue
+        if not prefix and field.source in annotations:
+            continue
+
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            plan.full.add(prefix)
+            continue
+        lookup = plan.join(prefix, field.source)
+        many = model_field.many_to_many or model_field.one_to_many
+        nested = getattr(field, 'child', field) if isinstance(field, serializers.BaseSerializer) else None
+
+        if nested is not None and many:
+            queryset, nested_plan = _nested_queryset(nested, model_field.related_model)
+            if model_field.one_to_many:
+                # The prefetch matches rows back to their parent on the foreign key
+                nested_plan.only.add(model_field.field.name)
+            only = nested_plan.only_lookups()
+            if only is not None:
+                queryset = queryset.only(*only)
+            plan.prefetch.append(Prefetch(lookup, queryset=queryset))
+        elif nested is not None and model_field.concrete:
+            plan.only.add(lookup)
+            plan.select.add(lookup)
+            _collect(nested, model_field.related_model, lookup, plan)
+        elif many:
+            plan.prefetch.append(Prefetch(lookup, queryset=model_field.related_model._default_manager.only('pk')))
+        elif model_field.concrete:
+            plan.only.add(lookup)
+        else:
+            plan.full.add(prefix)
+
+
+def optimize(queryset, serializer, restrict=True):
+    """
+    ``queryset`` with the joins and prefetches ``serializer`` reads and,
+    when ``restrict``, only the columns it shows plus the ordering's.
+    """
+    plan = Plan()
+    _collect(serializer, queryset.model, '', plan, set(queryset.query.annotations))
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if plan.select:
+        queryset = queryset.select_related(*sorted(plan.select))
+    if plan.prefetch:
+        queryset = queryset.prefetch_related(*plan.prefetch)
+
+    only = plan.only_lookups()
+    if not restrict or only is None:
+        return queryset
+    for term in queryset.query.order_by or queryset.model._meta.ordering:
+        name = term.lstrip('-') if isinstance(term, str) else ''
+        try:
+            if name and queryset.model._meta.get_field(name).concrete:
+                only.append(name)
+        except FieldDoesNotExist:
+            pass
+    return queryset.only(*only)
+
+
+class SparseFieldsViewMixin:
+    """Generic view whose queryset loads just what its (sparse) serializer shows"""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return optimize(queryset, self.get_serializer(), restrict=is_read(self.request))
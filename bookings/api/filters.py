@@ -0,0 +1,11 @@
+from rest_framework import filters
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """SearchFilter answering ``?search=`` from the view's ``search_index`` when it has one"""
+    
+    def filter_queryset(self, request, queryset, view):
+        index = getattr(view, 'search_index', None)
+        if index is None:
+            return super().filter_queryset(request, queryset, view)
+        return index.filter(queryset, request.query_params.get(self.search_param, ''))
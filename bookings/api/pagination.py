@@ -0,0 +1,82 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from bookings import keyset
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on the view's ordering plus the primary key.
+
+    ``?cursor=`` takes the opaque ``next``/``previous`` links, ``?page_size=``
+    sets the page length and ``?count=false`` skips the ``COUNT(*)`` for the
+    total. Rankings that cannot be keyed (search relevance, distance) fall
+    back to page numbers; those result sets are capped anyway.
+    """
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param, 'true').lower() not in ('0', 'false', 'no')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fallback = None
+        ordering = keyset.keyset_ordering(queryset)
+        if ordering is None:
+            self.fallback = PageNumberPagination()
+            self.fallback.page_size = self.get_page_size(request)
+            return self.fallback.paginate_queryset(queryset, request, view)
+        try:
+            self.page = keyset.paginate(
+                queryset,
+                request.query_params.get(self.cursor_query_param),
+                self.get_page_size(request),
+                ordering=ordering,
+                with_count=self.wants_count(request)
+            )
+        except keyset.InvalidCursor as e:
+            raise NotFound(str(e))
+        return self.page.object_list
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(remove_query_param(url, 'page'), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        response = {}
+        if self.page.count is not None:
+            response['count'] = self.page.count
+        response['next'] = self._link(self.page.next_cursor)
+        response['previous'] = self._link(self.page.previous_cursor)
+        response['results'] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
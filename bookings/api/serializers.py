@@ -1,11 +1,17 @@
 from rest_framework import serializers
-from bookings.models import Venue, Room, Booking, Review, Favorite, VenueImage, RoomImage, Amenity, TimeSlot
+from bookings.models import Venue, Room, Booking, Review, Favorite, VenueImage, RoomImage, Amenity, TimeSlot, ReservationHold, RecurrenceRule, RoomDayOccupancy
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time, timedelta
+from .fieldsets import SparseFieldsMixin
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for user data"""
     
     class Meta:
@@ -13,7 +19,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'email', 'username']
         
 
-class AmenitySerializer(serializers.ModelSerializer):
+class AmenitySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for amenities"""
     
     class Meta:
@@ -21,7 +27,7 @@ class AmenitySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'icon', 'description']
 
 
-class VenueImageSerializer(serializers.ModelSerializer):
+class VenueImageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for venue images"""
     
     class Meta:
@@ -29,7 +35,7 @@ class VenueImageSerializer(serializers.ModelSerializer):
         fields = ['id', 'image', 'caption', 'is_primary']
 
 
-class RoomImageSerializer(serializers.ModelSerializer):
+class RoomImageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for room images"""
     
     class Meta:
@@ -37,7 +43,7 @@ class RoomImageSerializer(serializers.ModelSerializer):
         fields = ['id', 'image', 'caption', 'is_primary']
 
 
-class TimeSlotSerializer(serializers.ModelSerializer):
+class TimeSlotSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for time slots"""
     
     class Meta:
@@ -45,42 +51,131 @@ class TimeSlotSerializer(serializers.ModelSerializer):
         fields = ['id', 'start_time', 'end_time', 'is_available']
 
 
-class RoomSerializer(serializers.ModelSerializer):
-    """Serializer for rooms"""
+# Longest slot window a room or venue payload will nest
+SLOT_WINDOW_MAX_DAYS = 31
+
+
+def _window_bound(value, name, end_of_day=False):
+    """A datetime, or a date's start (or, for ``end_of_day``, the next day's start)"""
+    try:
+        # parse_datetime() would also read a bare date, as midnight
+        day = parse_date(value)
+        moment = None if day else parse_datetime(value)
+    except ValueError:
+        day = moment = None
+    if day is not None:
+        if end_of_day:
+            day += timedelta(days=1)
+        moment = datetime.combine(day, time.min)
+    elif moment is None:
+        raise serializers.ValidationError({name: "Use YYYY-MM-DD or an ISO 8601 datetime."})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def slot_window(request):
+    """
+    (start, end) of the nested time slots, from ``?slots_from=`` and ``?slots_to=``.
+    
+    Defaults to ``API_TIME_SLOT_WINDOW_DAYS`` days from the top of the current
+    hour (so the payload, and its ETag, only move on hourly) and is capped at
+    ``SLOT_WINDOW_MAX_DAYS``, so payloads stay bounded however many slots exist.
+    A date-only ``slots_to`` includes that whole day.
+    """
+    params = request.query_params if request is not None else {}
+    if params.get('slots_from'):
+        start = _window_bound(params['slots_from'], 'slots_from')
+    else:
+        start = timezone.now().replace(minute=0, second=0, microsecond=0)
+    if params.get('slots_to'):
+        end = _window_bound(params['slots_to'], 'slots_to', end_of_day=True)
+        if end <= start:
+            raise serializers.ValidationError({"slots_to": "Must be after slots_from."})
+    else:
+        end = start + timedelta(days=getattr(settings, 'API_TIME_SLOT_WINDOW_DAYS', 7))
+    return start, min(end, start + timedelta(days=SLOT_WINDOW_MAX_DAYS))
+
+
+def windowed_slots(window):
+    """Prefetch of the time slots starting in ``window`` into ``windowed_time_slots``"""
+    start, end = window
+    return Prefetch(
+        'time_slots',
+        queryset=TimeSlot.objects.filter(start_time__gte=start, start_time__lt=end),
+        to_attr='windowed_time_slots'
+    )
+
+
+class RoomDayOccupancySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for daily occupancy summaries"""
+    status = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = RoomDayOccupancy
+        fields = ['date', 'status', 'booked_minutes', 'free_minutes', 'first_free_start']
+
+
+class RoomSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for rooms; time slots are limited to the requested window"""
     amenities = AmenitySerializer(many=True, read_only=True)
     images = RoomImageSerializer(many=True, read_only=True)
-    time_slots = TimeSlotSerializer(many=True, read_only=True)
+    time_slots = serializers.SerializerMethodField()
     
     class Meta:
         model = Room
         fields = ['id', 'venue', 'name', 'description', 'capacity', 'size_sqft',
                  'price_per_hour', 'amenities', 'images', 'time_slots', 'is_active']
+        expandable_fields = {'venue': 'VenueListSerializer'}
+    
+    def get_time_slots(self, obj):
+        """Slots starting in the window, prefetched by the view when it can be"""
+        slots = getattr(obj, 'windowed_time_slots', None)
+        if slots is None:
+            start, end = slot_window(self.context.get('request'))
+            slots = obj.time_slots.filter(start_time__gte=start, start_time__lt=end)
+        return TimeSlotSerializer(slots, many=True).data
+    
+    def prefetch_time_slots(self):
+        return windowed_slots(slot_window(self.context.get('request')))
+
+
+class RoomSearchResultSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for free rooms returned by the availability search"""
+    venue_name = serializers.CharField(source='venue.name', read_only=True)
+    city = serializers.CharField(source='venue.city', read_only=True)
+    state = serializers.CharField(source='venue.state', read_only=True)
+    total_price = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Room
+        fields = ['id', 'venue', 'venue_name', 'city', 'state', 'name', 'capacity',
+                 'size_sqft', 'price_per_hour', 'total_price']
+        expandable_fields = {'venue': 'VenueListSerializer'}
+    
+    def get_total_price(self, obj):
+        """Price of the room for the searched time window"""
+        return round(float(obj.price_per_hour) * self.context.get('duration_hours', 0), 2)
 
 
-class VenueListSerializer(serializers.ModelSerializer):
+class VenueListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for venue list view"""
-    primary_image = serializers.SerializerMethodField()
-    average_rating = serializers.FloatField(read_only=True)
+    primary_image = serializers.ImageField(read_only=True)
+    average_rating = serializers.FloatField(source='rating_avg', read_only=True)
+    distance_km = serializers.FloatField(read_only=True)
     
     class Meta:
         model = Venue
-        fields = ['id', 'name', 'city', 'address', 'max_capacity', 'primary_image', 'average_rating']
-    
-    def get_primary_image(self, obj):
-        """Get the primary image URL"""
-        primary_image = obj.images.filter(is_primary=True).first()
-        if primary_image:
-            return self.context['request'].build_absolute_uri(primary_image.image.url)
-        return None
+        fields = ['id', 'name', 'city', 'address', 'max_capacity', 'primary_image', 'average_rating', 'distance_km']
 
 
-class VenueDetailSerializer(serializers.ModelSerializer):
+class VenueDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for venue detail view"""
     owner = UserSerializer(read_only=True)
     amenities = AmenitySerializer(many=True, read_only=True)
     images = VenueImageSerializer(many=True, read_only=True)
     rooms = RoomSerializer(many=True, read_only=True)
-    average_rating = serializers.FloatField(read_only=True)
+    average_rating = serializers.FloatField(source='rating_avg', read_only=True)
     
     class Meta:
         model = Venue
@@ -90,21 +185,74 @@ class VenueDetailSerializer(serializers.ModelSerializer):
                  'average_rating', 'is_active']
 
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for bookings"""
     user = UserSerializer(read_only=True)
     room_name = serializers.CharField(source='room.name', read_only=True)
     venue_name = serializers.CharField(source='room.venue.name', read_only=True)
+    hold = serializers.UUIDField(write_only=True, required=False)
     
     class Meta:
         model = Booking
         fields = ['booking_id', 'user', 'room', 'room_name', 'venue_name', 'start_time',
                  'end_time', 'num_guests', 'special_requests', 'status', 'total_price',
-                 'created_at', 'updated_at']
+                 'created_at', 'updated_at', 'hold']
         read_only_fields = ['booking_id', 'total_price', 'created_at', 'updated_at']
+        expandable_fields = {'room': 'RoomSerializer'}
+
+
+class BatchBookingItemSerializer(serializers.Serializer):
+    """One room interval within a batch booking request"""
+    room = serializers.IntegerField()
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    num_guests = serializers.IntegerField(min_value=1)
+    special_requests = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+class BatchBookingSerializer(serializers.Serializer):
+    """Serializer for group and multi-room booking requests"""
+    bookings = BatchBookingItemSerializer(many=True, allow_empty=False, max_length=100)
+
+
+class ReservationHoldSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for reservation holds"""
+    
+    class Meta:
+        model = ReservationHold
+        fields = ['hold_id', 'room', 'start_time', 'end_time', 'expires_at', 'created_at']
+        read_only_fields = ['hold_id', 'expires_at', 'created_at']
+        expandable_fields = {'room': 'RoomSerializer'}
+
+
+class RecurrenceRuleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for recurring bookings"""
+    room_name = serializers.CharField(source='room.name', read_only=True)
+    
+    class Meta:
+        model = RecurrenceRule
+        fields = ['id', 'room', 'room_name', 'frequency', 'interval', 'first_start', 'first_end',
+                 'count', 'until', 'exceptions', 'num_guests', 'special_requests',
+                 'materialized_until', 'is_active', 'created_at']
+        read_only_fields = ['materialized_until', 'is_active', 'created_at']
+        expandable_fields = {'room': 'RoomSerializer'}
+    
+    def validate_exceptions(self, value):
+        """Skipped dates must be YYYY-MM-DD strings"""
+        for day in value:
+            if not isinstance(day, str) or parse_date(day) is None:
+                raise serializers.ValidationError("Skipped dates must be in YYYY-MM-DD format.")
+        return value
+    
+    def validate(self, data):
+        if data['first_end'] <= data['first_start']:
+            raise serializers.ValidationError("End time must be after start time.")
+        if data.get('count') is None and data.get('until') is None:
+            raise serializers.ValidationError("Either count or until is required.")
+        return data
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for reviews"""
     user = UserSerializer(read_only=True)
     
@@ -112,9 +260,10 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ['id', 'user', 'venue', 'booking', 'rating', 'comment', 'created_at']
         read_only_fields = ['created_at']
+        expandable_fields = {'venue': 'VenueListSerializer', 'booking': 'BookingSerializer'}
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
+class FavoriteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for favorites"""
     venue = VenueListSerializer(read_only=True)
     venue_id = serializers.PrimaryKeyRelatedField(
@@ -127,6 +276,7 @@ class FavoriteSerializer(serializers.ModelSerializer):
         model = Favorite
         fields = ['id', 'user', 'venue', 'venue_id', 'created_at']
         read_only_fields = ['user', 'created_at']
+        expandable_fields = {'user': 'UserSerializer'}
     
     def create(self, validated_data):
         """Create a new favorite"""
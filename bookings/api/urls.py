@@ -9,10 +9,16 @@ router.register('venues', views.VenueViewSet)
 router.register('rooms', views.RoomViewSet)
 router.register('bookings', views.BookingViewSet)
 router.register('reviews', views.ReviewViewSet)
+router.register('holds', views.ReservationHoldViewSet, basename='hold')
+router.register('recurring-bookings', views.RecurrenceRuleViewSet, basename='recurring-booking')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('availability/matrix/', views.AvailabilityMatrixAPIView.as_view(), name='availability_matrix'),
+    path('availability/search/', views.RoomSearchAPIView.as_view(), name='room_search'),
     path('availability/<int:room_id>/', views.RoomAvailabilityAPIView.as_view(), name='room_availability'),
+    path('availability/<int:room_id>/month/', views.RoomMonthOccupancyAPIView.as_view(), name='room_month_occupancy'),
+    path('autocomplete/', views.AutocompleteAPIView.as_view(), name='autocomplete'),
     path('favorites/', views.FavoriteListCreateAPIView.as_view(), name='favorite-list-create'),
     path('favorites/<int:pk>/', views.FavoriteDestroyAPIView.as_view(), name='favorite-destroy'),
 ] 
\ No newline at end of file
@@ -1,15 +1,29 @@
-from rest_framework import viewsets, permissions, generics, filters, serializers
+from rest_framework import viewsets, permissions, generics, filters, serializers, mixins
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from bookings.models import Venue, Room, Booking, Review, TimeSlot, Favorite
+from bookings.models import (Venue, Room, Amenity, Booking, Review, TimeSlot, Favorite, SlotException,
+                             ReservationHold, RecurrenceRule)
+from bookings.interval_index import is_free, is_free_locked
+from bookings import (amenity_masks, autocomplete, availability_bitmap, availability_matrix, batch, holds, geo,
+                      occupancy, recurrence, schedules, search, versions)
+from .fieldsets import SparseFieldsViewMixin
+from .filters import FullTextSearchFilter
+from .pagination import KeysetPagination
 from .serializers import (VenueListSerializer, VenueDetailSerializer, RoomSerializer,
                          BookingSerializer, ReviewSerializer, TimeSlotSerializer,
-                         FavoriteSerializer)
+                         FavoriteSerializer, RoomSearchResultSerializer, ReservationHoldSerializer,
+                         BatchBookingSerializer, RecurrenceRuleSerializer,
+                         RoomDayOccupancySerializer, slot_window)
 from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
 from django.utils import timezone
-from django.db.models import Avg, Count, Q
+from django.utils.dateparse import parse_datetime
+from django.db.models import Count, Q, Exists, OuterRef
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -25,35 +39,83 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         return obj.owner == request.user or obj.user == request.user
 
 
-class VenueViewSet(viewsets.ModelViewSet):
+class ConditionalRetrieveMixin:
+    """
+    ``retrieve`` with a strong ETag and Last-Modified from the object's change
+    counter; a client whose copy is current gets a 304 before anything is loaded.
+    """
+    version_kind = None
+    
+    def retrieve(self, request, *args, **kwargs):
+        # The payload also varies on the format, ?fields=/?expand= and the slot window
+        start, end = slot_window(request)
+        tags = versions.validators(
+            self.version_kind,
+            self.kwargs[self.lookup_url_kwarg or self.lookup_field],
+            (request.accepted_media_type, request.get_full_path(), start, end),
+            fresh_from=start
+        )
+        not_modified = versions.not_modified(request, tags)
+        if not_modified is not None:
+            return not_modified
+        return versions.set_validators(super().retrieve(request, *args, **kwargs), tags)
+
+
+class VenueViewSet(ConditionalRetrieveMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     """API endpoint for venues"""
-    queryset = Venue.objects.all().prefetch_related('amenities', 'images')
+    version_kind = 'venue'
+    queryset = Venue.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['city', 'state', 'country', 'is_active']
     search_fields = ['name', 'description', 'address', 'city']
-    ordering_fields = ['name', 'created_at', 'max_capacity']
+    search_index = search.venue_index
+    ordering_fields = ['name', 'created_at', 'max_capacity', 'rating_avg', 'min_price_per_hour', 'popularity__score']
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """Return the appropriate queryset based on request"""
-        queryset = Venue.objects.all().prefetch_related('amenities', 'images')
+        queryset = Venue.objects.all()
         
-        if self.action == 'list':
-            queryset = queryset.annotate(average_rating=Avg('reviews__rating'))
-            
         # Filter by max capacity if specified
         capacity = self.request.query_params.get('capacity')
         if capacity:
             queryset = queryset.filter(max_capacity__gte=int(capacity))
             
-        # Filter by amenities if specified
+        # Filter to venues having every listed amenity, on the amenity bitmask
         amenities = self.request.query_params.getlist('amenities')
         if amenities:
-            queryset = queryset.filter(amenities__id__in=amenities).distinct()
+            try:
+                amenity_ids = {int(amenity_id) for amenity_id in amenities}
+            except ValueError:
+                raise serializers.ValidationError({"detail": "amenities must be amenity ids."})
+            bits = dict(Amenity.objects.filter(pk__in=amenity_ids).values_list('pk', 'bit'))
+            if len(bits) < len(amenity_ids):
+                queryset = queryset.none()
+            queryset = queryset.filter(amenity_masks.has_all(amenity_masks.mask_for(bits.values())))
+            for amenity_id, bit in bits.items():
+                if bit is None:
+                    # Amenities beyond the mask bits still need the join
+                    queryset = queryset.filter(amenities__id=amenity_id)
         
         # Show only active venues for non-owners
         if self.action == 'list' and not self.request.query_params.get('all'):
             queryset = queryset.filter(is_active=True)
+        
+        # Venues near a point, nearest first: ?lat=&lng=[&radius=km][&nearest=k]
+        if self.action == 'list' and self.request.query_params.get('lat') and self.request.query_params.get('lng'):
+            try:
+                latitude = float(self.request.query_params['lat'])
+                longitude = float(self.request.query_params['lng'])
+                radius = self.request.query_params.get('radius')
+                radius = float(radius) if radius else None
+                k = self.request.query_params.get('nearest')
+                k = min(int(k), 100) if k else None
+            except ValueError:
+                raise serializers.ValidationError({"detail": "lat, lng, radius and nearest must be numbers."})
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                raise serializers.ValidationError({"detail": "lat/lng out of range."})
+            queryset = geo.near(queryset, latitude, longitude, radius_km=radius, k=k)
             
         return queryset
     
@@ -68,9 +130,10 @@ class VenueViewSet(viewsets.ModelViewSet):
         serializer.save(owner=self.request.user)
 
 
-class RoomViewSet(viewsets.ModelViewSet):
+class RoomViewSet(ConditionalRetrieveMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     """API endpoint for rooms"""
-    queryset = Room.objects.all().prefetch_related('amenities', 'images', 'time_slots')
+    version_kind = 'room'
+    queryset = Room.objects.all()
     serializer_class = RoomSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
@@ -92,7 +155,7 @@ class RoomViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     """API endpoint for bookings"""
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
@@ -100,6 +163,7 @@ class BookingViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['status', 'room__venue']
     ordering_fields = ['start_time', 'created_at', 'total_price']
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """Return bookings for the current user or venue owner"""
@@ -107,15 +171,15 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         # If user is checking their own bookings
         if self.request.query_params.get('my_bookings') == 'true':
-            return Booking.objects.filter(user=user).select_related('room', 'room__venue')
+            return Booking.objects.filter(user=user)
             
         # If user is a venue owner checking bookings for their venues
         venues_owned = Venue.objects.filter(owner=user)
         if self.request.query_params.get('owned_venues') == 'true' and venues_owned.exists():
-            return Booking.objects.filter(room__venue__in=venues_owned).select_related('room', 'room__venue', 'user')
+            return Booking.objects.filter(room__venue__in=venues_owned)
         
         # Default: return user's bookings
-        return Booking.objects.filter(user=user).select_related('room', 'room__venue')
+        return Booking.objects.filter(user=user)
     
     def perform_create(self, serializer):
         """Create a booking ensuring availability and calculating price"""
@@ -124,24 +188,56 @@ class BookingViewSet(viewsets.ModelViewSet):
         end_time = serializer.validated_data['end_time']
         
         # Check if room is available for the requested time
-        overlapping_bookings = Booking.objects.filter(
-            room=room,
-            status__in=['pending', 'confirmed'],
-            start_time__lt=end_time,
-            end_time__gt=start_time
-        ).exists()
-        
-        if overlapping_bookings:
+        if not is_free(room, start_time, end_time):
             raise serializers.ValidationError({'non_field_errors': ['This room is not available for the selected time period.']})
         
         # Calculate total price based on duration and room price
         duration_hours = (end_time - start_time).total_seconds() / 3600
         total_price = float(room.price_per_hour) * duration_hours
         
-        serializer.save(user=self.request.user, total_price=total_price)
+        # Hold the interval (or use the client's hold), then swap the hold for
+        # the booking atomically
+        hold_id = serializer.validated_data.pop('hold', None)
+        try:
+            if hold_id:
+                hold = holds.claim_hold(self.request.user, hold_id, room, start_time, end_time)
+            else:
+                hold = holds.acquire_hold(self.request.user, room, start_time, end_time)
+        except holds.HoldUnavailable as e:
+            raise serializers.ValidationError({'non_field_errors': [str(e)]})
+        
+        with transaction.atomic():
+            # The index may not have seen other workers' bookings yet
+            free = is_free_locked(room, start_time, end_time)
+            if free:
+                serializer.save(user=self.request.user, total_price=total_price)
+            holds.release_hold(hold)
+        if not free:
+            raise serializers.ValidationError({'non_field_errors': ['This room is not available for the selected time period.']})
+    
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """Book several room intervals at once, all or nothing, with one wallet debit"""
+        serializer = BatchBookingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['bookings']
+        
+        rooms = Room.objects.select_related('venue').in_bulk({item['room'] for item in items})
+        missing = {index: "Room not found." for index, item in enumerate(items) if item['room'] not in rooms}
+        if missing:
+            return Response({'errors': missing}, status=400)
+        for item in items:
+            item['room'] = rooms[item['room']]
+        
+        try:
+            bookings = batch.create_bookings(request.user, items)
+        except batch.BatchBookingError as e:
+            return Response({'errors': e.errors}, status=400)
+        
+        return Response(BookingSerializer(bookings, many=True).data, status=201)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     """API endpoint for reviews"""
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
@@ -149,13 +245,14 @@ class ReviewViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['venue', 'rating']
     ordering_fields = ['created_at', 'rating']
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """Return all reviews or filter by venue"""
         venue_id = self.request.query_params.get('venue_id')
         if venue_id:
-            return Review.objects.filter(venue_id=venue_id).select_related('user', 'venue')
-        return Review.objects.all().select_related('user', 'venue')
+            return Review.objects.filter(venue_id=venue_id)
+        return Review.objects.all()
     
     def perform_create(self, serializer):
         """Create a review ensuring the user has a completed booking for this venue"""
@@ -196,12 +293,7 @@ class RoomAvailabilityAPIView(generics.RetrieveAPIView):
         return get_object_or_404(Room, pk=self.kwargs.get('room_id'))
         
     def get(self, request, room_id):
-        """Get available time slots for a room"""
-        try:
-            room = Room.objects.get(pk=room_id)
-        except Room.DoesNotExist:
-            return Response({"detail": "Room not found."}, status=404)
-        
+        """Get available time slots for a room, or 304 if the client's copy is current"""
         # Get date range from query params or use next 7 days
         start_date_str = request.query_params.get('start_date')
         end_date_str = request.query_params.get('end_date')
@@ -219,13 +311,27 @@ class RoomAvailabilityAPIView(generics.RetrieveAPIView):
         except ValueError:
             return Response({"detail": "Invalid date format. Use YYYY-MM-DD."}, status=400)
         
+        tags = versions.validators('room', room_id, (request.accepted_media_type, request.get_full_path(), start_date, end_date),
+                                   fresh_from=timezone.now().replace(hour=0, minute=0, second=0, microsecond=0))
+        not_modified = versions.not_modified(request, tags)
+        if not_modified is not None:
+            return not_modified
+        
+        try:
+            room = Room.objects.get(pk=room_id)
+        except Room.DoesNotExist:
+            return Response({"detail": "Room not found."}, status=404)
+        
         # Get time slots for the room in the date range
-        time_slots = TimeSlot.objects.filter(
-            room=room,
-            start_time__date__gte=start_date,
-            start_time__date__lte=end_date,
-            is_available=True
-        ).order_by('start_time')
+        if schedules.virtual_slots_enabled():
+            time_slots = schedules.virtual_slots(room, start_date, end_date, available_only=True)
+        else:
+            time_slots = TimeSlot.objects.filter(
+                room=room,
+                start_time__date__gte=start_date,
+                start_time__date__lte=end_date,
+                is_available=True
+            ).order_by('start_time')
         
         # Get existing bookings for the room in the date range
         bookings = Booking.objects.filter(
@@ -239,22 +345,298 @@ class RoomAvailabilityAPIView(generics.RetrieveAPIView):
         time_slot_data = TimeSlotSerializer(time_slots, many=True).data
         booking_data = BookingSerializer(bookings, many=True).data
         
-        return Response({
+        # Merged free periods straight from the room-day bitmaps
+        free_intervals = [
+            {'start': start, 'end': end}
+            for start, end in availability_bitmap.free_intervals(room, start_date, end_date)
+        ]
+        
+        return versions.set_validators(Response({
             'room_id': room.id,
             'room_name': room.name,
             'time_slots': time_slot_data,
-            'existing_bookings': booking_data
+            'existing_bookings': booking_data,
+            'free_intervals': free_intervals
+        }), tags)
+
+
+class RoomMonthOccupancyAPIView(APIView):
+    """
+    API endpoint for month-view calendars.
+    
+    Returns one occupancy summary per day (free, partial or full) for
+    ``?month=YYYY-MM``, defaulting to the current month.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, room_id):
+        month_str = request.query_params.get('month')
+        try:
+            if month_str:
+                month_start = datetime.strptime(month_str, '%Y-%m').date()
+            else:
+                month_start = timezone.localdate().replace(day=1)
+        except ValueError:
+            return Response({"detail": "Invalid month format. Use YYYY-MM."}, status=400)
+        
+        tags = versions.validators('room', room_id, (request.accepted_media_type, request.get_full_path(), month_start),
+                                   fresh_from=timezone.localtime().replace(day=1, hour=0, minute=0, second=0, microsecond=0))
+        not_modified = versions.not_modified(request, tags)
+        if not_modified is not None:
+            return not_modified
+        
+        room = get_object_or_404(Room.objects.select_related('venue__category'), pk=room_id)
+        days = occupancy.month_days(room, month_start.year, month_start.month)
+        
+        return versions.set_validators(Response({
+            'room_id': room.id,
+            'room_name': room.name,
+            'month': month_start.strftime('%Y-%m'),
+            'days': RoomDayOccupancySerializer(days, many=True).data
+        }), tags)
+
+
+class ReservationHoldViewSet(SparseFieldsViewMixin, mixins.CreateModelMixin,
+                             mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                             viewsets.GenericViewSet):
+    """API endpoint to hold a room interval while checkout completes"""
+    serializer_class = ReservationHoldSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_field = 'hold_id'
+    
+    def get_queryset(self):
+        """Return the current user's unexpired holds"""
+        return ReservationHold.objects.filter(
+            user=self.request.user,
+            expires_at__gt=timezone.now()
+        )
+    
+    def perform_create(self, serializer):
+        """Acquire the hold atomically, failing if the interval is taken"""
+        data = serializer.validated_data
+        if data['end_time'] <= data['start_time']:
+            raise serializers.ValidationError({'non_field_errors': ['End time must be after start time.']})
+        
+        try:
+            serializer.instance = holds.acquire_hold(
+                self.request.user, data['room'], data['start_time'], data['end_time']
+            )
+        except holds.HoldUnavailable as e:
+            raise serializers.ValidationError({'non_field_errors': [str(e)]})
+
+
+class RecurrenceRuleViewSet(SparseFieldsViewMixin, mixins.CreateModelMixin,
+                            mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                            viewsets.GenericViewSet):
+    """
+    API endpoint for recurring bookings.
+    
+    Creating a rule books every occurrence inside the booking horizon at once;
+    later occurrences are materialized by ``materialize_recurring_bookings``.
+    Deleting a rule stops further occurrences but keeps existing bookings.
+    """
+    serializer_class = RecurrenceRuleSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """Return the current user's active rules"""
+        return RecurrenceRule.objects.filter(user=self.request.user, is_active=True)
+    
+    def perform_create(self, serializer):
+        """Save the rule and book its first window, failing on any conflict"""
+        with transaction.atomic():
+            rule = serializer.save(user=self.request.user)
+            try:
+                recurrence.materialize(rule, skip_conflicts=False)
+            except batch.BatchBookingError as e:
+                raise serializers.ValidationError({'errors': e.errors})
+    
+    def perform_destroy(self, instance):
+        """Stop materializing the series"""
+        instance.is_active = False
+        instance.save(update_fields=['is_active'])
+
+
+class RoomSearchAPIView(SparseFieldsViewMixin, generics.ListAPIView):
+    """
+    API endpoint to find free rooms across venues.
+    
+    Requires ``start`` and ``end`` (ISO 8601 datetimes); optionally filters on
+    ``guests``, ``city``, ``state`` and ``max_price`` (per hour). Rooms with an
+    active booking, a live hold or a blackout overlapping the window are
+    excluded in the same query, as are rooms whose schedule does not offer the
+    whole window. Results are ranked by closest capacity fit, then price.
+    """
+    serializer_class = RoomSearchResultSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_search_window(self):
+        params = self.request.query_params
+        start = parse_datetime(params.get('start') or '')
+        end = parse_datetime(params.get('end') or '')
+        if start is None or end is None:
+            raise serializers.ValidationError({'detail': 'start and end are required ISO 8601 datetimes.'})
+        if timezone.is_naive(start):
+            start = timezone.make_aware(start)
+        if timezone.is_naive(end):
+            end = timezone.make_aware(end)
+        if end <= start:
+            raise serializers.ValidationError({'detail': 'end must be after start.'})
+        return start, end
+    
+    def get_queryset(self):
+        start, end = self.get_search_window()
+        params = self.request.query_params
+        
+        queryset = Room.objects.filter(
+            is_active=True,
+            venue__is_active=True
+        )
+        
+        try:
+            guests = int(params.get('guests', 1))
+            max_price = Decimal(params['max_price']) if params.get('max_price') else None
+        except (ValueError, InvalidOperation):
+            raise serializers.ValidationError({'detail': 'guests must be an integer and max_price a number.'})
+        
+        queryset = queryset.filter(capacity__gte=guests)
+        if max_price is not None:
+            queryset = queryset.filter(price_per_hour__lte=max_price)
+        if params.get('city'):
+            queryset = queryset.filter(venue__city__iexact=params['city'])
+        if params.get('state'):
+            queryset = queryset.filter(venue__state__iexact=params['state'])
+        
+        # Exclude rooms that are booked or blacked out during the window
+        overlapping_bookings = Booking.objects.filter(
+            room=OuterRef('pk'),
+            status__in=['pending', 'confirmed'],
+            start_time__lt=end,
+            end_time__gt=start
+        )
+        blackouts = SlotException.objects.filter(
+            room=OuterRef('pk'),
+            start_time__lt=end,
+            end_time__gt=start
+        )
+        held = ReservationHold.objects.filter(
+            room=OuterRef('pk'),
+            start_time__lt=end,
+            end_time__gt=start,
+            expires_at__gt=timezone.now()
+        )
+        queryset = queryset.exclude(Exists(overlapping_bookings)).exclude(Exists(blackouts)).exclude(Exists(held))
+        
+        # Keep rooms whose opening hours cover the window
+        queryset = queryset.filter(schedules.within_schedule_q(start, end))
+        
+        # Smallest room that fits the party first, then the cheapest
+        return queryset.order_by('capacity', 'price_per_hour', 'id')
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        start, end = self.get_search_window()
+        context['duration_hours'] = (end - start).total_seconds() / 3600
+        return context
+
+
+class AvailabilityMatrixAPIView(APIView):
+    """
+    API endpoint returning a compact free/busy matrix for one or many rooms.
+    
+    Rooms are selected with ``rooms`` (comma-separated ids) and/or ``venue``.
+    ``start_date``/``end_date`` default to the next 7 days and ``bucket`` sets
+    the bucket length in minutes. With ``layout=grid`` each room gets a string
+    with one character per bucket ('1' busy, '0' free); the default
+    ``layout=intervals`` returns run-length encoded free intervals instead.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_rooms = 200
+    max_days = 92
+    
+    def get(self, request):
+        params = request.query_params
+        
+        try:
+            room_ids = [int(pk) for pk in params.get('rooms', '').split(',') if pk.strip()]
+            bucket_minutes = int(params.get('bucket', 60))
+            start_date = datetime.strptime(params['start_date'], '%Y-%m-%d').date() if params.get('start_date') else timezone.now().date()
+            end_date = datetime.strptime(params['end_date'], '%Y-%m-%d').date() if params.get('end_date') else start_date + timedelta(days=7)
+        except ValueError:
+            return Response({"detail": "Invalid parameters. Use integer room ids and bucket, and YYYY-MM-DD dates."}, status=400)
+        
+        if bucket_minutes < 5 or bucket_minutes > 24 * 60:
+            return Response({"detail": "bucket must be between 5 and 1440 minutes."}, status=400)
+        if end_date < start_date or (end_date - start_date).days >= self.max_days:
+            return Response({"detail": f"Date range must be between 1 and {self.max_days} days."}, status=400)
+        
+        rooms = Room.objects.filter(Q(pk__in=room_ids) | Q(venue_id=params.get('venue') or None)).order_by('id')
+        rooms = list(rooms.values_list('id', 'name')[:self.max_rooms + 1])
+        if not rooms:
+            return Response({"detail": "No rooms found."}, status=404)
+        if len(rooms) > self.max_rooms:
+            return Response({"detail": f"At most {self.max_rooms} rooms per request."}, status=400)
+        
+        start = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+        end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+        busy = availability_matrix.busy_matrix([room_id for room_id, name in rooms], start, end, bucket_minutes)
+        
+        grid = params.get('layout') == 'grid'
+        room_data = []
+        for (room_id, name), row in zip(rooms, busy):
+            entry = {'room_id': room_id, 'room_name': name}
+            if grid:
+                entry['busy'] = availability_matrix.bit_string(row)
+            else:
+                entry['free'] = [
+                    [run_start.isoformat(), run_end.isoformat()]
+                    for run_start, run_end in availability_matrix.free_runs(row, start, bucket_minutes, end)
+                ]
+            room_data.append(entry)
+        
+        return Response({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'bucket_minutes': bucket_minutes,
+            'rooms': room_data
+        })
+
+
+class AutocompleteAPIView(APIView):
+    """
+    API endpoint for search box suggestions.
+    
+    ``?q=`` is matched as a prefix of any word of venue names, cities, states
+    and categories from an in-memory index; ``?types=city,venue`` narrows
+    the kinds and ``?limit=`` caps the suggestions (default 10, max 25).
+    """
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request):
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 25))
+        except ValueError:
+            return Response({"detail": "limit must be a number."}, status=400)
+        
+        kinds = [kind for kind in request.query_params.get('types', '').split(',') if kind]
+        unknown = set(kinds) - set(autocomplete.KINDS)
+        if unknown:
+            return Response({"detail": f"Unknown types: {', '.join(sorted(unknown))}."}, status=400)
+        
+        return Response({
+            'query': request.query_params.get('q', ''),
+            'results': autocomplete.complete(request.query_params.get('q', ''), limit, kinds)
         })
 
 
-class FavoriteListCreateAPIView(generics.ListCreateAPIView):
+class FavoriteListCreateAPIView(SparseFieldsViewMixin, generics.ListCreateAPIView):
     """API endpoint to list and create favorites"""
     serializer_class = FavoriteSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
         """Return favorites for the current user"""
-        return Favorite.objects.filter(user=self.request.user).select_related('venue')
+        return Favorite.objects.filter(user=self.request.user)
 
 
 class FavoriteDestroyAPIView(generics.DestroyAPIView):
@@ -0,0 +1,230 @@
+"""
+Prefix autocomplete for the venue search box.
+
+Venue names, cities, states and categories are held in a sorted list of
+normalized keys per kind, per process; a keystroke is one ``bisect`` and a
+short scan of the matching run in each requested kind, with no database
+access. Venue names are
+keyed at every word, so "pal" finds "Grand Palace". Cities are reference
+counted by the active venues in them, and state display names come from
+``Venue.INDIA_STATES``.
+
+The index is loaded on first use and then kept current from the Venue and
+VenueCategory signals. Every thread shares it behind one lock, held only to
+read or to swap in a rebuilt index. Changes committed by other processes are
+picked up by a background reload once the index is older than
+``AUTOCOMPLETE_REFRESH_SECONDS``; keystrokes keep reading the current index
+meanwhile.
+"""
+
+import bisect
+import re
+import threading
+import time
+import unicodedata
+
+from django.conf import settings
+from django.db import connections
+
+
+# Kinds in the order they are offered for equally good matches
+KINDS = ('city', 'state', 'category', 'venue')
+
+# Matches read per kind per keystroke before ranking
+SCAN_LIMIT = 200
+
+NON_WORD_RE = re.compile(r'[^\w\s]+', re.UNICODE)
+
+
+def refresh_seconds():
+    return getattr(settings, 'AUTOCOMPLETE_REFRESH_SECONDS', 300)
+
+
+def normalize(text):
+    """Lowercase, accent-free, punctuation-free text with single spaces"""
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(NON_WORD_RE.sub(' ', text.lower()).split())
+
+
+def word_keys(text):
+    """The normalized text from each word onwards"""
+    words = normalize(text).split()
+    return [' '.join(words[position:]) for position in range(len(words))]
+
+
+class PrefixIndex:
+    """Sorted (key, ident) entries per kind with their labels, updated in place"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+        self.loaded_at = None
+        self._reloading = False
+
+    def _clear(self):
+        self._keys = {kind: [] for kind in KINDS}
+        self._entries = {}
+        self._venues = {}
+        self._city_counts = {}
+
+    # Entries
+
+    def _add(self, kind, ident, label, keys, **extra):
+        self._entries[(kind, ident)] = dict(extra, type=kind, label=label, keys=keys)
+        for key in keys:
+            bisect.insort(self._keys[kind], (key, ident))
+
+    def _remove(self, kind, ident):
+        entry = self._entries.pop((kind, ident), None)
+        if entry is None:
+            return
+        keys = self._keys[kind]
+        for key in entry['keys']:
+            position = bisect.bisect_left(keys, (key, ident))
+            if position < len(keys) and keys[position] == (key, ident):
+                del keys[position]
+
+    def _add_city(self, city):
+        ident = normalize(city)
+        if not ident:
+            return
+        self._city_counts[ident] = self._city_counts.get(ident, 0) + 1
+        if self._city_counts[ident] == 1:
+            self._add('city', ident, city, word_keys(city), value=city)
+        self._entries[('city', ident)]['count'] = self._city_counts[ident]
+
+    def _drop_city(self, city):
+        ident = normalize(city)
+        if ident not in self._city_counts:
+            return
+        self._city_counts[ident] -= 1
+        if self._city_counts[ident] <= 0:
+            del self._city_counts[ident]
+            self._remove('city', ident)
+        else:
+            self._entries[('city', ident)]['count'] = self._city_counts[ident]
+
+    # Updates
+
+    def set_venue(self, venue_id, name, city, is_active=True):
+        """Add, change or (when inactive) drop one venue and its city"""
+        with self._lock:
+            self._unset_venue(venue_id)
+            if not is_active:
+                return
+            self._venues[venue_id] = city
+            self._add('venue', venue_id, name, word_keys(name), value=venue_id, city=city)
+            self._add_city(city)
+
+    def _unset_venue(self, venue_id):
+        if venue_id in self._venues:
+            self._drop_city(self._venues.pop(venue_id))
+            self._remove('venue', venue_id)
+
+    def remove_venue(self, venue_id):
+        with self._lock:
+            self._unset_venue(venue_id)
+
+    def set_category(self, category_id, name):
+        with self._lock:
+            self._remove('category', category_id)
+            self._add('category', category_id, name, word_keys(name), value=category_id)
+
+    def remove_category(self, category_id):
+        with self._lock:
+            self._remove('category', category_id)
+
+    def load(self):
+        """Rebuild everything from the database, then swap it in"""
+        from .models import Venue, VenueCategory
+
+        fresh = PrefixIndex()
+        for code, label in Venue.INDIA_STATES:
+            fresh._add('state', code, label, word_keys(label) + [code.lower()], value=code)
+        for pk, name in VenueCategory.objects.values_list('pk', 'name'):
+            fresh._add('category', pk, name, word_keys(name), value=pk)
+        for pk, name, city in Venue.objects.filter(is_active=True).values_list('pk', 'name', 'city'):
+            fresh._venues[pk] = city
+            fresh._add('venue', pk, name, word_keys(name), value=pk, city=city)
+            fresh._add_city(city)
+        with self._lock:
+            self._keys, self._entries = fresh._keys, fresh._entries
+            self._venues, self._city_counts = fresh._venues, fresh._city_counts
+            self.loaded_at = time.monotonic()
+
+    def ensure_loaded(self):
+        """Load on first use; past the refresh interval, reload in the background"""
+        if self.loaded_at is None:
+            self.load()
+        elif time.monotonic() - self.loaded_at > refresh_seconds():
+            with self._lock:
+                if self._reloading:
+                    return
+                self._reloading = True
+            threading.Thread(target=self._reload, name='autocomplete-reload', daemon=True).start()
+
+    def _reload(self):
+        try:
+            self.load()
+        finally:
+            self._reloading = False
+            connections.close_all()
+
+    # Reads
+
+    def complete(self, prefix, limit=10, kinds=None):
+        """Entries with a word starting with ``prefix``, best first"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        self.ensure_loaded()
+        matches = {}
+        with self._lock:
+            for kind_rank, kind in enumerate(KINDS):
+                if kinds and kind not in kinds:
+                    continue
+                keys = self._keys[kind]
+                start = bisect.bisect_left(keys, (prefix,))
+                for position in range(start, min(start + SCAN_LIMIT, len(keys))):
+                    key, ident = keys[position]
+                    if not key.startswith(prefix):
+                        break
+                    entry = self._entries[(kind, ident)]
+                    # Matching the label's first word beats matching a later one
+                    from_start = key == entry['keys'][0]
+                    rank = (not from_start, kind_rank, -entry.get('count', 0), entry['label'].lower())
+                    if (kind, ident) not in matches or rank < matches[(kind, ident)][0]:
+                        matches[(kind, ident)] = (rank, entry)
+        return [
+            {name: value for name, value in entry.items() if name != 'keys'}
+            for _, entry in sorted(matches.values(), key=lambda match: match[0])[:limit]
+        ]
+
+
+index = PrefixIndex()
+
+
+def complete(prefix, limit=10, kinds=None):
+    return index.complete(prefix, limit, kinds)
+
+
+def venue_changed(venue):
+    """Mirror a saved venue, if the index has been loaded in this process"""
+    if index.loaded_at is not None:
+        index.set_venue(venue.pk, venue.name, venue.city, venue.is_active)
+
+
+def venue_removed(venue_id):
+    if index.loaded_at is not None:
+        index.remove_venue(venue_id)
+
+
+def category_changed(category):
+    if index.loaded_at is not None:
+        index.set_category(category.pk, category.name)
+
+
+def category_removed(category_id):
+    if index.loaded_at is not None:
+        index.remove_category(category_id)
@@ -0,0 +1,179 @@
+"""
+Bitmap-backed availability store for rooms.
+
+Every room-day is kept as a 96-bit bitmap of quarter-hours (bit 0 is 00:00-00:15
+local time), stored as a 12-byte blob on ``RoomAvailabilityDay``. A set bit means
+the quarter-hour is offered and free, mirroring ``TimeSlot.is_available``. Range
+operations are plain integer masks, so checking a room over a month reads at
+most one small row per day instead of every slot row.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+BITMAP_BYTES = SLOTS_PER_DAY // 8
+FULL_DAY = (1 << SLOTS_PER_DAY) - 1
+
+
+def to_int(blob):
+    """Decode a stored bitmap blob"""
+    return int.from_bytes(bytes(blob or b''), 'little')
+
+
+def to_bytes(bits):
+    """Encode a bitmap for storage"""
+    return (bits & FULL_DAY).to_bytes(BITMAP_BYTES, 'little')
+
+
+def range_mask(first, last):
+    """Mask with bits [first, last) set"""
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def _slot_index(moment, round_up=False):
+    minutes = moment.hour * 60 + moment.minute
+    index, remainder = divmod(minutes, SLOT_MINUTES)
+    if round_up and (remainder or moment.second or moment.microsecond):
+        index += 1
+    return index
+
+
+def day_masks(start, end):
+    """
+    Split [start, end) into per-day masks.
+
+    Returns a dict mapping local dates to the quarter-hour mask covered on that
+    day. Partial quarter-hours are widened to the enclosing slot.
+    """
+    start = timezone.localtime(start) if timezone.is_aware(start) else start
+    end = timezone.localtime(end) if timezone.is_aware(end) else end
+    masks = {}
+    day = start.date()
+    while day <= end.date():
+        first = _slot_index(start) if day == start.date() else 0
+        last = _slot_index(end, round_up=True) if day == end.date() else SLOTS_PER_DAY
+        mask = range_mask(first, last)
+        if mask:
+            masks[day] = masks.get(day, 0) | mask
+        day += timedelta(days=1)
+    return masks
+
+
+def merge_masks(intervals):
+    """Combine day masks for many (start, end) intervals"""
+    merged = {}
+    for start, end in intervals:
+        for day, mask in day_masks(start, end).items():
+            merged[day] = merged.get(day, 0) | mask
+    return merged
+
+
+def _apply(room, intervals, set_bits):
+    from .models import RoomAvailabilityDay
+
+    masks = merge_masks(intervals)
+    if not masks:
+        return
+    room_id = getattr(room, 'pk', room)
+    with transaction.atomic():
+        rows = {
+            row.date: row for row in RoomAvailabilityDay.objects.select_for_update().filter(
+                room_id=room_id, date__in=list(masks)
+            )
+        }
+        new_rows = []
+        for day, mask in masks.items():
+            row = rows.get(day)
+            if row is None:
+                row = RoomAvailabilityDay(room_id=room_id, date=day, free_bits=to_bytes(0))
+                new_rows.append(row)
+            bits = to_int(row.free_bits)
+            bits = bits | mask if set_bits else bits & ~mask
+            row.free_bits = to_bytes(bits)
+        if new_rows:
+            RoomAvailabilityDay.objects.bulk_create(new_rows)
+        if rows:
+            RoomAvailabilityDay.objects.bulk_update(list(rows.values()), ['free_bits'])
+
+
+def set_ranges(room, intervals):
+    """Mark every (start, end) interval as available"""
+    _apply(room, intervals, True)
+
+
+def clear_ranges(room, intervals):
+    """Mark every (start, end) interval as unavailable"""
+    _apply(room, intervals, False)
+
+
+def set_range(room, start, end):
+    """Mark [start, end) as available"""
+    set_ranges(room, [(start, end)])
+
+
+def clear_range(room, start, end):
+    """Mark [start, end) as unavailable"""
+    clear_ranges(room, [(start, end)])
+
+
+def day_bitmaps(room, start_date, end_date):
+    """Return {date: bits} for the stored days between the two dates (inclusive)"""
+    from .models import RoomAvailabilityDay
+
+    rows = RoomAvailabilityDay.objects.filter(
+        room_id=getattr(room, 'pk', room),
+        date__gte=start_date,
+        date__lte=end_date
+    ).values_list('date', 'free_bits')
+    return {day: to_int(blob) for day, blob in rows}
+
+
+def test_range(room, start, end):
+    """Return True if every quarter-hour of [start, end) is available"""
+    masks = day_masks(start, end)
+    if not masks:
+        return False
+    bitmaps = day_bitmaps(room, min(masks), max(masks))
+    return all(bitmaps.get(day, 0) & mask == mask for day, mask in masks.items())
+
+
+def free_intervals(room, start_date, end_date):
+    """
+    Return merged (start, end) datetimes of available time between two dates.
+
+    Runs of set bits are joined across midnight so overnight availability comes
+    back as a single interval.
+    """
+    bitmaps = day_bitmaps(room, start_date, end_date)
+    intervals = []
+    day = start_date
+    while day <= end_date:
+        bits = bitmaps.get(day, 0)
+        midnight = timezone.make_aware(datetime.combine(day, time.min))
+        index = 0
+        while bits:
+            if bits & 1:
+                run = 0
+                while bits & 1:
+                    bits >>= 1
+                    run += 1
+                start = midnight + timedelta(minutes=index * SLOT_MINUTES)
+                end = start + timedelta(minutes=run * SLOT_MINUTES)
+                if intervals and intervals[-1][1] == start:
+                    intervals[-1] = (intervals[-1][0], end)
+                else:
+                    intervals.append((start, end))
+                index += run
+            else:
+                skip = (bits & -bits).bit_length() - 1
+                bits >>= skip
+                index += skip
+        day += timedelta(days=1)
+    return intervals
@@ -0,0 +1,85 @@
+"""
+Vectorized free/busy matrices for calendars.
+
+Bookings, holds and blackouts for the requested rooms are fetched in one query each,
+converted to bucket indices with NumPy, and painted onto a rooms x buckets grid
+through a difference array and a cumulative sum. The grid can be returned as
+one bit string per room or run-length encoded into free intervals.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from .models import Booking, ReservationHold, SlotException
+
+
+ACTIVE_BOOKING_STATUSES = ('pending', 'confirmed')
+
+
+def _bucket_bounds(intervals, row_index, start, bucket_seconds, buckets):
+    """Convert (room_id, start, end) rows into row / first-bucket / end-bucket arrays"""
+    if not intervals:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    rows = np.fromiter((row_index[room_id] for room_id, _, _ in intervals), dtype=np.int64, count=len(intervals))
+    starts = np.fromiter(((s - start).total_seconds() for _, s, _ in intervals), dtype=np.float64, count=len(intervals))
+    ends = np.fromiter(((e - start).total_seconds() for _, _, e in intervals), dtype=np.float64, count=len(intervals))
+    first = np.clip(np.floor(starts / bucket_seconds), 0, buckets).astype(np.int64)
+    last = np.clip(np.ceil(ends / bucket_seconds), 0, buckets).astype(np.int64)
+    return rows, first, last
+
+
+def busy_matrix(room_ids, start, end, bucket_minutes=60):
+    """
+    Return a boolean array of shape (len(room_ids), buckets).
+
+    A bucket is busy when any active booking, live hold or blackout overlaps it.
+    """
+    bucket_seconds = bucket_minutes * 60
+    buckets = int(np.ceil((end - start).total_seconds() / bucket_seconds))
+    row_index = {room_id: row for row, room_id in enumerate(room_ids)}
+
+    intervals = list(Booking.objects.filter(
+        room_id__in=room_ids,
+        status__in=ACTIVE_BOOKING_STATUSES,
+        start_time__lt=end,
+        end_time__gt=start
+    ).values_list('room_id', 'start_time', 'end_time'))
+    intervals += SlotException.objects.filter(
+        room_id__in=room_ids,
+        start_time__lt=end,
+        end_time__gt=start
+    ).values_list('room_id', 'start_time', 'end_time')
+    intervals += ReservationHold.objects.filter(
+        room_id__in=room_ids,
+        start_time__lt=end,
+        end_time__gt=start,
+        expires_at__gt=timezone.now()
+    ).values_list('room_id', 'start_time', 'end_time')
+
+    rows, first, last = _bucket_bounds(intervals, row_index, start, bucket_seconds, buckets)
+    diff = np.zeros((len(room_ids), buckets + 1), dtype=np.int32)
+    np.add.at(diff, (rows, first), 1)
+    np.add.at(diff, (rows, last), -1)
+    return np.cumsum(diff[:, :buckets], axis=1) > 0
+
+
+def free_runs(busy_row, start, bucket_minutes, end=None):
+    """Run-length encode one room's row into (start, end) datetimes of free time"""
+    padded = np.concatenate(([True], busy_row, [True]))
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    bucket = timedelta(minutes=bucket_minutes)
+    runs = []
+    for run_start, run_end in zip(edges[::2], edges[1::2]):
+        run_end = start + bucket * int(run_end)
+        if end is not None and run_end > end:
+            run_end = end
+        runs.append((start + bucket * int(run_start), run_end))
+    return runs
+
+
+def bit_string(busy_row):
+    """Render one room's row as a string of '0' (free) and '1' (busy) characters"""
+    return busy_row.astype(np.uint8).tobytes().translate(bytes.maketrans(b'\x00\x01', b'01')).decode('ascii')
@@ -0,0 +1,194 @@
+"""
+All-or-nothing creation of many bookings at once.
+
+Used by the batch booking API for group reservations. Every requested interval
+is validated against the others, then checked against active bookings,
+blackouts and other users' live holds with one OR-ed overlap query each (and
+against the rooms' opening hours when slots are virtual). The combined price
+is debited from the wallet once and the bookings are inserted with
+``bulk_create``, all inside one transaction.
+"""
+
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import WalletTransaction
+from .interval_index import booking_index
+from . import live, occupancy, popularity, schedules, versions
+from .models import Booking, ReservationHold, Room, SlotException
+
+
+ACTIVE_BOOKING_STATUSES = ('pending', 'confirmed')
+
+
+class BatchBookingError(Exception):
+    """Raised with per-item error messages when a batch cannot be booked"""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def overlap_filter(items):
+    """One Q matching anything that overlaps any (room, start_time, end_time) item"""
+    return reduce(or_, (
+        Q(room=item['room'], start_time__lt=item['end_time'], end_time__gt=item['start_time'])
+        for item in items
+    ))
+
+
+def _internal_conflicts(items):
+    """Indexes of items overlapping another item for the same room"""
+    clashing = set()
+    by_room = {}
+    for index, item in enumerate(items):
+        by_room.setdefault(item['room'].pk, []).append(index)
+    for indexes in by_room.values():
+        indexes.sort(key=lambda i: items[i]['start_time'])
+        latest_end = None
+        latest_index = None
+        for index in indexes:
+            if latest_end is not None and items[index]['start_time'] < latest_end:
+                clashing.update((index, latest_index))
+            if latest_end is None or items[index]['end_time'] > latest_end:
+                latest_end = items[index]['end_time']
+                latest_index = index
+    return clashing
+
+
+def _external_conflicts(user, items):
+    """
+    Indexes of items overlapping an active booking, a blackout or someone
+    else's live hold, or (with virtual slots) outside the room's schedule
+    """
+    taken = list(Booking.objects.filter(
+        overlap_filter(items),
+        status__in=ACTIVE_BOOKING_STATUSES
+    ).values_list('room_id', 'start_time', 'end_time'))
+    taken += SlotException.objects.filter(overlap_filter(items)).values_list('room_id', 'start_time', 'end_time')
+    taken += ReservationHold.objects.filter(
+        overlap_filter(items),
+        expires_at__gt=timezone.now()
+    ).exclude(user=user).values_list('room_id', 'start_time', 'end_time')
+
+    taken_by_room = {}
+    for room_id, start, end in taken:
+        taken_by_room.setdefault(room_id, []).append((start, end))
+
+    clashing = set()
+    for index, item in enumerate(items):
+        for start, end in taken_by_room.get(item['room'].pk, ()):
+            if start < item['end_time'] and end > item['start_time']:
+                clashing.add(index)
+                break
+
+    if schedules.virtual_slots_enabled():
+        rooms = Room.objects.select_related('schedule', 'venue__category').in_bulk(
+            {item['room'].pk for item in items}
+        )
+        for index, item in enumerate(items):
+            if not schedules.within_schedule(rooms[item['room'].pk], item['start_time'], item['end_time']):
+                clashing.add(index)
+    return clashing
+
+
+def sync_index(bookings):
+    """Push bulk-created bookings into the interval index, daily occupancy, live streams, popularity and room versions"""
+    for booking in bookings:
+        booking_index.sync(booking)
+        live.publish_interval(booking.room_id, booking.start_time, booking.end_time, False, 'booking')
+    occupancy.refresh_bookings(bookings)
+    popularity.record_bookings(bookings)
+    versions.bump(room_ids=[booking.room_id for booking in bookings])
+
+
+def price_for(room, start_time, end_time):
+    """Price of ``room`` for the interval, using the same rounding as the booking form"""
+    hours = (end_time - start_time).total_seconds() / 3600
+    return Decimal(str(float(room.price_per_hour) * hours))
+
+
+def create_bookings(user, items, description="Group booking", status='confirmed',
+                    skip_conflicts=False, extra_fields=None):
+    """
+    Book every item or none of them.
+
+    ``items`` are dicts with ``room``, ``start_time``, ``end_time``,
+    ``num_guests`` and optionally ``special_requests``. Returns the created
+    bookings, or raises ``BatchBookingError`` mapping item indexes to messages.
+    With ``skip_conflicts`` items clashing with existing bookings, blackouts or
+    holds (or closed hours) are left out instead of failing the batch. ``extra_fields`` are set on every
+    created booking.
+    """
+    errors = {}
+    for index, item in enumerate(items):
+        if item['end_time'] <= item['start_time']:
+            errors[index] = "End time must be after start time."
+        elif item['start_time'] < timezone.now():
+            errors[index] = "Cannot book a time slot in the past."
+    for index in _internal_conflicts(items):
+        errors.setdefault(index, "Overlaps another booking in this request.")
+    if errors:
+        raise BatchBookingError(errors)
+
+    with transaction.atomic():
+        # Lock the rooms in a stable order so concurrent batches cannot deadlock
+        room_ids = sorted({item['room'].pk for item in items})
+        list(Room.objects.select_for_update().filter(pk__in=room_ids).order_by('pk').values_list('pk', flat=True))
+
+        clashing = _external_conflicts(user, items)
+        if skip_conflicts:
+            items = [item for index, item in enumerate(items) if index not in clashing]
+            if not items:
+                return []
+        elif clashing:
+            raise BatchBookingError({
+                index: "This room is not available for the selected time period."
+                for index in sorted(clashing)
+            })
+
+        prices = [price_for(item['room'], item['start_time'], item['end_time']) for item in items]
+        total_price = sum(prices, Decimal('0'))
+
+        # Debit the wallet once for the whole batch
+        payer = get_user_model().objects.select_for_update().get(pk=user.pk)
+        if not payer.deduct_from_wallet(total_price):
+            raise BatchBookingError({'wallet': "Insufficient coins in your wallet! Please add more coins."})
+        user.wallet_balance = payer.wallet_balance
+
+        WalletTransaction.objects.create(
+            user=payer,
+            amount=-total_price,
+            transaction_type='booking',
+            description=f"{description} ({len(items)} bookings)",
+            reference_id=f"BOOK-{timezone.now().strftime('%Y%m%d%H%M%S')}"
+        )
+
+        bookings = Booking.objects.bulk_create([
+            Booking(
+                user=payer,
+                room=item['room'],
+                start_time=item['start_time'],
+                end_time=item['end_time'],
+                num_guests=item['num_guests'],
+                special_requests=item.get('special_requests'),
+                status=status,
+                total_price=price,
+                **(extra_fields or {})
+            )
+            for item, price in zip(items, prices)
+        ])
+
+        # The user's own holds on these intervals have served their purpose
+        ReservationHold.objects.filter(overlap_filter(items), user=payer).delete()
+
+        # bulk_create skips the Booking signals, so update the index on commit
+        transaction.on_commit(lambda: sync_index(bookings))
+
+    return bookings
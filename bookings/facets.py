@@ -0,0 +1,228 @@
+"""
+Faceted filtering for the venue list.
+
+Every sidebar option is a condition on the venue row: the category, the
+denormalized room price bounds and average rating, a capacity range, or a
+test on the amenity bitmask, so no joins multiply the venue rows. The
+list is filtered with the selected options, and the counts shown beside
+every option come from one ``aggregate`` query holding a conditional
+``COUNT`` per option. As usual for facets, an option's count
+applies every selected filter except the ones from its own group.
+"""
+
+from django.db.models import Count, Exists, F, OuterRef, Q
+
+from .models import Amenity, Venue
+from . import amenity_masks
+
+
+TYPE_OPTIONS = [
+    ('hotel', 'Hotels'),
+    ('restaurant', 'Restaurants'),
+    ('event_space', 'Event Spaces'),
+]
+
+AMENITY_OPTIONS = [
+    ('wifi', 'WiFi'),
+    ('gym', 'Gym/Fitness Center'),
+    ('swimming_pool', 'Swimming Pool'),
+    ('parking', 'Parking'),
+    ('restaurant', 'Restaurant'),
+    ('ac', 'Air Conditioning'),
+    ('spa', 'Spa'),
+    ('room_service', 'Room Service'),
+]
+
+PRICE_OPTIONS = [
+    ('0-1000', '₹0 - ₹1000', None, 1000),
+    ('1000-2000', '₹1000 - ₹2000', 1000, 2000),
+    ('2000-5000', '₹2000 - ₹5000', 2000, 5000),
+    ('5000+', '₹5000+', 5000, None),
+]
+
+CAPACITY_OPTIONS = [
+    ('1-10', '1-10 people', None, 10),
+    ('11-50', '11-50 people', 11, 50),
+    ('51-100', '51-100 people', 51, 100),
+    ('100+', '100+ people', 100, None),
+]
+
+RATING_OPTIONS = [
+    ('4+', '4+ Stars', 4),
+    ('3+', '3+ Stars', 3),
+    ('2+', '2+ Stars', 2),
+]
+
+SORT_OPTIONS = {
+    'popularity': [F('popularity__score').desc(nulls_last=True), 'name'],
+    'price_low': ['min_price_per_hour', 'name'],
+    'price_high': ['-max_price_per_hour', 'name'],
+    'rating': ['-rating_avg', '-rating_count', 'name'],
+}
+
+# The list's sort when none is picked, as the sort menu shows
+DEFAULT_SORT = 'popularity'
+
+
+def _range(field, low, high):
+    lookups = {}
+    if low is not None:
+        lookups[f'{field}__gte'] = low
+    if high is not None:
+        lookups[f'{field}__lte'] = high
+    return lookups
+
+
+def amenity_bits():
+    """(name, bit) of every amenity, read once per request"""
+    return list(Amenity.objects.values_list('name', 'bit'))
+
+
+def option_condition(facet, value, amenities=None):
+    """Q matching venues that have ``value`` for ``facet``, or None for unknown values"""
+    if facet == 'type':
+        return Q(category__name__icontains=value)
+    if facet == 'amenities':
+        return amenity_condition(value, amenities)
+    if facet == 'price_range':
+        for option, _, low, high in PRICE_OPTIONS:
+            if option == value:
+                # The venue's room price span must overlap the range
+                return Q(**_range('max_price_per_hour', low, None), **_range('min_price_per_hour', None, high))
+    if facet == 'capacity':
+        for option, _, low, high in CAPACITY_OPTIONS:
+            if option == value:
+                return Q(**_range('max_capacity', low, high))
+    if facet == 'rating':
+        for option, _, minimum in RATING_OPTIONS:
+            if option == value:
+                return Q(rating_avg__gte=minimum)
+    return None
+
+
+def amenity_condition(value, amenities=None):
+    """Venues with an amenity whose name contains ``value``, tested on the amenity bitmask"""
+    if amenities is None:
+        amenities = amenity_bits()
+    matches = [bit for name, bit in amenities if value.lower() in name.lower()]
+    if not matches:
+        return Q(pk__in=[])
+    if None in matches:
+        # Amenities beyond the 63 mask bits are only reachable through the join
+        return Q(Exists(Venue.amenities.through.objects.filter(
+            venue_id=OuterRef('pk'),
+            amenity__name__icontains=value
+        )))
+    return amenity_masks.has_any(amenity_masks.mask_for(matches))
+
+
+def selected(params):
+    """{facet: [values]} picked in the request"""
+    picked = {
+        'type': [params.get('type')],
+        'amenities': params.getlist('amenities'),
+        'price_range': [params.get('price_range')],
+        'capacity': [params.get('capacity')],
+        'rating': [params.get('rating')],
+    }
+    return {facet: [value for value in values if value] for facet, values in picked.items()}
+
+
+def normalized(params):
+    """Canonical, hashable form of the selected filters, e.g. for cache keys"""
+    known = {
+        'price_range': {option[0] for option in PRICE_OPTIONS},
+        'capacity': {option[0] for option in CAPACITY_OPTIONS},
+        'rating': {option[0] for option in RATING_OPTIONS},
+    }
+    key = []
+    for facet, values in selected(params).items():
+        if facet in known:
+            values = [value for value in values if value in known[facet]]
+        else:
+            values = sorted({value.lower() for value in values})
+        if values:
+            key.append((facet, tuple(values)))
+    return tuple(key)
+
+
+def conditions(params, exclude=None, amenities=None):
+    """Q per selected facet; amenities must all match, other facets take one value"""
+    if amenities is None and selected(params)['amenities']:
+        amenities = amenity_bits()
+    result = {}
+    for facet, values in selected(params).items():
+        if facet == exclude:
+            continue
+        condition = Q()
+        for value in values:
+            option = option_condition(facet, value, amenities)
+            if option is not None:
+                condition &= option
+        if condition:
+            result[facet] = condition
+    return result
+
+
+def filter_venues(queryset, params):
+    """Apply the selected sidebar filters to a venue queryset"""
+    for condition in conditions(params).values():
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+def sort_option(params):
+    """The requested sort if it is one of ``SORT_OPTIONS``, else ``DEFAULT_SORT``"""
+    sort = params.get('sort')
+    return sort if sort in SORT_OPTIONS else DEFAULT_SORT
+
+
+def sort_venues(queryset, sort):
+    """Order by one of ``SORT_OPTIONS``, leaving the default order for anything else"""
+    if sort in SORT_OPTIONS:
+        return queryset.order_by(*SORT_OPTIONS[sort])
+    return queryset
+
+
+def _all_options():
+    yield 'type', [(value, label) for value, label in TYPE_OPTIONS]
+    yield 'amenities', [(value, label) for value, label in AMENITY_OPTIONS]
+    yield 'price_range', [(value, label) for value, label, _, _ in PRICE_OPTIONS]
+    yield 'capacity', [(value, label) for value, label, _, _ in CAPACITY_OPTIONS]
+    yield 'rating', [(value, label) for value, label, _ in RATING_OPTIONS]
+
+
+def facet_counts(params):
+    """{facet: {value: count}} for every sidebar option, in one query"""
+    amenities = amenity_bits()
+    aggregates = {}
+    for facet, options in _all_options():
+        others = Q()
+        for condition in conditions(params, exclude=facet, amenities=amenities).values():
+            others &= condition
+        # Amenities combine with AND, so their counts keep the other picked amenities
+        if facet == 'amenities':
+            others &= conditions(params, amenities=amenities).get('amenities', Q())
+        for position, (value, _) in enumerate(options):
+            aggregates[f'{facet}_{position}'] = Count(
+                'pk', filter=others & option_condition(facet, value, amenities)
+            )
+    counts = Venue.objects.filter(is_active=True).aggregate(**aggregates)
+    return {
+        facet: {value: counts[f'{facet}_{position}'] for position, (value, _) in enumerate(options)}
+        for facet, options in _all_options()
+    }
+
+
+def sidebar(params, counts=None):
+    """Facet options with labels, counts and selection state for the list template"""
+    if counts is None:
+        counts = facet_counts(params)
+    picked = selected(params)
+    return {
+        facet: [
+            {'value': value, 'label': label, 'count': counts[facet][value], 'selected': value in picked[facet]}
+            for value, label in options
+        ]
+        for facet, options in _all_options()
+    }
@@ -0,0 +1,178 @@
+"""
+Geospatial venue search on geohash prefixes.
+
+Every venue with coordinates stores a 12-character geohash in an indexed
+column. A radius search picks the longest prefix whose 3x3 block of cells
+around the centre is guaranteed to cover the circle, reads the candidates
+with nine B-tree range scans, and re-ranks them by haversine distance.
+Nearest-k searches widen the block until k venues are found, then run one
+exact radius search out to the k-th distance.
+"""
+
+import math
+
+from django.db.models import Case, FloatField, IntegerField, Q, Value, When
+
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+PRECISION = 12
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_LAT_DEGREE = 110.574
+KM_PER_LON_DEGREE = 111.320
+
+DEFAULT_RADIUS_KM = 10
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    """Geohash of a point"""
+    latitude, longitude = float(latitude), float(longitude)
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    code = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(code) < precision:
+        value, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            code.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(code)
+
+
+def cell_size(precision):
+    """(latitude degrees, longitude degrees) spanned by one cell"""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def covered_radius(latitude, precision):
+    """Distance in km from any point to the edge of the 3x3 block around its cell"""
+    lat_degrees, lon_degrees = cell_size(precision)
+    return min(
+        lat_degrees * KM_PER_LAT_DEGREE,
+        lon_degrees * KM_PER_LON_DEGREE * math.cos(math.radians(min(abs(float(latitude)), 89.9)))
+    )
+
+
+def precision_for(latitude, radius_km):
+    """Longest prefix whose 3x3 block covers ``radius_km``, or 0 for the whole world"""
+    for precision in range(PRECISION, 0, -1):
+        if covered_radius(latitude, precision) >= radius_km:
+            return precision
+    return 0
+
+
+def block(latitude, longitude, precision):
+    """The cell containing the point and its eight neighbours"""
+    lat_degrees, lon_degrees = cell_size(precision)
+    cells = set()
+    for lat_step in (-1, 0, 1):
+        neighbour_lat = float(latitude) + lat_step * lat_degrees
+        if not -90.0 <= neighbour_lat <= 90.0:
+            continue
+        for lon_step in (-1, 0, 1):
+            neighbour_lon = (float(longitude) + lon_step * lon_degrees + 180.0) % 360.0 - 180.0
+            cells.add(encode(neighbour_lat, neighbour_lon, precision))
+    return cells
+
+
+def next_prefix(cell):
+    """
+    The first geohash of that length after every one starting with ``cell``,
+    or None past the last cell. Built from geohash characters only, so the
+    range holds under any collation that orders digits and lowercase letters.
+    """
+    cell = cell.rstrip(BASE32[-1])
+    if not cell:
+        return None
+    return cell[:-1] + BASE32[BASE32.index(cell[-1]) + 1]
+
+
+def prefix_filter(cells):
+    """Index range scans for every geohash starting with one of ``cells``"""
+    condition = Q()
+    for cell in cells:
+        upper = next_prefix(cell)
+        if upper is None:
+            condition |= Q(geohash__gte=cell)
+        else:
+            condition |= Q(geohash__gte=cell, geohash__lt=upper)
+    return condition
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def _candidates(queryset, latitude, longitude, precision):
+    queryset = queryset.filter(geohash__isnull=False)
+    if precision:
+        queryset = queryset.filter(prefix_filter(block(latitude, longitude, precision)))
+    return [
+        (haversine(latitude, longitude, lat, lon), pk)
+        for pk, lat, lon in queryset.values_list('pk', 'latitude', 'longitude')
+    ]
+
+
+def within(queryset, latitude, longitude, radius_km):
+    """(distance km, pk) of venues within ``radius_km``, nearest first"""
+    candidates = _candidates(queryset, latitude, longitude, precision_for(latitude, radius_km))
+    return sorted(candidate for candidate in candidates if candidate[0] <= radius_km)
+
+
+def nearest(queryset, latitude, longitude, k, max_radius_km=None):
+    """(distance km, pk) of the ``k`` venues nearest the point, nearest first"""
+    for precision in range(8, -1, -1):
+        candidates = _candidates(queryset, latitude, longitude, precision)
+        if len(candidates) >= k or precision == 0:
+            break
+    if not candidates:
+        return []
+    # Anything closer than the k-th candidate may sit outside the block searched so far
+    radius = sorted(candidates)[min(k, len(candidates)) - 1][0]
+    if max_radius_km is not None:
+        radius = min(radius, max_radius_km)
+    return within(queryset, latitude, longitude, radius)[:k]
+
+
+def order_by_distance(queryset, ranked):
+    """Restrict ``queryset`` to ``ranked`` (distance, pk) pairs, in that order, with ``distance_km``"""
+    if not ranked:
+        return queryset.none()
+    return queryset.filter(pk__in=[pk for _, pk in ranked]).annotate(
+        distance_km=Case(
+            *[When(pk=pk, then=Value(round(distance, 3))) for distance, pk in ranked],
+            output_field=FloatField()
+        )
+    ).order_by(Case(
+        *[When(pk=pk, then=position) for position, (_, pk) in enumerate(ranked)],
+        output_field=IntegerField()
+    ))
+
+
+def near(queryset, latitude, longitude, radius_km=None, k=None):
+    """
+    Venues of ``queryset`` around a point, nearest first, annotated with ``distance_km``.
+
+    With ``k`` the k nearest (within ``radius_km`` if given) are returned,
+    otherwise every venue within ``radius_km`` (default ``DEFAULT_RADIUS_KM``).
+    """
+    if k:
+        ranked = nearest(queryset, latitude, longitude, k, radius_km)
+    else:
+        ranked = within(queryset, latitude, longitude, radius_km or DEFAULT_RADIUS_KM)
+    return order_by_distance(queryset, ranked)
@@ -0,0 +1,118 @@
+"""
+Reservation holds: short-lived claims on a room interval during checkout.
+
+``acquire_hold`` locks the room row, re-checks active bookings and live holds
+from other users against the database, and records the hold, so at most one
+checkout can be in flight for any interval. A booking path acquires a hold,
+then creates the booking and releases the hold in one transaction, which keeps
+the interval covered by either the hold or the booking at all times. A client
+that held an interval first (``POST /api/holds/``) passes the hold id with its
+booking and ``claim_hold`` hands that same hold to the booking path; without
+one, a second overlapping hold is refused even for the same user, so two
+checkouts of one user cannot take over each other's holds. Expired
+holds are ignored by every check and deleted in bulk by the
+``release_expired_holds`` command.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Booking, ReservationHold, Room
+from . import live
+
+
+ACTIVE_BOOKING_STATUSES = ('pending', 'confirmed')
+
+
+class HoldUnavailable(Exception):
+    """Raised when the requested interval is already booked or held"""
+
+
+def hold_minutes():
+    return getattr(settings, 'RESERVATION_HOLD_MINUTES', 10)
+
+
+def live_holds(room, start, end, now=None):
+    """Unexpired holds on ``room`` overlapping [start, end)"""
+    return ReservationHold.objects.filter(
+        room=room,
+        start_time__lt=end,
+        end_time__gt=start,
+        expires_at__gt=now or timezone.now()
+    )
+
+
+def acquire_hold(user, room, start, end, minutes=None):
+    """
+    Claim [start, end) on ``room`` for ``user``.
+
+    Raises ``HoldUnavailable`` when an active booking or any live hold,
+    including one of ``user``'s own, overlaps.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Serialize acquirers of the same room on its row lock
+        Room.objects.select_for_update().get(pk=room.pk)
+        
+        overlapping = live_holds(room, start, end, now)
+        if overlapping.exclude(user=user).exists():
+            raise HoldUnavailable("This time slot is being booked by someone else.")
+        if overlapping.exists():
+            raise HoldUnavailable("You already have a checkout in progress for this time slot.")
+        
+        if Booking.objects.filter(
+            room=room,
+            status__in=ACTIVE_BOOKING_STATUSES,
+            start_time__lt=end,
+            end_time__gt=start
+        ).exists():
+            raise HoldUnavailable("This time slot is already booked.")
+        
+        return ReservationHold.objects.create(
+            user=user,
+            room=room,
+            start_time=start,
+            end_time=end,
+            expires_at=now + timedelta(minutes=minutes or hold_minutes())
+        )
+
+
+def claim_hold(user, hold_id, room, start, end):
+    """
+    ``user``'s live hold ``hold_id``, which must cover [start, end) on ``room``.
+
+    Raises ``HoldUnavailable`` when there is no such hold.
+    """
+    hold = ReservationHold.objects.filter(
+        hold_id=hold_id,
+        user=user,
+        room=room,
+        start_time__lte=start,
+        end_time__gte=end,
+        expires_at__gt=timezone.now()
+    ).first()
+    if hold is None:
+        raise HoldUnavailable("Your hold on this time slot has expired or does not cover it.")
+    return hold
+
+
+def release_hold(hold):
+    """Give up a hold, e.g. once its booking exists or checkout is abandoned"""
+    ReservationHold.objects.filter(pk=hold.pk).delete()
+
+
+def release_expired(now=None):
+    """Delete every expired hold in one statement and return how many were removed"""
+    expired = ReservationHold.objects.filter(expires_at__lte=now or timezone.now())
+    # The bulk delete skips signals, so tell live streams about rooms being watched
+    released = [
+        hold for hold in expired.values_list('room_id', 'start_time', 'end_time')
+        if live.broker.subscriber_count(hold[0])
+    ]
+    deleted, _ = expired.delete()
+    for room_id, start, end in released:
+        live.publish_hold_release(room_id, start, end)
+    return deleted
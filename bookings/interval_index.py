@@ -0,0 +1,194 @@
+"""
+In-process interval index of active bookings, kept per room.
+
+Each room's pending/confirmed bookings are held as a list sorted by start time,
+augmented with a running maximum of end times. A conflict lookup is a binary
+search for the last booking starting before the requested end, followed by a
+short backwards walk that stops as soon as no earlier booking can reach the
+requested start. Booking signals keep the index in sync on create, cancel and
+status change; rooms are reloaded from the database once their entry is older
+than ``BOOKING_INDEX_TTL`` seconds so writes made by other workers are picked up.
+
+Because another worker's booking can go unseen for up to that long, ``is_free``
+is only a fast reject. ``is_free_locked`` is the deciding check: it locks the
+room row and queries the database inside the transaction that saves the booking.
+"""
+
+import bisect
+import threading
+import time
+
+from django.conf import settings
+
+
+ACTIVE_BOOKING_STATUSES = ('pending', 'confirmed')
+
+
+def _room_id(room):
+    """Accept either a Room instance or a primary key"""
+    return getattr(room, 'pk', room)
+
+
+class RoomIntervals:
+    """Sorted booking intervals for a single room"""
+    __slots__ = ('starts', 'ends', 'max_ends', 'booking_ids', 'loaded_at')
+
+    def __init__(self, intervals=()):
+        intervals = sorted(intervals)
+        self.starts = [start for start, end, pk in intervals]
+        self.ends = [end for start, end, pk in intervals]
+        self.booking_ids = [pk for start, end, pk in intervals]
+        self.max_ends = []
+        self._rebuild_max_ends(0)
+        self.loaded_at = time.monotonic()
+
+    def _rebuild_max_ends(self, position):
+        """Recompute the running maximum of end times from ``position`` onwards"""
+        del self.max_ends[position:]
+        current = self.max_ends[-1] if self.max_ends else None
+        for end in self.ends[position:]:
+            current = end if current is None or end > current else current
+            self.max_ends.append(current)
+
+    def add(self, start, end, booking_id):
+        position = bisect.bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.booking_ids.insert(position, booking_id)
+        self._rebuild_max_ends(position)
+
+    def remove(self, start, booking_id):
+        position = bisect.bisect_left(self.starts, start)
+        while position < len(self.starts) and self.starts[position] == start:
+            if self.booking_ids[position] == booking_id:
+                del self.starts[position]
+                del self.ends[position]
+                del self.booking_ids[position]
+                self._rebuild_max_ends(position)
+                return True
+            position += 1
+        return False
+
+    def conflicts(self, start, end):
+        """Return the ids of bookings overlapping [start, end)"""
+        position = bisect.bisect_left(self.starts, end) - 1
+        found = []
+        while position >= 0 and self.max_ends[position] > start:
+            if self.ends[position] > start:
+                found.append(self.booking_ids[position])
+            position -= 1
+        found.reverse()
+        return found
+
+
+class BookingIntervalIndex:
+    """Thread-safe map of room id to its active booking intervals"""
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._rooms = {}
+        self._bookings = {}
+        self._lock = threading.RLock()
+
+    def _ttl(self):
+        if self.ttl is not None:
+            return self.ttl
+        return getattr(settings, 'BOOKING_INDEX_TTL', 30)
+
+    def _load(self, room_id):
+        from .models import Booking
+
+        rows = Booking.objects.filter(
+            room_id=room_id,
+            status__in=ACTIVE_BOOKING_STATUSES
+        ).values_list('start_time', 'end_time', 'pk')
+        intervals = RoomIntervals(rows)
+        for start, end, pk in zip(intervals.starts, intervals.ends, intervals.booking_ids):
+            self._bookings[pk] = (room_id, start)
+        self._rooms[room_id] = intervals
+        return intervals
+
+    def _get(self, room_id):
+        intervals = self._rooms.get(room_id)
+        if intervals is None or time.monotonic() - intervals.loaded_at > self._ttl():
+            self.invalidate(room_id)
+            intervals = self._load(room_id)
+        return intervals
+
+    def conflicts(self, room, start, end):
+        """Return the primary keys of active bookings overlapping [start, end)"""
+        with self._lock:
+            return self._get(_room_id(room)).conflicts(start, end)
+
+    def is_free(self, room, start, end):
+        """Return True if no active booking overlaps [start, end)"""
+        return not self.conflicts(room, start, end)
+
+    def discard(self, booking_id):
+        """Drop a booking from the index, wherever it currently sits"""
+        with self._lock:
+            location = self._bookings.pop(booking_id, None)
+            if location is None:
+                return
+            room_id, start = location
+            intervals = self._rooms.get(room_id)
+            if intervals is not None:
+                intervals.remove(start, booking_id)
+
+    def sync(self, booking):
+        """Reflect the current state of ``booking`` in the index"""
+        with self._lock:
+            self.discard(booking.pk)
+            intervals = self._rooms.get(booking.room_id)
+            # Rooms that were never looked up are loaded lazily on first use
+            if intervals is None or booking.status not in ACTIVE_BOOKING_STATUSES:
+                return
+            intervals.add(booking.start_time, booking.end_time, booking.pk)
+            self._bookings[booking.pk] = (booking.room_id, booking.start_time)
+
+    def invalidate(self, room=None):
+        """Forget one room, or the whole index when no room is given"""
+        with self._lock:
+            if room is None:
+                self._rooms.clear()
+                self._bookings.clear()
+                return
+            room_id = _room_id(room)
+            intervals = self._rooms.pop(room_id, None)
+            if intervals is not None:
+                for pk in intervals.booking_ids:
+                    self._bookings.pop(pk, None)
+
+
+booking_index = BookingIntervalIndex()
+
+
+def conflicts(room, start, end):
+    """Primary keys of pending/confirmed bookings for ``room`` overlapping [start, end)"""
+    return booking_index.conflicts(room, start, end)
+
+
+def is_free(room, start, end):
+    """Whether ``room`` has no pending/confirmed booking overlapping [start, end)"""
+    return booking_index.is_free(room, start, end)
+
+
+def is_free_locked(room, start, end):
+    """
+    Lock ``room``'s row and check the database for an overlapping active
+    booking. Call inside the transaction that creates the booking.
+    """
+    from .models import Booking, Room
+
+    room_id = _room_id(room)
+    Room.objects.select_for_update().filter(pk=room_id).first()
+    taken = Booking.objects.filter(
+        room_id=room_id,
+        status__in=ACTIVE_BOOKING_STATUSES,
+        start_time__lt=end,
+        end_time__gt=start
+    ).exists()
+    if taken:
+        # The index missed it, so it is stale for this room
+        booking_index.invalidate(room_id)
+    return not taken
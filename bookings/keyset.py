@@ -0,0 +1,170 @@
+"""
+Keyset (cursor) pagination.
+
+A page is read as "the next ``page_size`` rows after this row" in the list's
+ordering, made total by appending the primary key, e.g. ``(created_at, id)``
+or ``(name, id)``. The position is carried in an opaque cursor holding the
+ordering and the key values of the first or last row shown, so every page
+is one index range scan of ``page_size + 1`` rows however deep it is, with
+no ``OFFSET`` and no ``COUNT(*)`` unless a total is asked for.
+
+Orderings that cannot be keyed (expressions such as search rank or
+distance, related or nullable fields) are reported by ``keyset_ordering``
+returning None so callers can fall back to page numbers.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _flip(term):
+    return term[1:] if term.startswith('-') else f'-{term}'
+
+
+def _field(model, term):
+    name = term.lstrip('-')
+    if name == 'pk':
+        return model._meta.pk
+    return model._meta.get_field(name)
+
+
+def keyset_ordering(queryset):
+    """The queryset's ordering with a primary key tiebreaker, or None if it cannot be keyed"""
+    model = queryset.model
+    ordering = list(queryset.query.order_by or model._meta.ordering)
+    terms = []
+    for term in ordering:
+        if not isinstance(term, str) or '__' in term or term.lstrip('-') in ('', '?'):
+            return None
+        try:
+            field = _field(model, term)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.is_relation or field.null:
+            return None
+        terms.append(('-' if term.startswith('-') else '') + field.attname)
+    pk = model._meta.pk.attname
+    if pk not in (term.lstrip('-') for term in terms):
+        terms.append(f'-{pk}' if terms and terms[0].startswith('-') else pk)
+    return tuple(terms)
+
+
+def _json_value(value):
+    # Full precision: DjangoJSONEncoder would cut datetimes to milliseconds
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(ordering, values, backwards=False):
+    payload = json.dumps({'o': list(ordering), 'v': values, 'b': backwards}, default=_json_value)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, ordering, model):
+    """(key values, backwards) from a cursor made for ``ordering``"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if payload['o'] != list(ordering) or len(payload['v']) != len(ordering):
+            raise InvalidCursor('Cursor does not match this ordering')
+        values = [_field(model, term).to_python(value) for term, value in zip(ordering, payload['v'])]
+        return values, bool(payload['b'])
+    except InvalidCursor:
+        raise
+    except (ValueError, TypeError, KeyError, ValidationError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+
+
+def after(ordering, values):
+    """Rows strictly after ``values`` in ``ordering``"""
+    condition = Q()
+    for position, term in enumerate(ordering):
+        step = Q(**{
+            f"{term.lstrip('-')}__{'lt' if term.startswith('-') else 'gt'}": values[position]
+        })
+        for earlier, value in zip(ordering[:position], values):
+            step &= Q(**{earlier.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+class KeysetPage:
+    """One page of rows with the cursors either side of it"""
+
+    def __init__(self, object_list, next_cursor, previous_cursor, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def paginate(queryset, cursor=None, page_size=10, ordering=None, with_count=False):
+    """
+    The page of ``queryset`` at ``cursor`` (the first page when None).
+
+    Raises ``InvalidCursor`` for cursors that are malformed or were made for
+    a different ordering, and ``ValueError`` for unkeyable orderings.
+    """
+    ordering = tuple(ordering or keyset_ordering(queryset) or ())
+    if not ordering:
+        raise ValueError('This ordering cannot be paginated by keyset')
+    model = queryset.model
+    count = queryset.count() if with_count else None
+
+    values, backwards = (None, False)
+    if cursor:
+        values, backwards = decode_cursor(cursor, ordering, model)
+
+    walk = tuple(_flip(term) for term in ordering) if backwards else ordering
+    rows = queryset.order_by(*walk)
+    if values is not None:
+        rows = rows.filter(after(walk, values))
+    rows = list(rows[:page_size + 1])
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    def key(obj):
+        return [getattr(obj, term.lstrip('-')) for term in ordering]
+
+    has_next = more if not backwards else values is not None
+    has_previous = values is not None if not backwards else more
+    next_cursor = encode_cursor(ordering, key(rows[-1])) if rows and has_next else None
+    previous_cursor = encode_cursor(ordering, key(rows[0]), backwards=True) if rows and has_previous else None
+    return KeysetPage(rows, next_cursor, previous_cursor, count)
+
+
+class KeysetPaginationMixin:
+    """ListView pagination by ``?cursor=`` instead of ``?page=``"""
+    cursor_kwarg = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        try:
+            page = paginate(queryset, self.request.GET.get(self.cursor_kwarg), page_size)
+        except InvalidCursor:
+            raise Http404('Invalid cursor')
+        return None, page, page.object_list, page.has_other_pages()
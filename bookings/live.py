@@ -0,0 +1,152 @@
+"""
+Live availability push over Server-Sent Events.
+
+Browsers on a booking page open one ``EventSource`` for the rooms they show
+and receive a small JSON delta whenever a booking or hold on one of those
+rooms changes, instead of polling the availability endpoints.
+
+Fan-out is in-process: each subscriber is an ``asyncio.Queue`` registered per
+room on the event loop serving its stream, and ``publish`` (called from
+``transaction.on_commit`` in sync code) hands events to those loops with
+``call_soon_threadsafe``. An idle subscriber costs one queue and one suspended
+coroutine, so a single ASGI worker can keep thousands open. Each worker only
+sees changes committed through itself; clients reconnect and reload on
+``resync``.
+"""
+
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.utils import timezone
+
+
+# Events buffered per subscriber before it is told to resync instead
+QUEUE_SIZE = 100
+
+RESYNC = {'type': 'resync'}
+
+
+def keepalive_seconds():
+    return getattr(settings, 'LIVE_AVAILABILITY_KEEPALIVE_SECONDS', 15)
+
+
+class Subscription:
+    """One stream's queue and the loop that drains it"""
+
+    def __init__(self, room_ids, loop):
+        self.room_ids = frozenset(room_ids)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A slow reader gets one resync marker instead of an unbounded backlog
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    def deliver(self, event):
+        """Queue ``event`` from any thread"""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The stream's loop has already closed
+            pass
+
+
+class AvailabilityBroker:
+    """Registry of subscriptions keyed by room id"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_room = {}
+
+    def subscribe(self, room_ids):
+        subscription = Subscription(room_ids, asyncio.get_running_loop())
+        with self._lock:
+            for room_id in subscription.room_ids:
+                self._by_room.setdefault(room_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for room_id in subscription.room_ids:
+                subscribers = self._by_room.get(room_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._by_room[room_id]
+
+    def subscriber_count(self, room_id=None):
+        with self._lock:
+            if room_id is not None:
+                return len(self._by_room.get(room_id, ()))
+            return len({s for subscribers in self._by_room.values() for s in subscribers})
+
+    def publish(self, room_id, event):
+        with self._lock:
+            subscribers = list(self._by_room.get(room_id, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+
+broker = AvailabilityBroker()
+
+
+def _local(moment):
+    return timezone.localtime(moment).strftime('%Y-%m-%d %H:%M')
+
+
+def publish_interval(room_id, start, end, available, source):
+    """Tell subscribers of ``room_id`` that [start, end) became available or taken"""
+    broker.publish(room_id, {
+        'type': 'availability',
+        'room': room_id,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'local_start': _local(start),
+        'local_end': _local(end),
+        'available': available,
+        'source': source,
+    })
+
+
+def publish_hold_release(room_id, start, end):
+    """Publish a released hold, checking whether a booking now covers it"""
+    if not broker.subscriber_count(room_id):
+        return
+    from .models import Booking
+
+    taken = Booking.objects.filter(
+        room_id=room_id,
+        status__in=('pending', 'confirmed'),
+        start_time__lt=end,
+        end_time__gt=start
+    ).exists()
+    publish_interval(room_id, start, end, not taken, 'hold')
+
+
+def format_event(event):
+    """Encode an event as an SSE frame"""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream(room_ids):
+    """Yield SSE frames for ``room_ids`` until the client disconnects"""
+    subscription = broker.subscribe(room_ids)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), keepalive_seconds())
+            except asyncio.TimeoutError:
+                # Comment frames keep proxies from closing idle connections
+                yield ': keepalive\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
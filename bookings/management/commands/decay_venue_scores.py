@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from bookings.models import Booking, Favorite, Review, Venue, VenueScore
+from bookings import popularity, result_cache
+
+
+class Command(BaseCommand):
+    help = 'Decay every venue popularity score to now, or rebuild them all from bookings, favorites and reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recompute scores from scratch instead of decaying them')
+        parser.add_argument('--batch-size', type=int, default=500, help='Scores written per bulk update')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            count = popularity.rebuild(Venue, VenueScore, Booking, Favorite, Review, batch_size=options['batch_size'])
+            message = f'Rebuilt popularity scores; {count} venues have activity'
+        else:
+            count = popularity.decay_all(batch_size=options['batch_size'])
+            message = f'Decayed {count} venue popularity scores'
+        
+        # Popularity sorts may have changed order
+        result_cache.bump_version()
+        
+        self.stdout.write(self.style.SUCCESS(message))
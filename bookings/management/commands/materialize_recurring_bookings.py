@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from bookings.models import RecurrenceRule
+from bookings import batch, recurrence
+
+
+class Command(BaseCommand):
+    help = 'Create bookings for recurring rules whose occurrences entered the booking horizon'
+
+    def handle(self, *args, **options):
+        horizon = timezone.now() + timedelta(days=recurrence.horizon_days())
+        rules = RecurrenceRule.objects.filter(is_active=True).filter(
+            Q(materialized_until__isnull=True) | Q(materialized_until__lt=horizon)
+        ).select_related('user', 'room', 'room__venue')
+        
+        created = 0
+        for rule in rules.iterator():
+            try:
+                created += len(recurrence.materialize(rule, horizon))
+            except batch.BatchBookingError as e:
+                self.stdout.write(self.style.WARNING(f'Skipped {rule}: {e.errors}'))
+        
+        self.stdout.write(self.style.SUCCESS(f'Materialized {created} recurring bookings'))
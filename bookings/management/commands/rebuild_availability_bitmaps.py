@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from bookings.models import Room, TimeSlot, RoomAvailabilityDay
+from bookings import availability_bitmap
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the quarter-hour availability bitmaps from TimeSlot rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room', type=int, help='Only rebuild this room id')
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.all()
+        if options.get('room'):
+            rooms = rooms.filter(pk=options['room'])
+        
+        for room in rooms.iterator():
+            slot_ranges = TimeSlot.objects.filter(
+                room=room,
+                is_available=True
+            ).values_list('start_time', 'end_time')
+            
+            with transaction.atomic():
+                RoomAvailabilityDay.objects.filter(room=room).delete()
+                availability_bitmap.set_ranges(room, slot_ranges)
+            
+            self.stdout.write(f'Rebuilt availability for {room}')
+        
+        self.stdout.write(self.style.SUCCESS('Availability bitmaps rebuilt successfully!'))
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from bookings.models import Room, RoomDayOccupancy
+from bookings import occupancy
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily occupancy summaries used by month-view calendars'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room', type=int, help='Only rebuild this room id')
+        parser.add_argument('--days', type=int, default=90, help='Number of days ahead to precompute')
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.select_related('venue__category', 'schedule')
+        if options.get('room'):
+            rooms = rooms.filter(pk=options['room'])
+        
+        today = timezone.localdate()
+        dates = [today + timedelta(days=offset) for offset in range(options['days'])]
+        
+        for room in rooms.iterator():
+            with transaction.atomic():
+                RoomDayOccupancy.objects.filter(room=room).delete()
+                occupancy.refresh_days(room, dates)
+            
+            self.stdout.write(f'Rebuilt occupancy for {room}')
+        
+        self.stdout.write(self.style.SUCCESS('Occupancy summaries rebuilt successfully!'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from bookings.models import Venue, Review
+from bookings.search import review_index, venue_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for venues and reviews'
+
+    def handle(self, *args, **options):
+        venue_index.rebuild(Venue.objects.all())
+        self.stdout.write(f'Indexed {Venue.objects.count()} venues')
+        
+        review_index.rebuild(Review.objects.all())
+        self.stdout.write(f'Indexed {Review.objects.count()} reviews')
+        
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt successfully!'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from bookings.models import Venue
+from bookings import result_cache, venue_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized room price bounds, room counts and capacities on venues'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Venues refreshed per grouped query')
+
+    def handle(self, *args, **options):
+        venue_ids = list(Venue.objects.values_list('pk', flat=True))
+        batch_size = options['batch_size']
+        
+        for offset in range(0, len(venue_ids), batch_size):
+            venue_stats.refresh_room_stats(venue_ids[offset:offset + batch_size])
+        
+        # Bulk updates skip the model signals, so drop cached listings here
+        result_cache.bump_version()
+        
+        self.stdout.write(self.style.SUCCESS(f'Refreshed room stats for {len(venue_ids)} venues'))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from bookings import holds
+
+
+class Command(BaseCommand):
+    help = 'Release expired reservation holds in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Keep running and sweep every N seconds instead of exiting after one pass'
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        
+        while True:
+            released = holds.release_expired()
+            if released or not interval:
+                self.stdout.write(self.style.SUCCESS(f'Released {released} expired holds'))
+            if not interval:
+                break
+            time.sleep(interval)
@@ -2,9 +2,10 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from bookings.models import Amenity, VenueCategory, Venue, Room, TimeSlot, Review, VenueImage, RoomImage
+from bookings.models import Amenity, VenueCategory, Venue, Room, TimeSlot, Review, VenueImage, RoomImage, RoomSchedule
+from bookings import availability_bitmap, schedules, versions
 import random
-from datetime import timedelta
+from datetime import time, timedelta
 
 User = get_user_model()
 
@@ -336,7 +337,16 @@ class Command(BaseCommand):
     
     def create_time_slots_for_room(self, room):
         """Create time slots for the next 30 days for a given room"""
+        # Slots are computed from the room schedule when virtual slots are enabled
+        if schedules.virtual_slots_enabled():
+            RoomSchedule.objects.get_or_create(
+                room=room,
+                defaults={'opening_time': time(9, 0), 'closing_time': time(21, 0), 'slot_minutes': 120}
+            )
+            return
+        
         today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        slots = []
         
         for day in range(30):  # 30 days from today
             current_day = today + timedelta(days=day)
@@ -346,9 +356,13 @@ class Command(BaseCommand):
                 start_time = current_day.replace(hour=hour)
                 end_time = start_time + timedelta(hours=2)
                 
-                TimeSlot.objects.create(
+                slots.append(TimeSlot(
                     room=room,
                     start_time=start_time,
                     end_time=end_time,
                     is_available=True
-                ) 
\ No newline at end of file
+                ))
+        
+        TimeSlot.objects.bulk_create(slots)
+        availability_bitmap.set_ranges(room, [(slot.start_time, slot.end_time) for slot in slots])
+        versions.bump(room_ids=[room.pk])
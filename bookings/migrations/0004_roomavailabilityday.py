@@ -0,0 +1,47 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from bookings.availability_bitmap import merge_masks, to_bytes
+
+
+def backfill_bitmaps(apps, schema_editor):
+    TimeSlot = apps.get_model('bookings', 'TimeSlot')
+    RoomAvailabilityDay = apps.get_model('bookings', 'RoomAvailabilityDay')
+    
+    slot_ranges = {}
+    for room_id, start_time, end_time in TimeSlot.objects.filter(
+        is_available=True
+    ).values_list('room_id', 'start_time', 'end_time').iterator():
+        slot_ranges.setdefault(room_id, []).append((start_time, end_time))
+    
+    rows = []
+    for room_id, ranges in slot_ranges.items():
+        for day, bits in merge_masks(ranges).items():
+            rows.append(RoomAvailabilityDay(room_id=room_id, date=day, free_bits=to_bytes(bits)))
+    RoomAvailabilityDay.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_venue_venue_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomAvailabilityDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('free_bits', models.BinaryField(default=b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00', max_length=12, verbose_name='Free Quarter-Hours')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_days', to='bookings.room')),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('room', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_bitmaps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:40
+
+import datetime
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_roomavailabilityday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schedule_type', models.CharField(choices=[('fixed', 'Fixed-length slots'), ('overnight', 'Overnight stay (check-in/check-out)')], default='fixed', max_length=20, verbose_name='Schedule Type')),
+                ('opening_time', models.TimeField(default=datetime.time(9, 0), verbose_name='Opening Time')),
+                ('closing_time', models.TimeField(default=datetime.time(21, 0), verbose_name='Closing Time')),
+                ('slot_minutes', models.PositiveIntegerField(default=60, validators=[django.core.validators.MinValueValidator(15)], verbose_name='Slot Length (minutes)')),
+                ('checkin_time', models.TimeField(default=datetime.time(14, 0), verbose_name='Check-in Time')),
+                ('checkout_time', models.TimeField(default=datetime.time(12, 0), verbose_name='Check-out Time')),
+                ('room', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='schedule', to='bookings.room')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SlotException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField(verbose_name='Start Time')),
+                ('end_time', models.DateTimeField(verbose_name='End Time')),
+                ('reason', models.CharField(blank=True, max_length=255, verbose_name='Reason')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_exceptions', to='bookings.room')),
+            ],
+            options={
+                'ordering': ['start_time'],
+            },
+        ),
+    ]
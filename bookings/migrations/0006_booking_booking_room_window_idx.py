@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_roomschedule_slotexception'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'start_time', 'end_time'], name='booking_room_window_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:42
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_booking_booking_room_window_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hold_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='Hold ID')),
+                ('start_time', models.DateTimeField(verbose_name='Start Time')),
+                ('end_time', models.DateTimeField(verbose_name='End Time')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Expires At')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='bookings.room')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservation_holds', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['expires_at'],
+                'indexes': [models.Index(fields=['room', 'start_time', 'end_time'], name='hold_room_window_idx')],
+            },
+        ),
+    ]
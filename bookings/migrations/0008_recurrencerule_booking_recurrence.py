@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:45
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_reservationhold'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurrenceRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('frequency', models.CharField(choices=[('weekly', 'Weekly'), ('monthly', 'Monthly')], default='weekly', max_length=10, verbose_name='Frequency')),
+                ('interval', models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)], verbose_name='Interval')),
+                ('first_start', models.DateTimeField(verbose_name='First Start Time')),
+                ('first_end', models.DateTimeField(verbose_name='First End Time')),
+                ('count', models.PositiveIntegerField(blank=True, null=True, verbose_name='Occurrences')),
+                ('until', models.DateTimeField(blank=True, null=True, verbose_name='Repeat Until')),
+                ('exceptions', models.JSONField(blank=True, default=list, verbose_name='Skipped Dates')),
+                ('num_guests', models.PositiveIntegerField(verbose_name='Number of Guests')),
+                ('special_requests', models.TextField(blank=True, null=True, verbose_name='Special Requests')),
+                ('materialized_until', models.DateTimeField(blank=True, null=True, verbose_name='Materialized Until')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Is Active')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurrence_rules', to='bookings.room')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurrence_rules', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='recurrence',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='bookings.recurrencerule'),
+        ),
+    ]
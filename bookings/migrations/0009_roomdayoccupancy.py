@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_recurrencerule_booking_recurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomDayOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('booked_minutes', models.PositiveIntegerField(default=0, verbose_name='Booked Minutes')),
+                ('free_minutes', models.PositiveIntegerField(default=0, verbose_name='Free Minutes')),
+                ('first_free_start', models.DateTimeField(blank=True, null=True, verbose_name='First Free Start')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_days', to='bookings.room')),
+            ],
+            options={
+                'verbose_name_plural': 'Room day occupancies',
+                'ordering': ['date'],
+                'unique_together': {('room', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from bookings.search import review_index, venue_index
+
+
+def create_search_index(apps, schema_editor):
+    Venue = apps.get_model('bookings', 'Venue')
+    Review = apps.get_model('bookings', 'Review')
+    
+    with schema_editor.connection.cursor() as cursor:
+        venue_index.create(cursor)
+        review_index.create(cursor)
+    venue_index.rebuild(Venue.objects.all())
+    review_index.rebuild(Review.objects.all())
+
+
+def drop_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        venue_index.drop(cursor)
+        review_index.drop(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_roomdayoccupancy'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:52
+
+from django.db import migrations, models
+
+from bookings.geo import encode
+
+
+def backfill_geohash(apps, schema_editor):
+    Venue = apps.get_model('bookings', 'Venue')
+    
+    venues = list(Venue.objects.filter(latitude__isnull=False, longitude__isnull=False))
+    for venue in venues:
+        venue.geohash = encode(venue.latitude, venue.longitude)
+    Venue.objects.bulk_update(venues, ['geohash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venue',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12, null=True, verbose_name='Geohash'),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:55
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+def backfill_room_stats(apps, schema_editor):
+    Room = apps.get_model('bookings', 'Room')
+    Venue = apps.get_model('bookings', 'Venue')
+    
+    rows = Room.objects.filter(is_active=True).values('venue_id').annotate(
+        min_price=Min('price_per_hour'),
+        max_price=Max('price_per_hour'),
+        rooms=Count('pk'),
+        capacity=Max('capacity')
+    ).order_by()
+    for row in rows:
+        Venue.objects.filter(pk=row['venue_id']).update(
+            min_price_per_hour=row['min_price'],
+            max_price_per_hour=row['max_price'],
+            active_room_count=row['rooms'],
+            max_room_capacity=row['capacity'] or 0
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0011_venue_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venue',
+            name='active_room_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Active Rooms'),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='max_price_per_hour',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=10, null=True, verbose_name='Highest Room Price per Hour'),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='max_room_capacity',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Largest Room Capacity'),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='min_price_per_hour',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=10, null=True, verbose_name='Lowest Room Price per Hour'),
+        ),
+        migrations.AlterField(
+            model_name='venue',
+            name='max_capacity',
+            field=models.PositiveIntegerField(db_index=True, verbose_name='Maximum Capacity'),
+        ),
+        migrations.RunPython(backfill_room_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:56
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_ratings(apps, schema_editor):
+    Review = apps.get_model('bookings', 'Review')
+    Venue = apps.get_model('bookings', 'Venue')
+    
+    histogram = {f'rating_{stars}_count': Count('pk', filter=Q(rating=stars)) for stars in range(1, 6)}
+    rows = Review.objects.values('venue_id').annotate(total=Sum('rating'), reviews=Count('pk'), **histogram).order_by()
+    for row in rows:
+        Venue.objects.filter(pk=row['venue_id']).update(
+            rating_sum=row['total'],
+            rating_count=row['reviews'],
+            rating_avg=row['total'] / row['reviews'],
+            **{column: row[column] for column in histogram}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_venue_room_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venue',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='1-Star Reviews'),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='2-Star Reviews'),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='3-Star Reviews'),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='4-Star Reviews'),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='5-Star Reviews'),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='rating_avg',
+            field=models.FloatField(db_index=True, default=0, editable=False, verbose_name='Average Rating'),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Rating Count'),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Rating Sum'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
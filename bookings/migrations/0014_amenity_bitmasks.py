@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:57
+
+from django.db import migrations, models
+
+
+def backfill_masks(apps, schema_editor):
+    Amenity = apps.get_model('bookings', 'Amenity')
+    Venue = apps.get_model('bookings', 'Venue')
+    Room = apps.get_model('bookings', 'Room')
+    
+    bits = {}
+    for bit, amenity in enumerate(Amenity.objects.order_by('pk')[:63]):
+        amenity.bit = bit
+        amenity.save(update_fields=['bit'])
+        bits[amenity.pk] = bit
+    
+    for model, owner in ((Venue, 'venue_id'), (Room, 'room_id')):
+        masks = {}
+        for pk, amenity_id in model.amenities.through.objects.values_list(owner, 'amenity_id'):
+            if amenity_id in bits:
+                masks[pk] = masks.get(pk, 0) | (1 << bits[amenity_id])
+        for pk, mask in masks.items():
+            model.objects.filter(pk=pk).update(amenity_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0013_venue_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='amenity',
+            name='bit',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, unique=True, verbose_name='Bit Position'),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='amenity_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Amenity Bitmask'),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='amenity_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Amenity Bitmask'),
+        ),
+        migrations.RunPython(backfill_masks, migrations.RunPython.noop),
+    ]
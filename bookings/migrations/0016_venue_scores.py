@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+from bookings.popularity import rebuild
+
+
+def backfill_scores(apps, schema_editor):
+    rebuild(
+        apps.get_model('bookings', 'Venue'),
+        apps.get_model('bookings', 'VenueScore'),
+        apps.get_model('bookings', 'Booking'),
+        apps.get_model('bookings', 'Favorite'),
+        apps.get_model('bookings', 'Review'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0015_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VenueScore',
+            fields=[
+                ('venue', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='bookings.venue')),
+                ('bookings', models.FloatField(default=0, verbose_name='Decayed Bookings')),
+                ('favorites', models.FloatField(default=0, verbose_name='Decayed Favorites')),
+                ('reviews', models.FloatField(default=0, verbose_name='Decayed Review Stars')),
+                ('score', models.FloatField(db_index=True, default=0, verbose_name='Score')),
+                ('decayed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Decayed At')),
+            ],
+            options={
+                'ordering': ['-score'],
+            },
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:06
+
+from django.db import migrations, models
+
+from bookings.venue_stats import first_image
+
+
+def backfill_primary_images(apps, schema_editor):
+    for owner, image, owner_field in (('Venue', 'VenueImage', 'venue_id'), ('Room', 'RoomImage', 'room_id')):
+        owner_model = apps.get_model('bookings', owner)
+        image_model = apps.get_model('bookings', image)
+        for owner_id in image_model.objects.values_list(owner_field, flat=True).distinct().order_by():
+            owner_model.objects.filter(pk=owner_id).update(
+                primary_image=first_image(image_model, owner_field, owner_id)
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0016_venue_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='primary_image',
+            field=models.ImageField(blank=True, editable=False, upload_to='room_images/', verbose_name='Primary Image'),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='primary_image',
+            field=models.ImageField(blank=True, editable=False, upload_to='venue_images/', verbose_name='Primary Image'),
+        ),
+        migrations.RunPython(backfill_primary_images, migrations.RunPython.noop),
+    ]
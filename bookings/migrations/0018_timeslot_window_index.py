@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0017_primary_images'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timeslot',
+            index=models.Index(fields=['room', 'start_time'], name='timeslot_room_start_idx'),
+        ),
+    ]
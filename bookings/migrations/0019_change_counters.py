@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_counters(apps, schema_editor):
+    for owner, counter, field in (('Venue', 'VenueVersion', 'venue_id'), ('Room', 'RoomVersion', 'room_id')):
+        owner_model = apps.get_model('bookings', owner)
+        counter_model = apps.get_model('bookings', counter)
+        now = django.utils.timezone.now()
+        counter_model.objects.bulk_create([
+            counter_model(**{field: pk}, changed_at=now)
+            for pk in owner_model.objects.values_list('pk', flat=True).iterator()
+        ], batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0018_timeslot_window_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomVersion',
+            fields=[
+                ('room', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='change_counter', serialize=False, to='bookings.room')),
+                ('version', models.PositiveBigIntegerField(default=1, verbose_name='Version')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Changed At')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VenueVersion',
+            fields=[
+                ('venue', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='change_counter', serialize=False, to='bookings.venue')),
+                ('version', models.PositiveBigIntegerField(default=1, verbose_name='Version')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Changed At')),
+            ],
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -1,22 +1,61 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
+from datetime import time
 import uuid
 
+from . import amenity_masks, geo
+
+
+def exclude_maintained_fields(instance, kwargs):
+    """
+    Leave ``instance.MAINTAINED_FIELDS`` out of a plain ``save()`` of an
+    existing row. Those columns are written only by the queries that maintain
+    them, so saving an instance loaded before their last change cannot put
+    back the stale values.
+    """
+    if instance._state.adding or kwargs.get('force_insert') or kwargs.get('update_fields') is not None:
+        return
+    deferred = instance.get_deferred_fields()
+    kwargs['update_fields'] = [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key and field.attname not in deferred and field.name not in instance.MAINTAINED_FIELDS
+    ]
+
 
 class Amenity(models.Model):
     """Model for amenities that can be included with venues/rooms"""
     name = models.CharField(_('Name'), max_length=100)
     icon = models.CharField(_('Icon Class'), max_length=50, help_text="Font Awesome icon class", blank=True)
     description = models.TextField(_('Description'), blank=True, null=True)
+    bit = models.PositiveSmallIntegerField(_('Bit Position'), unique=True, blank=True, null=True, editable=False)
 
     class Meta:
         verbose_name_plural = "Amenities"
 
     def __str__(self):
         return self.name
+    
+    def save(self, *args, **kwargs):
+        """Override save method to give new amenities a free bit in the amenity masks"""
+        if self.bit is not None:
+            return super().save(*args, **kwargs)
+        # Concurrent saves can pick the same bit; the unique constraint rejects
+        # all but one, and the others retry with the next free bit
+        for attempt in range(amenity_masks.MAX_BITS + 1):
+            self.bit = amenity_masks.next_free_bit(
+                Amenity.objects.exclude(bit__isnull=True).values_list('bit', flat=True)
+            )
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                bit, self.bit = self.bit, None
+                if bit is None or not Amenity.objects.filter(bit=bit).exists():
+                    raise
+        raise IntegrityError("Could not assign a free amenity bit.")
 
 
 class VenueCategory(models.Model):
@@ -94,22 +133,63 @@ class Venue(models.Model):
     country = models.CharField(_('Country'), max_length=100, default="India")
     latitude = models.DecimalField(_('Latitude'), max_digits=9, decimal_places=6, blank=True, null=True)
     longitude = models.DecimalField(_('Longitude'), max_digits=9, decimal_places=6, blank=True, null=True)
+    geohash = models.CharField(_('Geohash'), max_length=12, blank=True, null=True, db_index=True, editable=False)
     phone = models.CharField(_('Contact Phone'), max_length=20)
     email = models.EmailField(_('Contact Email'))
     website = models.URLField(_('Website'), blank=True, null=True)
-    max_capacity = models.PositiveIntegerField(_('Maximum Capacity'))
+    max_capacity = models.PositiveIntegerField(_('Maximum Capacity'), db_index=True)
     amenities = models.ManyToManyField(Amenity, blank=True, related_name='venues')
+    amenity_mask = models.BigIntegerField(_('Amenity Bitmask'), default=0, editable=False)
+    # First of ``images`` (primary, else oldest), kept by bookings.venue_stats
+    primary_image = models.ImageField(_('Primary Image'), upload_to='venue_images/', blank=True, editable=False)
+    # Summary of active rooms, maintained by bookings.venue_stats
+    min_price_per_hour = models.DecimalField(_('Lowest Room Price per Hour'), max_digits=10, decimal_places=2, blank=True, null=True, db_index=True, editable=False)
+    max_price_per_hour = models.DecimalField(_('Highest Room Price per Hour'), max_digits=10, decimal_places=2, blank=True, null=True, db_index=True, editable=False)
+    active_room_count = models.PositiveIntegerField(_('Active Rooms'), default=0, editable=False)
+    max_room_capacity = models.PositiveIntegerField(_('Largest Room Capacity'), default=0, editable=False)
+    # Review aggregates, maintained by bookings.venue_stats
+    rating_sum = models.PositiveIntegerField(_('Rating Sum'), default=0, editable=False)
+    rating_count = models.PositiveIntegerField(_('Rating Count'), default=0, editable=False)
+    rating_avg = models.FloatField(_('Average Rating'), default=0, db_index=True, editable=False)
+    rating_1_count = models.PositiveIntegerField(_('1-Star Reviews'), default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(_('2-Star Reviews'), default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(_('3-Star Reviews'), default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(_('4-Star Reviews'), default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(_('5-Star Reviews'), default=0, editable=False)
     created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
     updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
     is_active = models.BooleanField(_('Is Active'), default=True)
     is_featured = models.BooleanField(_('Is Featured'), default=False)
     
+    # Kept by bookings.venue_stats and bookings.amenity_masks; ordinary saves leave them alone
+    MAINTAINED_FIELDS = (
+        'amenity_mask', 'primary_image',
+        'min_price_per_hour', 'max_price_per_hour', 'active_room_count', 'max_room_capacity',
+        'rating_sum', 'rating_count', 'rating_avg',
+        'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count',
+    )
+    
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='venue_name_keyset_idx'),
+        ]
     
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        """Keep the geohash in step with the coordinates and the maintained fields out of updates"""
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geo.encode(self.latitude, self.longitude)
+        else:
+            self.geohash = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        exclude_maintained_fields(self, kwargs)
+        super().save(*args, **kwargs)
+    
     @property
     def full_address(self):
         """Returns the venue's full address"""
@@ -117,11 +197,13 @@ class Venue(models.Model):
     
     @property
     def average_rating(self):
-        """Calculate average rating from reviews"""
-        reviews = self.reviews.all()
-        if reviews.count() > 0:
-            return sum(review.rating for review in reviews) / reviews.count()
-        return 0
+        """Average rating from the stored review aggregates"""
+        return self.rating_avg
+    
+    @property
+    def rating_histogram(self):
+        """Number of reviews per star rating, 5 stars first"""
+        return [(stars, getattr(self, f'rating_{stars}_count')) for stars in range(5, 0, -1)]
 
 
 class VenueImage(models.Model):
@@ -148,10 +230,20 @@ class Room(models.Model):
     size_sqft = models.PositiveIntegerField(_('Size (sq ft)'), blank=True, null=True)
     price_per_hour = models.DecimalField(_('Price per Hour (₹)'), max_digits=10, decimal_places=2)
     amenities = models.ManyToManyField(Amenity, blank=True, related_name='rooms')
+    amenity_mask = models.BigIntegerField(_('Amenity Bitmask'), default=0, editable=False)
+    # First of ``images`` (primary, else oldest), kept by bookings.venue_stats
+    primary_image = models.ImageField(_('Primary Image'), upload_to='room_images/', blank=True, editable=False)
     is_active = models.BooleanField(_('Is Active'), default=True)
     
+    # Kept by bookings.amenity_masks and bookings.venue_stats; ordinary saves leave them alone
+    MAINTAINED_FIELDS = ('amenity_mask', 'primary_image')
+    
     def __str__(self):
         return f"{self.venue.name} - {self.name}"
+    
+    def save(self, *args, **kwargs):
+        exclude_maintained_fields(self, kwargs)
+        super().save(*args, **kwargs)
 
 
 class RoomImage(models.Model):
@@ -178,11 +270,115 @@ class TimeSlot(models.Model):
     
     class Meta:
         ordering = ['start_time']
+        indexes = [
+            models.Index(fields=['room', 'start_time'], name='timeslot_room_start_idx'),
+        ]
     
     def __str__(self):
         return f"{self.room.name}: {self.start_time.strftime('%Y-%m-%d %H:%M')} - {self.end_time.strftime('%H:%M')}"
 
 
+class RoomSchedule(models.Model):
+    """Opening hours used to compute virtual time slots for a room"""
+    SCHEDULE_TYPES = (
+        ('fixed', 'Fixed-length slots'),
+        ('overnight', 'Overnight stay (check-in/check-out)'),
+    )
+    
+    room = models.OneToOneField(Room, on_delete=models.CASCADE, related_name='schedule')
+    schedule_type = models.CharField(_('Schedule Type'), max_length=20, choices=SCHEDULE_TYPES, default='fixed')
+    opening_time = models.TimeField(_('Opening Time'), default=time(9, 0))
+    closing_time = models.TimeField(_('Closing Time'), default=time(21, 0))
+    slot_minutes = models.PositiveIntegerField(_('Slot Length (minutes)'), default=60, validators=[MinValueValidator(15)])
+    checkin_time = models.TimeField(_('Check-in Time'), default=time(14, 0))
+    checkout_time = models.TimeField(_('Check-out Time'), default=time(12, 0))
+    
+    def __str__(self):
+        return f"{self.room.name} schedule"
+
+
+class SlotException(models.Model):
+    """Persisted exceptions to a room schedule, such as blackouts"""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='slot_exceptions')
+    start_time = models.DateTimeField(_('Start Time'))
+    end_time = models.DateTimeField(_('End Time'))
+    reason = models.CharField(_('Reason'), max_length=255, blank=True)
+    
+    class Meta:
+        ordering = ['start_time']
+    
+    def __str__(self):
+        return f"{self.room.name}: blackout {self.start_time.strftime('%Y-%m-%d %H:%M')} - {self.end_time.strftime('%Y-%m-%d %H:%M')}"
+
+
+class RoomAvailabilityDay(models.Model):
+    """Quarter-hour availability bitmap for a room on a single day"""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='availability_days')
+    date = models.DateField(_('Date'))
+    free_bits = models.BinaryField(_('Free Quarter-Hours'), max_length=12, default=bytes(12))
+    
+    class Meta:
+        ordering = ['date']
+        unique_together = ['room', 'date']
+        
+    def __str__(self):
+        return f"{self.room.name}: {self.date}"
+
+
+class RoomDayOccupancy(models.Model):
+    """Precomputed booked and free minutes for a room on a single day"""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='occupancy_days')
+    date = models.DateField(_('Date'))
+    booked_minutes = models.PositiveIntegerField(_('Booked Minutes'), default=0)
+    free_minutes = models.PositiveIntegerField(_('Free Minutes'), default=0)
+    first_free_start = models.DateTimeField(_('First Free Start'), blank=True, null=True)
+    
+    class Meta:
+        ordering = ['date']
+        unique_together = ['room', 'date']
+        verbose_name_plural = 'Room day occupancies'
+        
+    def __str__(self):
+        return f"{self.room.name}: {self.date} ({self.status})"
+    
+    @property
+    def status(self):
+        if self.free_minutes == 0:
+            return 'full'
+        if self.booked_minutes == 0:
+            return 'free'
+        return 'partial'
+
+
+class RecurrenceRule(models.Model):
+    """RRULE-style rule for a booking that repeats weekly or monthly"""
+    FREQUENCY_CHOICES = (
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+    )
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='recurrence_rules')
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='recurrence_rules')
+    frequency = models.CharField(_('Frequency'), max_length=10, choices=FREQUENCY_CHOICES, default='weekly')
+    interval = models.PositiveIntegerField(_('Interval'), default=1, validators=[MinValueValidator(1)])
+    first_start = models.DateTimeField(_('First Start Time'))
+    first_end = models.DateTimeField(_('First End Time'))
+    count = models.PositiveIntegerField(_('Occurrences'), blank=True, null=True)
+    until = models.DateTimeField(_('Repeat Until'), blank=True, null=True)
+    exceptions = models.JSONField(_('Skipped Dates'), default=list, blank=True)
+    num_guests = models.PositiveIntegerField(_('Number of Guests'))
+    special_requests = models.TextField(_('Special Requests'), blank=True, null=True)
+    materialized_until = models.DateTimeField(_('Materialized Until'), blank=True, null=True)
+    is_active = models.BooleanField(_('Is Active'), default=True)
+    created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.get_frequency_display()} booking of {self.room.name} from {self.first_start.strftime('%Y-%m-%d')}"
+
+
 class Booking(models.Model):
     """Model for bookings"""
     STATUS_CHOICES = (
@@ -201,11 +397,17 @@ class Booking(models.Model):
     special_requests = models.TextField(_('Special Requests'), blank=True, null=True)
     status = models.CharField(_('Status'), max_length=20, choices=STATUS_CHOICES, default='pending')
     total_price = models.DecimalField(_('Total Price'), max_digits=10, decimal_places=2)
+    recurrence = models.ForeignKey(RecurrenceRule, on_delete=models.SET_NULL, blank=True, null=True, related_name='bookings')
     created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
     updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['room', 'start_time', 'end_time'], name='booking_room_window_idx'),
+            models.Index(fields=['created_at', 'id'], name='booking_created_keyset_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='booking_user_keyset_idx'),
+        ]
         
     def __str__(self):
         return f"Booking {self.booking_id} - {self.user.email}"
@@ -233,6 +435,30 @@ class Booking(models.Model):
         return hasattr(self, 'review') and self.review is not None
 
 
+class ReservationHold(models.Model):
+    """Short-lived claim on a room interval while checkout completes"""
+    hold_id = models.UUIDField(_('Hold ID'), default=uuid.uuid4, editable=False, unique=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reservation_holds')
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='holds')
+    start_time = models.DateTimeField(_('Start Time'))
+    end_time = models.DateTimeField(_('End Time'))
+    expires_at = models.DateTimeField(_('Expires At'), db_index=True)
+    created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
+    
+    class Meta:
+        ordering = ['expires_at']
+        indexes = [
+            models.Index(fields=['room', 'start_time', 'end_time'], name='hold_room_window_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Hold {self.hold_id} on {self.room.name} until {self.expires_at.strftime('%H:%M')}"
+    
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+
 class Review(models.Model):
     """Reviews for venues after booking"""
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reviews')
@@ -246,6 +472,10 @@ class Review(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['user', 'booking']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='review_created_keyset_idx'),
+            models.Index(fields=['venue', 'created_at', 'id'], name='review_venue_keyset_idx'),
+        ]
         
     def __str__(self):
         return f"{self.venue.name} - {self.rating} stars by {self.user.email}"
@@ -262,3 +492,39 @@ class Favorite(models.Model):
         
     def __str__(self):
         return f"{self.user.email} - {self.venue.name}"
+
+
+class VenueScore(models.Model):
+    """Time-decayed popularity counters of a venue, maintained by bookings.popularity"""
+    venue = models.OneToOneField(Venue, on_delete=models.CASCADE, primary_key=True, related_name='popularity')
+    bookings = models.FloatField(_('Decayed Bookings'), default=0)
+    favorites = models.FloatField(_('Decayed Favorites'), default=0)
+    reviews = models.FloatField(_('Decayed Review Stars'), default=0)
+    score = models.FloatField(_('Score'), default=0, db_index=True)
+    decayed_at = models.DateTimeField(_('Decayed At'), default=timezone.now)
+    
+    class Meta:
+        ordering = ['-score']
+        
+    def __str__(self):
+        return f"{self.venue.name}: {self.score:.2f}"
+
+
+class VenueVersion(models.Model):
+    """Change counter of a venue's pages and payloads, maintained by bookings.versions"""
+    venue = models.OneToOneField(Venue, on_delete=models.CASCADE, primary_key=True, related_name='change_counter')
+    version = models.PositiveBigIntegerField(_('Version'), default=1)
+    changed_at = models.DateTimeField(_('Changed At'), default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.venue_id}: v{self.version}"
+
+
+class RoomVersion(models.Model):
+    """Change counter of a room's pages and payloads, maintained by bookings.versions"""
+    room = models.OneToOneField(Room, on_delete=models.CASCADE, primary_key=True, related_name='change_counter')
+    version = models.PositiveBigIntegerField(_('Version'), default=1)
+    changed_at = models.DateTimeField(_('Changed At'), default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.room_id}: v{self.version}"
@@ -0,0 +1,183 @@
+"""
+Daily occupancy summaries for month-view calendars.
+
+Each ``RoomDayOccupancy`` row stores how many of a room's offered minutes are
+booked and free on one local day, plus when the first free period starts.
+Rows are recomputed only for the days a booking, blackout or schedule change
+touches, so a month calendar reads one small row per day instead of every
+booking. Days without a row are computed on first read.
+"""
+
+import calendar
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+
+from .models import Booking, Room, RoomDayOccupancy, SlotException
+from . import schedules
+
+
+# Completed bookings still occupied the room on past days
+OCCUPYING_STATUSES = ('pending', 'confirmed', 'completed')
+
+
+def _midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _merge(intervals):
+    """Sorted, non-overlapping union of (start, end) intervals"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract(intervals, removed):
+    """Parts of merged ``intervals`` not covered by merged ``removed``"""
+    remaining = []
+    position = 0
+    for start, end in intervals:
+        while position < len(removed) and removed[position][1] <= start:
+            position += 1
+        current = start
+        index = position
+        while index < len(removed) and removed[index][0] < end:
+            if removed[index][0] > current:
+                remaining.append((current, removed[index][0]))
+            current = max(current, removed[index][1])
+            index += 1
+        if current < end:
+            remaining.append((current, end))
+    return remaining
+
+
+def _minutes(intervals):
+    return int(sum((end - start).total_seconds() for start, end in intervals) // 60)
+
+
+def _clip(intervals, start, end):
+    return [(max(s, start), min(e, end)) for s, e in intervals if s < end and e > start]
+
+
+def local_dates(start, end):
+    """Local dates touched by [start, end)"""
+    first = timezone.localtime(start).date()
+    last = timezone.localtime(end - timedelta(microseconds=1)).date()
+    return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+
+
+def compute_days(room, dates):
+    """Unsaved RoomDayOccupancy rows for ``room`` on each of ``dates``"""
+    dates = sorted(set(dates))
+    if not dates:
+        return []
+    range_start = _midnight(dates[0])
+    range_end = _midnight(dates[-1] + timedelta(days=1))
+
+    # One range query each for bookings and blackouts, however many days
+    booked = list(Booking.objects.filter(
+        room=room,
+        status__in=OCCUPYING_STATUSES,
+        start_time__lt=range_end,
+        end_time__gt=range_start
+    ).values_list('start_time', 'end_time'))
+    blocked = list(SlotException.objects.filter(
+        room=room,
+        start_time__lt=range_end,
+        end_time__gt=range_start
+    ).values_list('start_time', 'end_time'))
+
+    schedule = schedules.get_schedule(room)
+    rows = []
+    for day in dates:
+        day_start = _midnight(day)
+        day_end = _midnight(day + timedelta(days=1))
+        # Overnight slots starting the day before still cover this morning
+        offered = _merge(_clip(
+            schedules.schedule_intervals(schedule, day - timedelta(days=1), day),
+            day_start, day_end
+        ))
+        day_bookings = _merge(_clip(booked, day_start, day_end))
+        free = _subtract(offered, _merge(day_bookings + _clip(blocked, day_start, day_end)))
+        rows.append(RoomDayOccupancy(
+            room=room,
+            date=day,
+            booked_minutes=_minutes(offered) - _minutes(_subtract(offered, day_bookings)),
+            free_minutes=_minutes(free),
+            first_free_start=free[0][0] if free else None
+        ))
+    return rows
+
+
+def _resolve(room):
+    if isinstance(room, Room):
+        return room
+    return Room.objects.select_related('venue__category', 'schedule').get(pk=room)
+
+
+def refresh_days(room, dates):
+    """Recompute and store the summaries for ``room`` on ``dates``"""
+    try:
+        room = _resolve(room)
+    except Room.DoesNotExist:
+        return []
+    rows = compute_days(room, dates)
+    if rows:
+        RoomDayOccupancy.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['room', 'date'],
+            update_fields=['booked_minutes', 'free_minutes', 'first_free_start']
+        )
+    return rows
+
+
+def refresh_interval(room, start, end):
+    """Recompute the summaries for every day [start, end) touches"""
+    if end > start:
+        refresh_days(room, local_dates(start, end))
+
+
+def refresh_intervals(intervals):
+    """Recompute the days touched by many (room id, start, end) intervals, grouped per room"""
+    days_by_room = {}
+    for room_id, start, end in intervals:
+        days_by_room.setdefault(room_id, set()).update(local_dates(start, end))
+    for room_id, days in days_by_room.items():
+        refresh_days(room_id, days)
+
+
+def refresh_bookings(bookings):
+    """Recompute the days touched by many bookings, grouped per room"""
+    refresh_intervals((booking.room_id, booking.start_time, booking.end_time) for booking in bookings)
+
+
+def invalidate_room(room, from_date=None):
+    """Drop a room's stored summaries from ``from_date`` on, e.g. after its schedule changed"""
+    RoomDayOccupancy.objects.filter(
+        room_id=getattr(room, 'pk', room),
+        date__gte=from_date or timezone.localdate()
+    ).delete()
+
+
+def month_days(room, year, month):
+    """Summaries for every day of the month, computing any that are missing"""
+    first = date(year, month, 1)
+    last = date(year, month, calendar.monthrange(year, month)[1])
+    rows = {
+        row.date: row for row in RoomDayOccupancy.objects.filter(
+            room=room,
+            date__gte=first,
+            date__lte=last
+        )
+    }
+    missing = [first + timedelta(days=offset) for offset in range((last - first).days + 1)
+               if first + timedelta(days=offset) not in rows]
+    for row in refresh_days(room, missing):
+        rows[row.date] = row
+    return [rows[day] for day in sorted(rows)]
@@ -0,0 +1,156 @@
+"""
+Venue popularity scores.
+
+Every venue's bookings, favorites and review stars are kept as exponentially
+time-decayed counters in ``VenueScore`` (half-life
+``VENUE_SCORE_HALF_LIFE_DAYS``), and ``score`` is their weighted sum. An event
+decays the venue's counters to now and adds its weight, so ranking by the
+indexed ``score`` column needs no aggregation over bookings or reviews. An
+event that is undone (a cancelled booking, a removed favorite) takes back
+its weight decayed from when it happened.
+
+Untouched rows keep the score of their last event, so the
+``decay_venue_scores`` command decays every row to the same moment in bulk;
+run it periodically (hourly keeps scores within a fraction of a percent).
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+
+WEIGHTS = {
+    'bookings': 3.0,
+    'favorites': 2.0,
+    'reviews': 1.0,
+}
+
+COUNTERS = tuple(WEIGHTS)
+
+# Bookings in these states count towards popularity
+COUNTED_BOOKING_STATUSES = ('pending', 'confirmed', 'completed')
+
+
+def half_life_days():
+    return getattr(settings, 'VENUE_SCORE_HALF_LIFE_DAYS', 14)
+
+
+def decay(seconds):
+    """Weight left of one event ``seconds`` old"""
+    return 0.5 ** (max(seconds, 0) / (half_life_days() * 86400))
+
+
+def combine(counters):
+    """The score for a dict of counter values"""
+    return sum(WEIGHTS[name] * counters[name] for name in COUNTERS)
+
+
+def review_weight(rating):
+    return (rating or 0) / 5
+
+
+def accumulate(events, now=None):
+    """{venue_id: counters} decayed to ``now`` from (venue_id, counter, weight, happened_at) events"""
+    now = now or timezone.now()
+    totals = {}
+    for venue_id, counter, weight, happened_at in events:
+        counters = totals.setdefault(venue_id, dict.fromkeys(COUNTERS, 0.0))
+        counters[counter] += weight * decay((now - happened_at).total_seconds())
+    return totals
+
+
+def _decay_row(score, now):
+    factor = decay((now - score.decayed_at).total_seconds())
+    for name in COUNTERS:
+        setattr(score, name, getattr(score, name) * factor)
+    score.decayed_at = now
+
+
+def record(events):
+    """Apply (venue_id, counter, weight, happened_at or None) events, one locked update per venue"""
+    from .models import VenueScore
+
+    now = timezone.now()
+    by_venue = {}
+    for venue_id, counter, weight, happened_at in events:
+        by_venue.setdefault(venue_id, []).append((counter, weight, happened_at or now))
+
+    with transaction.atomic():
+        for venue_id, changes in sorted(by_venue.items()):
+            if all(weight <= 0 for _, weight, _ in changes):
+                # Nothing to take back from a venue without a score (or one being deleted)
+                score = VenueScore.objects.select_for_update().filter(venue_id=venue_id).first()
+                if score is None:
+                    continue
+            else:
+                score, _ = VenueScore.objects.select_for_update().get_or_create(venue_id=venue_id)
+            _decay_row(score, now)
+            for counter, weight, happened_at in changes:
+                value = getattr(score, counter) + weight * decay((now - happened_at).total_seconds())
+                # Undoing an event never drives a counter below zero through rounding
+                setattr(score, counter, max(value, 0.0))
+            score.score = combine({name: getattr(score, name) for name in COUNTERS})
+            score.save()
+
+
+def record_bookings(bookings):
+    """Count new bookings whose room is loaded"""
+    record([
+        (booking.room.venue_id, 'bookings', 1, booking.created_at)
+        for booking in bookings
+        if booking.status in COUNTED_BOOKING_STATUSES
+    ])
+
+
+def decay_all(batch_size=500, now=None):
+    """
+    Decay every score to ``now`` in bulk; returns the number of rows updated.
+
+    Each batch is locked while it is decayed, as ``record`` locks a row before
+    adding to it, so an event committed meanwhile is never written over.
+    """
+    from .models import VenueScore
+
+    now = now or timezone.now()
+    updated = 0
+    last_pk = None
+    while True:
+        with transaction.atomic():
+            scores = VenueScore.objects.select_for_update().order_by('pk')
+            if last_pk is not None:
+                scores = scores.filter(pk__gt=last_pk)
+            batch = list(scores[:batch_size])
+            if not batch:
+                return updated
+            for score in batch:
+                _decay_row(score, now)
+                score.score = combine({name: getattr(score, name) for name in COUNTERS})
+            updated += VenueScore.objects.bulk_update(batch, list(COUNTERS) + ['score', 'decayed_at'])
+        last_pk = batch[-1].pk
+
+
+def events_since_start(booking_model, favorite_model, review_model):
+    """Every counted event on record, for rebuilding scores from scratch"""
+    for venue_id, created_at in booking_model.objects.filter(
+        status__in=COUNTED_BOOKING_STATUSES
+    ).values_list('room__venue_id', 'created_at').iterator():
+        yield venue_id, 'bookings', 1, created_at
+    for venue_id, created_at in favorite_model.objects.values_list('venue_id', 'created_at').iterator():
+        yield venue_id, 'favorites', 1, created_at
+    for venue_id, created_at, rating in review_model.objects.values_list('venue_id', 'created_at', 'rating').iterator():
+        yield venue_id, 'reviews', review_weight(rating), created_at
+
+
+def rebuild(venue_model, score_model, booking_model, favorite_model, review_model, batch_size=500):
+    """Replace every venue's score with one recomputed from bookings, favorites and reviews"""
+    now = timezone.now()
+    totals = accumulate(events_since_start(booking_model, favorite_model, review_model), now)
+    empty = dict.fromkeys(COUNTERS, 0.0)
+    with transaction.atomic():
+        score_model.objects.all().delete()
+        score_model.objects.bulk_create([
+            score_model(venue_id=venue_id, decayed_at=now, score=combine(totals.get(venue_id, empty)),
+                        **totals.get(venue_id, empty))
+            for venue_id in venue_model.objects.values_list('pk', flat=True).iterator()
+        ], batch_size=batch_size)
+    return len(totals)
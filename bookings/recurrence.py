@@ -0,0 +1,111 @@
+"""
+Recurring bookings.
+
+A ``RecurrenceRule`` describes a weekly or monthly series (every ``interval``
+weeks/months, bounded by ``count`` and/or ``until``, minus skipped dates).
+Occurrences are expanded lazily: only those starting before the booking
+horizon are materialized, in bulk through ``batch.create_bookings``, and
+``materialized_until`` records how far a rule has been written so the
+``materialize_recurring_bookings`` command can extend it as time passes.
+"""
+
+import calendar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import batch
+
+
+def horizon_days():
+    return getattr(settings, 'RECURRING_BOOKING_HORIZON_DAYS', 30)
+
+
+def _add_months(moment, months):
+    """Same day and time ``months`` later, or None when that day does not exist"""
+    month_index = moment.month - 1 + months
+    year = moment.year + month_index // 12
+    month = month_index % 12 + 1
+    if moment.day > calendar.monthrange(year, month)[1]:
+        return None
+    return moment.replace(year=year, month=month)
+
+
+def occurrences(rule, window_start=None, window_end=None):
+    """
+    Yield (start, end) for each occurrence of ``rule`` starting in [window_start, window_end).
+
+    Like RRULE, ``count`` is applied before skipped dates are removed, and
+    monthly rules skip months that lack the first occurrence's day.
+    """
+    duration = rule.first_end - rule.first_start
+    local_first = timezone.localtime(rule.first_start)
+    skipped = set(rule.exceptions or [])
+    produced = 0
+    step = 0
+    while rule.count is None or produced < rule.count:
+        if rule.frequency == 'monthly':
+            # The first of the month always exists, so bounds are checked on it
+            period_start = _add_months(local_first.replace(day=1), step * rule.interval)
+            local_start = _add_months(local_first, step * rule.interval)
+        else:
+            period_start = local_start = local_first + timedelta(weeks=step * rule.interval)
+        step += 1
+        bound = timezone.make_aware(period_start.replace(tzinfo=None))
+        if rule.until is not None and bound > rule.until:
+            return
+        if window_end is not None and bound >= window_end:
+            return
+        if local_start is None:
+            continue
+        start = timezone.make_aware(local_start.replace(tzinfo=None))
+        if rule.until is not None and start > rule.until:
+            return
+        if window_end is not None and start >= window_end:
+            return
+        produced += 1
+        if local_start.date().isoformat() in skipped:
+            continue
+        if window_start is None or start >= window_start:
+            yield start, start + duration
+
+
+def materialize(rule, horizon=None, skip_conflicts=True):
+    """
+    Create the bookings for every occurrence between ``materialized_until`` and ``horizon``.
+
+    The whole window is conflict-checked and inserted in one batch and debited
+    from the user's wallet once. Returns the created bookings.
+    """
+    now = timezone.now()
+    horizon = horizon or now + timedelta(days=horizon_days())
+    window_start = max(rule.materialized_until or rule.first_start, now)
+    if not rule.is_active or window_start >= horizon:
+        return []
+
+    items = [
+        {
+            'room': rule.room,
+            'start_time': start,
+            'end_time': end,
+            'num_guests': rule.num_guests,
+            'special_requests': rule.special_requests,
+        }
+        for start, end in occurrences(rule, window_start, horizon)
+    ]
+
+    with transaction.atomic():
+        bookings = []
+        if items:
+            bookings = batch.create_bookings(
+                rule.user,
+                items,
+                description=f"Recurring booking at {rule.room.venue.name} - {rule.room.name}",
+                skip_conflicts=skip_conflicts,
+                extra_fields={'recurrence': rule}
+            )
+        rule.materialized_until = horizon
+        rule.save(update_fields=['materialized_until'])
+    return bookings
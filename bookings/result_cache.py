@@ -0,0 +1,126 @@
+"""
+Cached venue listing and search results.
+
+Most listing traffic repeats a few filter combinations, so the ordered venue
+ids (and the sidebar counts) for a normalized filter set are kept in a
+per-process LRU of ``VENUE_RESULT_CACHE_SIZE`` entries. Each entry records
+the result version it was computed at; saving or deleting a venue, room,
+review, category or amenity bumps the version in Django's cache, so stale
+entries are recomputed on their next use. With a shared cache backend the
+version is shared by every process too.
+
+A hit costs one version read from the cache, one indexed count of the ids
+that still exist and one primary-key query for the rows actually shown. Ids
+whose rows have gone (deleted by a process that does not share this cache)
+are dropped and the version bumped, so counts and pages stay consistent.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+VERSION_KEY = 'bookings:venue-results-version'
+
+
+def max_entries():
+    return getattr(settings, 'VENUE_RESULT_CACHE_SIZE', 256)
+
+
+def current_version():
+    # Seeded from the clock so a lost counter never reuses an old version
+    return cache.get_or_set(VERSION_KEY, time.time_ns, None)
+
+
+def bump_version():
+    """Invalidate every cached result"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+class ResultCache:
+    """A size-bounded LRU of versioned results"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get_or_compute(self, key, compute):
+        version = current_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+        value = compute()
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries():
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+results = ResultCache()
+
+
+class IdList:
+    """Ordered primary keys that load their rows from ``queryset`` only when sliced"""
+
+    def __init__(self, queryset, ids):
+        self.queryset = queryset
+        self.ids = ids
+        self._checked = False
+
+    def existing_ids(self):
+        """The ids, less any whose rows no longer exist"""
+        if not self._checked:
+            self._checked = True
+            if self.ids and self.queryset.filter(pk__in=self.ids).count() < len(self.ids):
+                present = set(self.queryset.filter(pk__in=self.ids).values_list('pk', flat=True))
+                self.ids = tuple(pk for pk in self.ids if pk in present)
+                bump_version()
+        return self.ids
+
+    def count(self):
+        return len(self.existing_ids())
+
+    def __len__(self):
+        return len(self.existing_ids())
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1 or None][0]
+        ids = self.existing_ids()[index]
+        rows = self.queryset.in_bulk(ids)
+        missing = [pk for pk in ids if pk not in rows]
+        if missing:
+            # Deleted since they were counted
+            self.ids = tuple(pk for pk in self.ids if pk not in missing)
+            bump_version()
+        return [rows[pk] for pk in ids if pk in rows]
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+def venue_ids(key, build):
+    """Ordered ids of the queryset returned by ``build``, cached under ``key``"""
+    return results.get_or_compute(('ids',) + key, lambda: tuple(build().values_list('pk', flat=True)))
+
+
+def cached(key, compute):
+    """Any other value derived from venue data, cached under ``key``"""
+    return results.get_or_compute(key, compute)
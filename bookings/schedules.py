@@ -0,0 +1,194 @@
+"""
+Virtual time slots computed from room schedules.
+
+With ``VIRTUAL_TIME_SLOTS`` enabled, slots are never materialized as TimeSlot
+rows. They are generated on demand from the room's ``RoomSchedule`` (or a
+default derived from the venue category) and merged with active bookings and
+persisted ``SlotException`` blackouts. The slots returned are unsaved TimeSlot
+instances, so templates and serializers written for stored slots keep working.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Booking, RoomSchedule, SlotException, TimeSlot, VenueCategory
+
+
+ACTIVE_BOOKING_STATUSES = ('pending', 'confirmed')
+
+# The RoomSchedule columns that decide which slots are offered
+HOURS_FIELDS = ('schedule_type', 'opening_time', 'closing_time', 'slot_minutes', 'checkin_time', 'checkout_time')
+
+
+def virtual_slots_enabled():
+    return getattr(settings, 'VIRTUAL_TIME_SLOTS', False)
+
+
+def default_schedule(room):
+    """Schedule matching the slots the booking page used to generate per category"""
+    return category_schedule(room.venue.category.name if room.venue.category else "", room)
+
+
+def category_schedule(category_name, room=None):
+    """The default schedule for rooms of venues in a category of this name"""
+    category = category_name.lower()
+    if 'hotel' in category:
+        return RoomSchedule(room=room, schedule_type='overnight')
+    if 'restaurant' in category or 'café' in category or 'cafe' in category:
+        return RoomSchedule(room=room, opening_time=time(10, 0), closing_time=time(22, 0), slot_minutes=120)
+    return RoomSchedule(room=room)
+
+
+def get_schedule(room):
+    try:
+        return room.schedule
+    except RoomSchedule.DoesNotExist:
+        return default_schedule(room)
+
+
+def _aware(day, moment):
+    return timezone.make_aware(datetime.combine(day, moment))
+
+
+def schedule_intervals(schedule, start_date, end_date):
+    """Yield (start, end) for every slot the schedule offers between two dates"""
+    day = start_date
+    while day <= end_date:
+        if schedule.schedule_type == 'overnight':
+            yield _aware(day, schedule.checkin_time), _aware(day + timedelta(days=1), schedule.checkout_time)
+        else:
+            current = _aware(day, schedule.opening_time)
+            closing = _aware(day, schedule.closing_time)
+            if closing <= current:
+                closing += timedelta(days=1)
+            length = timedelta(minutes=schedule.slot_minutes)
+            while current + length <= closing:
+                yield current, current + length
+                current += length
+        day += timedelta(days=1)
+
+
+def blocked_intervals(room, start, end, include_bookings=True):
+    """Sorted (start, end) of blackouts and, optionally, active bookings overlapping [start, end)"""
+    blocked = list(SlotException.objects.filter(
+        room=room,
+        start_time__lt=end,
+        end_time__gt=start
+    ).values_list('start_time', 'end_time'))
+    if include_bookings:
+        blocked += Booking.objects.filter(
+            room=room,
+            status__in=ACTIVE_BOOKING_STATUSES,
+            start_time__lt=end,
+            end_time__gt=start
+        ).values_list('start_time', 'end_time')
+    blocked.sort()
+    return blocked
+
+
+def _mark_slots(intervals, blocked):
+    """Pair each sorted slot interval with its availability given sorted blocked intervals"""
+    marked = []
+    first_blocker = 0
+    for start, end in intervals:
+        # Blocked intervals ending before this slot can never affect later slots
+        while first_blocker < len(blocked) and blocked[first_blocker][1] <= start:
+            first_blocker += 1
+        available = True
+        position = first_blocker
+        while position < len(blocked) and blocked[position][0] < end:
+            if blocked[position][1] > start:
+                available = False
+                break
+            position += 1
+        marked.append((start, end, available))
+    return marked
+
+
+def slot_availability(room, start_date, end_date, opening_time, closing_time, slot_minutes=60):
+    """
+    (start, end, available) for back-to-back slots of ``slot_minutes`` in daily opening hours.
+
+    Covers every day between the two dates (inclusive). Bookings and blackouts
+    for the whole range are fetched once and swept against the sorted slots.
+    """
+    hours = RoomSchedule(opening_time=opening_time, closing_time=closing_time, slot_minutes=slot_minutes)
+    intervals = list(schedule_intervals(hours, start_date, end_date))
+    if not intervals:
+        return []
+    return _mark_slots(intervals, blocked_intervals(room, intervals[0][0], intervals[-1][1]))
+
+
+def virtual_slots(room, start_date, end_date, available_only=False):
+    """Unsaved TimeSlot instances for the room between two dates (inclusive)"""
+    intervals = sorted(schedule_intervals(get_schedule(room), start_date, end_date))
+    if not intervals:
+        return []
+    blocked = blocked_intervals(room, intervals[0][0], max(end for start, end in intervals))
+    return [
+        TimeSlot(room=room, start_time=start, end_time=end, is_available=available)
+        for start, end, available in _mark_slots(intervals, blocked)
+        if available or not available_only
+    ]
+
+
+def within_schedule(room, start, end):
+    """Whether back-to-back slots of the room's schedule cover [start, end)"""
+    return schedule_covers(get_schedule(room), start, end)
+
+
+def schedule_covers(schedule, start, end):
+    """Whether back-to-back slots of ``schedule`` cover [start, end)"""
+    local_start = timezone.localtime(start)
+    local_end = timezone.localtime(end)
+    intervals = sorted(schedule_intervals(
+        schedule,
+        local_start.date() - timedelta(days=1),
+        local_end.date()
+    ))
+    covered_until = None
+    for slot_start, slot_end in intervals:
+        if covered_until is None:
+            if slot_start <= start < slot_end:
+                covered_until = slot_end
+        elif slot_start <= covered_until:
+            covered_until = max(covered_until, slot_end)
+        if covered_until is not None and covered_until >= end:
+            break
+    return covered_until is not None and covered_until >= end
+
+
+def within_schedule_q(start, end):
+    """
+    Condition on Room for ``within_schedule``, to filter a whole queryset.
+
+    Rooms with the same hours get the same answer, so it is worked out once
+    per distinct RoomSchedule and once per category's default schedule; the
+    rooms themselves are never loaded.
+    """
+    condition = Q(pk__in=[])
+    for values in RoomSchedule.objects.order_by().values_list(*HOURS_FIELDS).distinct():
+        hours = dict(zip(HOURS_FIELDS, values))
+        if schedule_covers(RoomSchedule(**hours), start, end):
+            condition |= Q(**{f'schedule__{name}': value for name, value in hours.items()})
+
+    covered_categories = [
+        pk for pk, name in VenueCategory.objects.values_list('pk', 'name')
+        if schedule_covers(category_schedule(name), start, end)
+    ]
+    defaults = Q(venue__category__in=covered_categories)
+    if schedule_covers(category_schedule(''), start, end):
+        defaults |= Q(venue__category__isnull=True)
+    return condition | (Q(schedule__isnull=True) & defaults)
+
+
+def is_bookable(room, start, end):
+    """
+    Whether [start, end) lies inside the room's offered hours and misses every blackout.
+
+    Existing bookings are not considered here; the interval index answers that.
+    """
+    return within_schedule(room, start, end) and not blocked_intervals(room, start, end, include_bookings=False)
@@ -0,0 +1,247 @@
+"""
+Full-text search for venues and reviews.
+
+Each index is a side table keyed by the indexed row's primary key: an FTS5
+virtual table on SQLite and a ``tsvector`` column with a GIN index on
+PostgreSQL. Rows are re-indexed from the model signals, so a search reads
+the index instead of scanning every row with ``LIKE``. Every match is kept
+through a subquery on the index; the best ``SEARCH_MAX_RESULTS`` of them
+within the caller's other filters are ranked in the database (``bm25`` /
+``ts_rank``) and come first. Other backends fall back to ``icontains``
+lookups on the same fields.
+"""
+
+import re
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def max_results():
+    return getattr(settings, 'SEARCH_MAX_RESULTS', 1000)
+
+
+def tokens(query):
+    """Words of a user query, stripped of any search syntax"""
+    return TOKEN_RE.findall((query or '').lower())[:16]
+
+
+class SearchIndex:
+    """
+    A full-text index over some text fields of one model.
+
+    ``fields`` maps document columns to (attribute path, weight); weights are
+    bm25 column weights on SQLite and map to tsvector weights A-D on PostgreSQL.
+    """
+
+    def __init__(self, table, fields, related=()):
+        self.table = table
+        self.fields = fields
+        self.related = related
+
+    @property
+    def vendor(self):
+        return connection.vendor
+
+    def supported(self):
+        return self.vendor in ('sqlite', 'postgresql')
+
+    def _values(self, obj):
+        values = []
+        for path, _ in self.fields.values():
+            value = obj
+            for attribute in path.split('__'):
+                value = getattr(value, attribute, None) if value is not None else None
+            values.append(str(value) if value is not None else '')
+        return values
+
+    def _pg_weight(self, weight):
+        if weight >= 10:
+            return 'A'
+        if weight >= 5:
+            return 'B'
+        if weight >= 2:
+            return 'C'
+        return 'D'
+
+    # Schema
+
+    def create(self, cursor):
+        if self.vendor == 'sqlite':
+            columns = ', '.join(self.fields)
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+                f"USING fts5({columns}, tokenize='unicode61 remove_diacritics 2')"
+            )
+        elif self.vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                f"(object_id integer PRIMARY KEY, document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_document_idx ON {self.table} USING GIN (document)"
+            )
+
+    def drop(self, cursor):
+        if self.supported():
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    # Writes
+
+    def index(self, objects):
+        """Add or replace the documents for ``objects``"""
+        if not self.supported():
+            return
+        objects = list(objects)
+        if not objects:
+            return
+        with connection.cursor() as cursor:
+            self.remove([obj.pk for obj in objects], cursor)
+            if self.vendor == 'sqlite':
+                placeholders = ', '.join(['%s'] * (len(self.fields) + 1))
+                cursor.executemany(
+                    f"INSERT INTO {self.table} (rowid, {', '.join(self.fields)}) VALUES ({placeholders})",
+                    [[obj.pk] + self._values(obj) for obj in objects]
+                )
+            else:
+                document = ' || '.join(
+                    f"setweight(to_tsvector('simple', %s), '{self._pg_weight(weight)}')"
+                    for _, weight in self.fields.values()
+                )
+                cursor.executemany(
+                    f"INSERT INTO {self.table} (object_id, document) VALUES (%s, {document})",
+                    [[obj.pk] + self._values(obj) for obj in objects]
+                )
+
+    def remove(self, pks, cursor=None):
+        """Drop the documents for primary keys ``pks``"""
+        if not self.supported() or not pks:
+            return
+        key = 'rowid' if self.vendor == 'sqlite' else 'object_id'
+        placeholders = ', '.join(['%s'] * len(pks))
+        if cursor is None:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {self.table} WHERE {key} IN ({placeholders})", list(pks))
+        else:
+            cursor.execute(f"DELETE FROM {self.table} WHERE {key} IN ({placeholders})", list(pks))
+
+    def rebuild(self, queryset, batch_size=500):
+        """Re-index every row of ``queryset``"""
+        if not self.supported():
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+        batch = []
+        for obj in queryset.select_related(*self.related).iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                self.index(batch)
+                batch = []
+        self.index(batch)
+
+    # Reads
+
+    def _match(self, words):
+        """(key column, WHERE clause, params) selecting the documents matching every word"""
+        if self.vendor == 'sqlite':
+            return 'rowid', f"{self.table} MATCH %s", [' '.join(f'"{word}"*' for word in words)]
+        return 'object_id', "document @@ to_tsquery('simple', %s)", [' & '.join(f'{word}:*' for word in words)]
+
+    def matches(self, query):
+        """Condition keeping every row that matches ``query``, unranked and uncapped"""
+        key, where, params = self._match(tokens(query))
+        return Q(pk__in=RawSQL(f"SELECT {key} FROM {self.table} WHERE {where}", params))
+
+    def ranked_ids(self, query, limit=None, queryset=None):
+        """
+        Primary keys matching every word of ``query`` (as prefixes), best
+        first; only rows of ``queryset`` when given.
+        """
+        words = tokens(query)
+        if not words:
+            return []
+        limit = limit or max_results()
+        key, where, params = self._match(words)
+        if queryset is not None:
+            try:
+                subquery, subquery_params = queryset.order_by().values('pk').query.sql_with_params()
+            except EmptyResultSet:
+                return []
+            where = f"{where} AND {key} IN ({subquery})"
+            params = params + list(subquery_params)
+        with connection.cursor() as cursor:
+            if self.vendor == 'sqlite':
+                weights = ', '.join(str(float(weight)) for _, weight in self.fields.values())
+                cursor.execute(
+                    f"SELECT rowid FROM {self.table} WHERE {where} "
+                    f"ORDER BY bm25({self.table}, {weights}) LIMIT %s",
+                    params + [limit]
+                )
+            else:
+                cursor.execute(
+                    f"SELECT object_id FROM {self.table} WHERE {where} "
+                    f"ORDER BY ts_rank(document, to_tsquery('simple', %s)) DESC LIMIT %s",
+                    params + [params[0], limit]
+                )
+            return [row[0] for row in cursor.fetchall()]
+
+    def fallback_filter(self, query):
+        """icontains lookups for backends without a full-text index"""
+        condition = Q()
+        for word in tokens(query):
+            word_condition = Q()
+            for path, _ in self.fields.values():
+                word_condition |= Q(**{f'{path}__icontains': word})
+            condition &= word_condition
+        return condition
+
+    def filter(self, queryset, query):
+        """
+        Restrict ``queryset`` to matches of ``query``, best first.
+
+        Apply it after the other filters: the ranking only looks at the rows
+        ``queryset`` already keeps, and matches past the ranked ones follow
+        in primary-key order.
+        """
+        if not tokens(query):
+            return queryset
+        if not self.supported():
+            return queryset.filter(self.fallback_filter(query))
+        ids = self.ranked_ids(query, queryset=queryset)
+        if not ids:
+            return queryset.none()
+        return queryset.filter(self.matches(query)).order_by(Case(
+            *[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+            default=Value(len(ids)),
+            output_field=IntegerField()
+        ), 'pk')
+
+
+venue_index = SearchIndex('bookings_venue_fts', {
+    'name': ('name', 10),
+    'city': ('city', 5),
+    'state': ('state', 3),
+    'country': ('country', 3),
+    'address': ('address', 2),
+    'description': ('description', 1),
+})
+
+review_index = SearchIndex('bookings_review_fts', {
+    'venue_name': ('venue__name', 5),
+    'user_email': ('user__email', 5),
+    'comment': ('comment', 1),
+}, related=('venue', 'user'))
+
+
+def search_venues(queryset, query):
+    return venue_index.filter(queryset, query)
+
+
+def search_reviews(queryset, query):
+    return review_index.filter(queryset, query)
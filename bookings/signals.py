@@ -0,0 +1,399 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_init, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .models import (Booking, TimeSlot, RoomSchedule, SlotException, ReservationHold, Venue, Review, Room,
+                     Amenity, VenueCategory, Favorite, VenueScore, VenueImage, RoomImage)
+from .interval_index import booking_index
+from . import amenity_masks, autocomplete, availability_bitmap, live, occupancy, popularity, result_cache, search, venue_stats, versions
+
+
+ACTIVE_BOOKING_STATUSES = ('pending', 'confirmed')
+
+
+@receiver(post_save, sender=Booking)
+def sync_booking_index(sender, instance, **kwargs):
+    """Keep the room interval index in step with booking create/status changes"""
+    transaction.on_commit(lambda: booking_index.sync(instance))
+
+
+@receiver(post_delete, sender=Booking)
+def remove_booking_from_index(sender, instance, **kwargs):
+    """Drop deleted bookings from the room interval index"""
+    booking_id = instance.pk
+    transaction.on_commit(lambda: booking_index.discard(booking_id))
+
+
+def _interval(instance):
+    return (instance.__dict__.get('room_id'), instance.__dict__.get('start_time'), instance.__dict__.get('end_time'))
+
+
+@receiver(post_init, sender=Booking)
+@receiver(post_init, sender=SlotException)
+def remember_interval(sender, instance, **kwargs):
+    """Note the stored room and interval so a moved one also refreshes the days it left"""
+    instance._stored_interval = _interval(instance)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=SlotException)
+@receiver(post_delete, sender=SlotException)
+def refresh_interval_occupancy(sender, instance, **kwargs):
+    """Recompute the daily occupancy summaries a booking or blackout touches, before and after"""
+    intervals = {
+        interval for interval in (instance._stored_interval, _interval(instance))
+        if None not in interval
+    }
+    instance._stored_interval = _interval(instance)
+    transaction.on_commit(lambda: occupancy.refresh_intervals(intervals))
+
+
+@receiver(post_save, sender=RoomSchedule)
+@receiver(post_delete, sender=RoomSchedule)
+def invalidate_schedule_occupancy(sender, instance, **kwargs):
+    """Opening hours changed, so upcoming summaries are recomputed on next read"""
+    room_id = instance.room_id
+    transaction.on_commit(lambda: occupancy.invalidate_room(room_id))
+
+
+@receiver(post_save, sender=TimeSlot)
+def sync_slot_bitmap(sender, instance, **kwargs):
+    """Mirror a slot's availability into the room-day bitmap"""
+    if instance.is_available:
+        availability_bitmap.set_range(instance.room_id, instance.start_time, instance.end_time)
+    else:
+        availability_bitmap.clear_range(instance.room_id, instance.start_time, instance.end_time)
+
+
+@receiver(post_delete, sender=TimeSlot)
+def clear_slot_bitmap(sender, instance, **kwargs):
+    """Deleted slots are no longer offered"""
+    availability_bitmap.clear_range(instance.room_id, instance.start_time, instance.end_time)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def push_booking_availability(sender, instance, **kwargs):
+    """Stream booking changes to clients watching the room"""
+    available = kwargs['signal'] is post_delete or instance.status not in ACTIVE_BOOKING_STATUSES
+    transaction.on_commit(lambda: live.publish_interval(
+        instance.room_id, instance.start_time, instance.end_time, available, 'booking'
+    ))
+
+
+@receiver(post_save, sender=ReservationHold)
+def push_hold_taken(sender, instance, created, **kwargs):
+    """A new hold takes the interval off the market"""
+    if created:
+        transaction.on_commit(lambda: live.publish_interval(
+            instance.room_id, instance.start_time, instance.end_time, False, 'hold'
+        ))
+
+
+@receiver(post_delete, sender=ReservationHold)
+def push_hold_released(sender, instance, **kwargs):
+    """A released hold frees the interval unless it became a booking"""
+    transaction.on_commit(lambda: live.publish_hold_release(
+        instance.room_id, instance.start_time, instance.end_time
+    ))
+
+
+@receiver(post_save, sender=Venue)
+def index_venue(sender, instance, **kwargs):
+    """Keep the venue search index current; reviews carry the venue name too"""
+    search.venue_index.index([instance])
+    if not kwargs.get('created'):
+        search.review_index.index(instance.reviews.select_related('user', 'venue'))
+
+
+@receiver(post_delete, sender=Venue)
+def unindex_venue(sender, instance, **kwargs):
+    search.venue_index.remove([instance.pk])
+
+
+@receiver(post_save, sender=Venue)
+def sync_venue_autocomplete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: autocomplete.venue_changed(instance))
+
+
+@receiver(post_delete, sender=Venue)
+def remove_venue_autocomplete(sender, instance, **kwargs):
+    venue_id = instance.pk
+    transaction.on_commit(lambda: autocomplete.venue_removed(venue_id))
+
+
+@receiver(post_save, sender=VenueCategory)
+def sync_category_autocomplete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: autocomplete.category_changed(instance))
+
+
+@receiver(post_delete, sender=VenueCategory)
+def remove_category_autocomplete(sender, instance, **kwargs):
+    category_id = instance.pk
+    transaction.on_commit(lambda: autocomplete.category_removed(category_id))
+
+
+@receiver(post_save, sender=Review)
+def index_review(sender, instance, **kwargs):
+    search.review_index.index([instance])
+
+
+@receiver(post_delete, sender=Review)
+def unindex_review(sender, instance, **kwargs):
+    search.review_index.remove([instance.pk])
+
+
+@receiver(post_init, sender=settings.AUTH_USER_MODEL)
+def remember_indexed_email(sender, instance, **kwargs):
+    instance._indexed_email = instance.__dict__.get('email')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_user_reviews(sender, instance, created, update_fields=None, **kwargs):
+    """Review documents carry the reviewer's email"""
+    if update_fields is not None and 'email' not in update_fields:
+        return
+    if not created and instance.email != instance._indexed_email:
+        search.review_index.index(instance.reviews.select_related('user', 'venue'))
+    instance._indexed_email = instance.email
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def refresh_venue_room_stats(sender, instance, **kwargs):
+    """Keep the venue's price bounds, room count and largest capacity current"""
+    venue_stats.refresh_room_stats([instance.venue_id])
+
+
+@receiver(post_save, sender=VenueImage)
+@receiver(post_delete, sender=VenueImage)
+def refresh_venue_primary_image(sender, instance, **kwargs):
+    venue_stats.refresh_primary_images(Venue, [instance.venue_id])
+
+
+@receiver(post_save, sender=RoomImage)
+@receiver(post_delete, sender=RoomImage)
+def refresh_room_primary_image(sender, instance, **kwargs):
+    venue_stats.refresh_primary_images(Room, [instance.room_id])
+
+
+@receiver(post_init, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    """Note the stored venue and rating so edits can be applied as deltas"""
+    instance._stored_rating = (instance.__dict__.get('venue_id'), instance.__dict__.get('rating'))
+
+
+@receiver(post_save, sender=Review)
+def update_venue_ratings(sender, instance, created, **kwargs):
+    """Fold a new or edited review into the venue's rating aggregates and popularity"""
+    old_venue_id, old_rating = instance._stored_rating
+    if created:
+        venue_stats.apply_rating_change(instance.venue_id, added=instance.rating)
+        popularity.record([(instance.venue_id, 'reviews', popularity.review_weight(instance.rating), instance.created_at)])
+    elif old_venue_id == instance.venue_id:
+        if old_rating != instance.rating:
+            venue_stats.apply_rating_change(instance.venue_id, removed=old_rating, added=instance.rating)
+            popularity.record([(
+                instance.venue_id, 'reviews',
+                popularity.review_weight(instance.rating) - popularity.review_weight(old_rating), instance.created_at
+            )])
+    else:
+        venue_stats.apply_rating_change(old_venue_id, removed=old_rating)
+        venue_stats.apply_rating_change(instance.venue_id, added=instance.rating)
+        popularity.record([
+            (old_venue_id, 'reviews', -popularity.review_weight(old_rating), instance.created_at),
+            (instance.venue_id, 'reviews', popularity.review_weight(instance.rating), instance.created_at),
+        ])
+    instance._stored_rating = (instance.venue_id, instance.rating)
+
+
+@receiver(post_delete, sender=Review)
+def remove_venue_rating(sender, instance, **kwargs):
+    venue_stats.apply_rating_change(instance.venue_id, removed=instance._stored_rating[1])
+    popularity.record([
+        (instance.venue_id, 'reviews', -popularity.review_weight(instance._stored_rating[1]), instance.created_at)
+    ])
+
+
+@receiver(post_init, sender=Booking)
+def remember_booking_status(sender, instance, **kwargs):
+    """Note the stored status so cancellations can be taken out of popularity"""
+    instance._stored_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Booking)
+def count_booking_popularity(sender, instance, created, **kwargs):
+    """Bookings count towards their venue's popularity until cancelled"""
+    counted = instance.status in popularity.COUNTED_BOOKING_STATUSES
+    was_counted = not created and instance._stored_status in popularity.COUNTED_BOOKING_STATUSES
+    if counted != was_counted:
+        popularity.record([(instance.room.venue_id, 'bookings', 1 if counted else -1, instance.created_at)])
+    instance._stored_status = instance.status
+
+
+@receiver(post_delete, sender=Booking)
+def uncount_booking_popularity(sender, instance, **kwargs):
+    if instance._stored_status in popularity.COUNTED_BOOKING_STATUSES:
+        popularity.record([(instance.room.venue_id, 'bookings', -1, instance.created_at)])
+
+
+@receiver(post_save, sender=Venue)
+def create_venue_score(sender, instance, created, **kwargs):
+    """Every venue has a score row, so popularity sorts need no NULL handling"""
+    if created:
+        VenueScore.objects.get_or_create(venue=instance)
+
+
+@receiver(post_save, sender=Favorite)
+def count_favorite_popularity(sender, instance, created, **kwargs):
+    if created:
+        popularity.record([(instance.venue_id, 'favorites', 1, instance.created_at)])
+
+
+@receiver(post_delete, sender=Favorite)
+def uncount_favorite_popularity(sender, instance, **kwargs):
+    popularity.record([(instance.venue_id, 'favorites', -1, instance.created_at)])
+
+
+@receiver(m2m_changed, sender=Venue.amenities.through)
+@receiver(m2m_changed, sender=Room.amenities.through)
+def sync_amenity_mask(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Keep venue and room amenity bitmasks in step with their amenities"""
+    owner = Venue if sender is Venue.amenities.through else Room
+    if reverse and action == 'pre_clear':
+        # amenity.venues.clear() reports no pks afterwards, so note them now
+        instance._cleared_owner_pks = list(
+            sender.objects.filter(amenity_id=instance.pk).values_list(f'{owner._meta.model_name}_id', flat=True)
+        )
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            amenity_masks.refresh_masks(owner, [instance.pk])
+        elif action == 'post_clear':
+            amenity_masks.refresh_masks(owner, getattr(instance, '_cleared_owner_pks', []))
+        else:
+            amenity_masks.refresh_masks(owner, pk_set)
+
+
+@receiver(post_delete, sender=Amenity)
+def clear_amenity_bit(sender, instance, **kwargs):
+    """Deleted amenities leave the masks so their bit can be reused"""
+    if instance.bit is not None:
+        amenity_masks.clear_bit(Venue, instance.bit)
+        amenity_masks.clear_bit(Room, instance.bit)
+
+
+@receiver(post_save, sender=Venue)
+@receiver(post_delete, sender=Venue)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=VenueCategory)
+@receiver(post_delete, sender=VenueCategory)
+@receiver(post_save, sender=Amenity)
+@receiver(post_delete, sender=Amenity)
+def invalidate_venue_results(sender, **kwargs):
+    """Cached venue listings are stale once any data they filter on changes"""
+    transaction.on_commit(result_cache.bump_version)
+
+
+@receiver(m2m_changed, sender=Venue.amenities.through)
+def invalidate_venue_results_for_amenities(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(result_cache.bump_version)
+
+
+@receiver(post_save, sender=Venue)
+@receiver(post_save, sender=VenueImage)
+@receiver(post_delete, sender=VenueImage)
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Review)
+def bump_venue_version(sender, instance, **kwargs):
+    """Venue pages show the venue, its images, reviews and whether it is a favorite"""
+    versions.bump(venue_ids=[instance.pk if sender is Venue else instance.venue_id])
+
+
+@receiver(pre_save, sender=Review)
+def bump_reviewed_venue_versions(sender, instance, **kwargs):
+    # Before update_venue_ratings moves on, _stored_rating still names the old venue
+    versions.bump(venue_ids=[instance.venue_id, instance._stored_rating[0]])
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=RoomImage)
+@receiver(post_delete, sender=RoomImage)
+@receiver(post_save, sender=TimeSlot)
+@receiver(post_delete, sender=TimeSlot)
+@receiver(post_save, sender=SlotException)
+@receiver(post_delete, sender=SlotException)
+@receiver(post_save, sender=RoomSchedule)
+@receiver(post_delete, sender=RoomSchedule)
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def bump_room_version(sender, instance, signal, **kwargs):
+    """Room pages and availability show the room, its images, slots, schedule, blackouts and bookings"""
+    if sender is not Room:
+        versions.bump(room_ids=[instance.room_id])
+    elif signal is post_delete:
+        # The room is gone, so its venue is no longer found through it
+        versions.bump(venue_ids=[instance.venue_id])
+    else:
+        versions.bump(room_ids=[instance.pk])
+
+
+# User fields venue pages show: the owner in API payloads, reviewers on the page
+USER_SHOWN_FIELDS = ('email', 'username', 'first_name', 'last_name', 'profile_image')
+
+
+def _shown_user_fields(user):
+    return tuple(str(user.__dict__.get(name) or '') for name in USER_SHOWN_FIELDS)
+
+
+@receiver(post_init, sender=settings.AUTH_USER_MODEL)
+def remember_shown_user_fields(sender, instance, **kwargs):
+    instance._shown_fields = _shown_user_fields(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def bump_user_venue_versions(sender, instance, created, update_fields=None, **kwargs):
+    """Venues owned or reviewed by a user show their name, email and picture"""
+    if update_fields is not None and not set(update_fields) & set(USER_SHOWN_FIELDS):
+        return
+    shown = _shown_user_fields(instance)
+    if not created and shown != instance._shown_fields:
+        versions.bump(venue_ids=Venue.objects.filter(
+            Q(owner=instance) | Q(reviews__user=instance)
+        ).values_list('pk', flat=True))
+    instance._shown_fields = shown
+
+
+@receiver(post_save, sender=Amenity)
+@receiver(pre_delete, sender=Amenity)
+def bump_amenity_owner_versions(sender, instance, **kwargs):
+    if not kwargs.get('created'):
+        versions.bump(
+            venue_ids=instance.venues.values_list('pk', flat=True),
+            room_ids=instance.rooms.values_list('pk', flat=True)
+        )
+
+
+@receiver(m2m_changed, sender=Venue.amenities.through)
+@receiver(m2m_changed, sender=Room.amenities.through)
+def bump_amenity_change_versions(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        owner_pks = [instance.pk]
+    elif action == 'post_clear':
+        owner_pks = getattr(instance, '_cleared_owner_pks', [])
+    else:
+        owner_pks = pk_set
+    if sender is Venue.amenities.through:
+        versions.bump(venue_ids=owner_pks)
+    else:
+        versions.bump(room_ids=owner_pks)
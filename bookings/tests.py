@@ -1,3 +1,1410 @@
-from django.test import TestCase
+import asyncio
+from datetime import datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.db import connection
+from django.http import QueryDict
+from django.test import AsyncRequestFactory, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.request import Request
+from django.utils import timezone
+
+from accounts.models import CustomUser, WalletTransaction
+from . import (amenity_masks, autocomplete, availability_bitmap, availability_matrix, facets, geo, holds, interval_index, keyset, live,
+               popularity, recurrence, result_cache, schedules, search, venue_stats, versions, views)
+from .api import fieldsets
+from .api.serializers import BookingSerializer, slot_window
+from .models import (Amenity, Booking, Favorite, RecurrenceRule, Review, Room, RoomDayOccupancy, RoomImage, RoomSchedule, RoomVersion,
+                     SlotException, TimeSlot, Venue, VenueCategory, VenueImage, VenueScore)
+
+
+def make_venue(owner, **fields):
+    fields = dict({
+        'name': 'Grand Hall', 'description': 'Hall', 'address': '1 Road', 'city': 'Pune', 'state': 'MH',
+        'postal_code': '411001', 'phone': '1', 'email': 'hall@example.com', 'max_capacity': 100,
+    }, **fields)
+    return Venue.objects.create(owner=owner, **fields)
+
+
+def make_room(venue, **fields):
+    fields = dict({'name': 'Room A', 'description': 'Room', 'capacity': 10, 'price_per_hour': 100}, **fields)
+    return Room.objects.create(venue=venue, **fields)
+
+
+class FixtureMixin:
+    """A customer, a host's venue in a category and one room"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            username='customer', email='customer@example.com', password='pw'
+        )
+        cls.host = CustomUser.objects.create_user(
+            username='host', email='host@example.com', password='pw', user_type='host'
+        )
+        cls.category = VenueCategory.objects.create(name='Conference')
+        cls.venue = make_venue(cls.host, category=cls.category)
+        cls.room = make_room(cls.venue)
+
+    def hours_from_now(self, start, end):
+        base = timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=2)
+        return base + timedelta(hours=start), base + timedelta(hours=end)
+
+    def at(self, days, hour):
+        """Aware local datetime ``days`` from today at ``hour``"""
+        day = timezone.localdate() + timedelta(days=days)
+        return timezone.make_aware(datetime.combine(day, time.min)) + timedelta(hours=hour)
+
+    def book(self, start, end, room=None, user=None, status='confirmed'):
+        return Booking.objects.create(
+            user=user or self.user, room=room or self.room, start_time=start, end_time=end,
+            num_guests=1, status=status, total_price=100
+        )
+
+    def api(self, user=None):
+        client = APIClient()
+        client.force_authenticate(user or self.user)
+        return client
+
+
+class LiveAvailabilityStreamTests(FixtureMixin, TestCase):
+
+    def test_login_required(self):
+        request = AsyncRequestFactory().get('/bookings/live/availability/', {'rooms': self.room.pk})
+        request.user = AnonymousUser()
+
+        async def anonymous():
+            return AnonymousUser()
+        request.auser = anonymous
+        response = asyncio.run(views.availability_stream(request))
+        self.assertEqual(response.status_code, 302)
+
+    def test_wsgi_gets_no_content_instead_of_endless_stream(self):
+        request = RequestFactory().get('/bookings/live/availability/', {'rooms': self.room.pk})
+        request.user = self.user
+
+        async def user():
+            return self.user
+        request.auser = user
+        response = asyncio.run(views.availability_stream(request))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+    def test_asgi_gets_event_stream(self):
+        request = AsyncRequestFactory().get('/bookings/live/availability/', {'rooms': self.room.pk})
+
+        async def user():
+            return self.user
+        request.auser = user
+
+        async def read():
+            response = await views.availability_stream(request)
+            first = await anext(response.streaming_content)
+            await response._iterator.aclose()
+            return response, first
+
+        response, first = asyncio.run(read())
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(first, b'retry: 5000\n\n')
+        self.assertEqual(live.broker.subscriber_count(self.room.pk), 0)
+
+    def test_stream_delivers_published_events_and_unsubscribes(self):
+        start, end = self.hours_from_now(1, 2)
+
+        async def read():
+            frames = live.stream({self.room.pk})
+            await anext(frames)
+            pending = asyncio.ensure_future(anext(frames))
+            await asyncio.sleep(0)
+            live.publish_interval(self.room.pk, start, end, False, 'booking')
+            event = await asyncio.wait_for(pending, 5)
+            self.assertEqual(live.broker.subscriber_count(self.room.pk), 1)
+            await frames.aclose()
+            return event
+
+        event = asyncio.run(read())
+        self.assertIn('event: availability', event)
+        self.assertIn('"available": false', event)
+        self.assertEqual(live.broker.subscriber_count(self.room.pk), 0)
+
+
+class IntervalIndexTests(FixtureMixin, TestCase):
+
+    def setUp(self):
+        interval_index.booking_index.invalidate()
+
+    def test_room_intervals_conflicts(self):
+        base, _ = self.hours_from_now(0, 0)
+        at = lambda hours: base + timedelta(hours=hours)
+        intervals = interval_index.RoomIntervals([(at(0), at(8), 1), (at(2), at(3), 2), (at(5), at(6), 3)])
+        self.assertEqual(intervals.conflicts(at(3), at(4)), [1])
+        self.assertEqual(intervals.conflicts(at(2), at(6)), [1, 2, 3])
+        self.assertEqual(intervals.conflicts(at(8), at(9)), [])
+        intervals.remove(at(0), 1)
+        self.assertEqual(intervals.conflicts(at(3), at(4)), [])
+
+    def test_signals_keep_index_in_sync(self):
+        start, end = self.hours_from_now(1, 3)
+        self.assertTrue(interval_index.is_free(self.room, start, end))
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.book(start, end)
+        self.assertEqual(interval_index.conflicts(self.room, start + timedelta(hours=1), end), [booking.pk])
+        booking.status = 'cancelled'
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        self.assertTrue(interval_index.is_free(self.room, start, end))
+
+    def test_locked_check_sees_bookings_the_index_missed(self):
+        start, end = self.hours_from_now(1, 3)
+        self.assertTrue(interval_index.is_free(self.room, start, end))
+        # Another worker's booking: no signal reaches this process's index
+        Booking.objects.bulk_create([Booking(
+            user=self.user, room=self.room, start_time=start, end_time=end,
+            num_guests=1, status='confirmed', total_price=100
+        )])
+        self.assertTrue(interval_index.is_free(self.room, start, end))
+        self.assertFalse(interval_index.is_free_locked(self.room, start, end))
+        self.assertFalse(interval_index.is_free(self.room, start, end))
+
+    def test_api_rejects_booking_the_stale_index_allows(self):
+        start, end = self.hours_from_now(1, 3)
+        self.assertTrue(interval_index.is_free(self.room, start, end))
+        hold = holds.acquire_hold(self.user, self.room, start, end)
+        # The competing booking commits after the hold check but before the save
+        Booking.objects.bulk_create([Booking(
+            user=self.host, room=self.room, start_time=start, end_time=end,
+            num_guests=1, status='confirmed', total_price=100
+        )])
+        with mock.patch('bookings.holds.acquire_hold', return_value=hold):
+            response = self.api().post('/api/bookings/', {
+                'room': self.room.pk, 'start_time': start.isoformat(), 'end_time': end.isoformat(), 'num_guests': 1
+            }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Booking.objects.filter(room=self.room).count(), 1)
+        self.assertFalse(holds.live_holds(self.room, start, end).exists())
+
+    def test_api_books_free_interval(self):
+        start, end = self.hours_from_now(1, 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api().post('/api/bookings/', {
+                'room': self.room.pk, 'start_time': start.isoformat(), 'end_time': end.isoformat(), 'num_guests': 1
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertFalse(interval_index.is_free(self.room, start, end))
+
+
+class ReservationHoldTests(FixtureMixin, TestCase):
+
+    def setUp(self):
+        interval_index.booking_index.invalidate()
+
+    def test_other_users_hold_blocks(self):
+        start, end = self.hours_from_now(1, 3)
+        holds.acquire_hold(self.host, self.room, start, end)
+        with self.assertRaisesMessage(holds.HoldUnavailable, 'someone else'):
+            holds.acquire_hold(self.user, self.room, start + timedelta(hours=1), end)
+
+    def test_same_users_concurrent_checkout_does_not_replace_hold(self):
+        start, end = self.hours_from_now(1, 3)
+        first = holds.acquire_hold(self.user, self.room, start, end)
+        with self.assertRaises(holds.HoldUnavailable):
+            holds.acquire_hold(self.user, self.room, start, end)
+        self.assertTrue(holds.live_holds(self.room, start, end).filter(pk=first.pk).exists())
+
+    def test_booking_blocks_and_expired_hold_is_ignored(self):
+        start, end = self.hours_from_now(1, 3)
+        expired = holds.acquire_hold(self.host, self.room, start, end)
+        expired.expires_at = timezone.now() - timedelta(minutes=1)
+        expired.save()
+        hold = holds.acquire_hold(self.user, self.room, start, end)
+        holds.release_hold(hold)
+        self.assertEqual(holds.release_expired(), 1)
+
+        self.book(start, end)
+        with self.assertRaisesMessage(holds.HoldUnavailable, 'already booked'):
+            holds.acquire_hold(self.host, self.room, start, end)
+
+    def test_booking_with_hold_id_uses_that_hold(self):
+        start, end = self.hours_from_now(1, 3)
+        client = self.api()
+        response = client.post('/api/holds/', {
+            'room': self.room.pk, 'start_time': start.isoformat(), 'end_time': end.isoformat()
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        payload = {
+            'room': self.room.pk, 'start_time': start.isoformat(), 'end_time': end.isoformat(), 'num_guests': 1
+        }
+
+        # Without the hold id the user's own hold is not silently replaced
+        self.assertEqual(client.post('/api/bookings/', payload, format='json').status_code, 400)
+
+        response = client.post('/api/bookings/', dict(payload, hold=response.data['hold_id']), format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertNotIn('hold', response.data)
+        self.assertFalse(holds.live_holds(self.room, start, end).exists())
+
+    def test_claim_hold_rejects_foreign_or_uncovering_hold(self):
+        start, end = self.hours_from_now(1, 3)
+        hold = holds.acquire_hold(self.host, self.room, start, end)
+        with self.assertRaises(holds.HoldUnavailable):
+            holds.claim_hold(self.user, hold.hold_id, self.room, start, end)
+        with self.assertRaises(holds.HoldUnavailable):
+            holds.claim_hold(self.host, hold.hold_id, self.room, start, end + timedelta(hours=1))
+        self.assertEqual(holds.claim_hold(self.host, hold.hold_id, self.room, start, end), hold)
+
+
+class SlotWindowTests(FixtureMixin, TestCase):
+
+    def window(self, **params):
+        return slot_window(Request(APIRequestFactory().get('/', params)))
+
+    def test_date_only_slots_to_includes_that_day(self):
+        day = timezone.localdate() + timedelta(days=2)
+        start, end = self.window(slots_from=day.isoformat(), slots_to=day.isoformat())
+        self.assertEqual(start, timezone.make_aware(datetime.combine(day, time.min)))
+        self.assertEqual(end - start, timedelta(days=1))
+
+    def test_datetime_slots_to_is_exact_and_window_is_capped(self):
+        start, end = self.window(slots_from='2026-11-01T08:00:00', slots_to='2026-11-01T12:00:00')
+        self.assertEqual(end - start, timedelta(hours=4))
+        start, end = self.window(slots_from='2026-11-01', slots_to='2027-06-01')
+        self.assertEqual(end - start, timedelta(days=31))
+        with self.assertRaises(ValidationError):
+            self.window(slots_from='2026-11-01T08:00:00', slots_to='2026-11-01T08:00:00')
+        with self.assertRaises(ValidationError):
+            self.window(slots_to='tomorrow')
+
+    def test_room_payload_holds_slots_of_the_requested_day(self):
+        day = timezone.localdate() + timedelta(days=2)
+        midnight = timezone.make_aware(datetime.combine(day, time.min))
+        for hours in (9, 15, 24 + 9):
+            TimeSlot.objects.create(
+                room=self.room, start_time=midnight + timedelta(hours=hours),
+                end_time=midnight + timedelta(hours=hours + 1)
+            )
+        response = self.api().get(f'/api/rooms/{self.room.pk}/', {
+            'slots_from': day.isoformat(), 'slots_to': day.isoformat(), 'fields': 'id,time_slots'
+        })
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.data['time_slots']), 2)
+
+
+class ConditionalResponseTests(FixtureMixin, TestCase):
+
+    def setUp(self):
+        versions.advance([self.venue.pk], [self.room.pk])
+
+    def get_venue(self, **headers):
+        return self.api().get(f'/api/venues/{self.venue.pk}/', headers=headers)
+
+    def test_unchanged_venue_answers_304(self):
+        response = self.get_venue()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'] and response['Last-Modified'])
+        self.assertEqual(self.get_venue(if_none_match=response['ETag']).status_code, 304)
+        self.assertEqual(self.get_venue(if_modified_since=response['Last-Modified']).status_code, 304)
+
+    def test_room_write_changes_venue_etag(self):
+        tag = self.get_venue()['ETag']
+        self.room.name = 'Room B'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.save()
+        response = self.get_venue(if_none_match=tag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], tag)
+
+    def test_owner_rename_changes_venue_etag(self):
+        tag = self.get_venue()['ETag']
+        self.host.username = 'renamed-host'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.host.save()
+        response = self.get_venue(if_none_match=tag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['owner']['username'], 'renamed-host')
+
+    def test_reviewer_rename_changes_venue_etag(self):
+        Review.objects.create(user=self.user, venue=self.venue, rating=4, comment='Nice')
+        versions.advance([self.venue.pk], [])
+        tag = self.get_venue()['ETag']
+        self.user.first_name = 'Asha'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertNotEqual(self.get_venue()['ETag'], tag)
+
+    def test_unrelated_user_writes_keep_etag(self):
+        tag = self.get_venue()['ETag']
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.host.last_login = timezone.now()
+            self.host.save(update_fields=['last_login'])
+            self.host.save()
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.get_venue(if_none_match=tag).status_code, 304)
+
+    def test_booking_page_bumps_only_when_it_creates_slots(self):
+        self.client.force_login(self.user)
+        url = f'/bookings/rooms/{self.room.pk}/book/'
+        version = RoomVersion.objects.get(room=self.room).version
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertTrue(TimeSlot.objects.filter(room=self.room).exists())
+        self.assertEqual(RoomVersion.objects.get(room=self.room).version, version + 1)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(callbacks, [])
+        self.assertEqual(RoomVersion.objects.get(room=self.room).version, version + 1)
+
+
+class OccupancyTests(FixtureMixin, TestCase):
+
+    def booked_minutes(self, days):
+        day = timezone.localdate() + timedelta(days=days)
+        return RoomDayOccupancy.objects.get(room=self.room, date=day).booked_minutes
+
+    def test_booking_fills_its_day(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.at(2, 10), self.at(2, 12))
+        self.assertEqual(self.booked_minutes(2), 120)
+
+    def test_moved_booking_refreshes_the_day_it_left(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.book(self.at(2, 10), self.at(2, 12))
+        booking.start_time, booking.end_time = self.at(3, 10), self.at(3, 11)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        self.assertEqual(self.booked_minutes(2), 0)
+        self.assertEqual(self.booked_minutes(3), 60)
+
+    def test_reloaded_booking_moved_then_deleted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.at(2, 10), self.at(2, 12))
+        booking = Booking.objects.get(room=self.room)
+        booking.start_time, booking.end_time = self.at(4, 10), self.at(4, 12)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.get(pk=booking.pk).delete()
+        self.assertEqual(self.booked_minutes(2), 0)
+        self.assertEqual(self.booked_minutes(4), 0)
+
+    def test_moved_blackout_frees_the_day_it_left(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.at(2, 10), self.at(2, 11))
+            blackout = SlotException.objects.create(room=self.room, start_time=self.at(2, 12), end_time=self.at(2, 14))
+        blocked = RoomDayOccupancy.objects.get(room=self.room, date=timezone.localdate() + timedelta(days=2))
+        blackout.start_time, blackout.end_time = self.at(5, 12), self.at(5, 14)
+        with self.captureOnCommitCallbacks(execute=True):
+            blackout.save()
+        freed = RoomDayOccupancy.objects.get(pk=blocked.pk)
+        self.assertEqual(freed.free_minutes, blocked.free_minutes + 120)
+
+
+class RoomSearchTests(FixtureMixin, TestCase):
+
+    def search(self, start, end, **params):
+        response = self.api().get('/api/availability/search/', dict(
+            params, start=start.isoformat(), end=end.isoformat()
+        ))
+        self.assertEqual(response.status_code, 200, response.content)
+        return [room['id'] for room in response.data['results']], response.data['count']
+
+    def test_free_room_inside_opening_hours_is_found(self):
+        self.assertEqual(self.search(self.at(2, 10), self.at(2, 12)), ([self.room.pk], 1))
+
+    def test_window_outside_opening_hours_is_excluded(self):
+        self.assertEqual(self.search(self.at(2, 22), self.at(2, 23)), ([], 0))
+        self.assertEqual(self.search(self.at(2, 20), self.at(2, 22)), ([], 0))
+
+    def test_room_schedule_overrides_default_hours(self):
+        RoomSchedule.objects.create(room=self.room, opening_time=time(6, 0), closing_time=time(8, 0))
+        self.assertEqual(self.search(self.at(2, 6), self.at(2, 7))[0], [self.room.pk])
+        self.assertEqual(self.search(self.at(2, 10), self.at(2, 11))[0], [])
+
+    def test_schedules_are_checked_in_the_query(self):
+        hotel = make_room(make_venue(self.host, name='Inn', category=VenueCategory.objects.create(name='Hotel')))
+        early = make_room(self.venue, name='Early')
+        RoomSchedule.objects.create(room=early, opening_time=time(6, 0), closing_time=time(12, 0))
+        self.assertEqual(self.search(self.at(2, 15), self.at(3, 11)), ([hotel.pk], 1))
+        # The hotel's overnight stay runs until noon
+        self.assertEqual(self.search(self.at(2, 10), self.at(2, 12)), ([self.room.pk, hotel.pk, early.pk], 3))
+        self.assertEqual(self.search(self.at(2, 13), self.at(2, 14)), ([self.room.pk], 1))
+        for number in range(5):
+            make_room(self.venue, name=f'Extra {number}')
+        with mock.patch.object(schedules, 'get_schedule') as get_schedule:
+            self.assertEqual(self.search(self.at(2, 10), self.at(2, 12))[1], 8)
+        get_schedule.assert_not_called()
+
+    def test_booked_held_and_closed_rooms_are_excluded(self):
+        booked = make_room(self.venue, name='Booked')
+        held = make_room(self.venue, name='Held')
+        closed = make_room(self.venue, name='Closed')
+        start, end = self.at(2, 10), self.at(2, 12)
+        self.book(start, end, room=booked)
+        holds.acquire_hold(self.host, held, start, end)
+        SlotException.objects.create(room=closed, start_time=start, end_time=end)
+        self.assertEqual(self.search(start, end), ([self.room.pk], 1))
+
+    def test_ranked_by_capacity_fit_then_price(self):
+        big = make_room(self.venue, name='Big', capacity=50, price_per_hour=50)
+        cheap = make_room(self.venue, name='Cheap', capacity=10, price_per_hour=50)
+        make_room(self.venue, name='Small', capacity=2)
+        ids, count = self.search(self.at(2, 10), self.at(2, 12), guests=5)
+        self.assertEqual(ids, [cheap.pk, self.room.pk, big.pk])
+
+
+class AmenityBitTests(TestCase):
+
+    def test_new_amenities_take_the_lowest_free_bits(self):
+        wifi = Amenity.objects.create(name='WiFi')
+        parking = Amenity.objects.create(name='Parking')
+        self.assertEqual((wifi.bit, parking.bit), (0, 1))
+        wifi.delete()
+        self.assertEqual(Amenity.objects.create(name='Projector').bit, 0)
+
+    def test_bit_taken_by_a_concurrent_save_is_retried(self):
+        Amenity.objects.create(name='WiFi')
+        # A concurrent save read the same free bits and now loses the race for bit 0
+        with mock.patch.object(amenity_masks, 'next_free_bit', side_effect=[0, 1]):
+            parking = Amenity.objects.create(name='Parking')
+        self.assertEqual(parking.bit, 1)
+        self.assertEqual(Amenity.objects.count(), 2)
+
+    def test_masks_follow_amenity_changes(self):
+        host = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        venue = make_venue(host)
+        wifi, parking, spa = (Amenity.objects.create(name=name) for name in ('WiFi', 'Parking', 'Spa'))
+        mask = lambda: Venue.objects.get(pk=venue.pk).amenity_mask
+
+        venue.amenities.add(wifi, spa)
+        self.assertEqual(mask(), 0b101)
+        venue.amenities.remove(spa)
+        self.assertEqual(mask(), 0b001)
+        wifi.venues.add(make_venue(host, name='Other'))
+        parking.venues.add(venue)
+        self.assertEqual(mask(), 0b011)
+        wifi.delete()
+        self.assertEqual(mask(), 0b010)
+        venue.amenities.clear()
+        self.assertEqual(mask(), 0)
+
+    def test_saving_a_stale_venue_or_room_keeps_the_mask(self):
+        host = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        venue = make_venue(host)
+        room = make_room(venue)
+        wifi = Amenity.objects.create(name='WiFi')
+        stale_venue, stale_room = Venue.objects.get(pk=venue.pk), Room.objects.get(pk=room.pk)
+        venue.amenities.add(wifi)
+        room.amenities.add(wifi)
+
+        stale_venue.name = 'Renamed'
+        stale_venue.save()
+        stale_room.capacity = 20
+        stale_room.save()
+        required = amenity_masks.mask_for([wifi.bit])
+        self.assertEqual(list(Venue.objects.filter(amenity_masks.has_all(required))), [venue])
+        self.assertEqual(list(Room.objects.filter(amenity_masks.has_all(required))), [room])
+        self.assertEqual(Room.objects.get(pk=room.pk).capacity, 20)
+
+    def test_has_all_and_has_any(self):
+        host = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        both, one = make_venue(host, name='Both'), make_venue(host, name='One')
+        wifi, parking = Amenity.objects.create(name='WiFi'), Amenity.objects.create(name='Parking')
+        both.amenities.add(wifi, parking)
+        one.amenities.add(wifi)
+        required = amenity_masks.mask_for([wifi.bit, parking.bit])
+        self.assertEqual(list(Venue.objects.filter(amenity_masks.has_all(required))), [both])
+        self.assertEqual(Venue.objects.filter(amenity_masks.has_any(required)).count(), 2)
+
+    def test_all_bits_taken_leaves_bit_unset(self):
+        Amenity.objects.bulk_create([Amenity(name=f'A{bit}', bit=bit) for bit in range(amenity_masks.MAX_BITS)])
+        self.assertIsNone(Amenity.objects.create(name='Extra').bit)
+        self.assertEqual(amenity_masks.mask_for([0, 2, None]), 0b101)
+
+
+class ResultCacheTests(FixtureMixin, TestCase):
+
+    def setUp(self):
+        result_cache.results.clear()
+
+    def test_ids_are_cached_until_venue_data_changes(self):
+        build = mock.Mock(side_effect=lambda: Venue.objects.order_by('pk'))
+        self.assertEqual(result_cache.venue_ids(('test',), build), (self.venue.pk,))
+        result_cache.venue_ids(('test',), build)
+        self.assertEqual(build.call_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other = make_venue(self.host, name='Other Hall')
+        self.assertEqual(result_cache.venue_ids(('test',), build), (self.venue.pk, other.pk))
+        self.assertEqual(build.call_count, 2)
+
+    def test_lru_is_bounded(self):
+        with self.settings(VENUE_RESULT_CACHE_SIZE=2):
+            for key in range(3):
+                result_cache.cached((key,), lambda: key)
+        self.assertEqual(len(result_cache.results), 2)
+
+    def test_count_matches_rows_when_ids_outlive_their_rows(self):
+        other = make_venue(self.host, name='Other Hall')
+        gone = other.pk + 1000
+        version = result_cache.current_version()
+        venues = result_cache.IdList(Venue.objects.all(), (self.venue.pk, gone, other.pk))
+        self.assertEqual(venues.count(), 2)
+        self.assertEqual(len(venues), 2)
+        self.assertEqual(list(venues), [self.venue, other])
+        self.assertEqual(venues[1], other)
+        self.assertNotEqual(result_cache.current_version(), version)
+
+    def test_rows_deleted_after_counting_are_skipped(self):
+        other = make_venue(self.host, name='Other Hall')
+        venues = result_cache.IdList(Venue.objects.all(), (self.venue.pk, other.pk))
+        self.assertEqual(venues.count(), 2)
+        other.delete()
+        self.assertEqual(venues[0:2], [self.venue])
+        self.assertEqual(venues.count(), 1)
+
+
+class AvailabilityBitmapTests(FixtureMixin, TestCase):
+
+    def test_day_masks_split_at_midnight_and_widen_partial_slots(self):
+        masks = availability_bitmap.day_masks(self.at(2, 23), self.at(3, 1) + timedelta(minutes=5))
+        first, second = sorted(masks)
+        self.assertEqual(masks[first], availability_bitmap.range_mask(92, 96))
+        self.assertEqual(masks[second], availability_bitmap.range_mask(0, 5))
+
+    def test_bytes_round_trip(self):
+        bits = availability_bitmap.range_mask(3, 90)
+        blob = availability_bitmap.to_bytes(bits)
+        self.assertEqual(len(blob), availability_bitmap.BITMAP_BYTES)
+        self.assertEqual(availability_bitmap.to_int(blob), bits)
+
+    def test_set_clear_and_test_ranges(self):
+        availability_bitmap.set_ranges(self.room, [(self.at(2, 9), self.at(2, 12)), (self.at(2, 14), self.at(2, 16))])
+        self.assertTrue(availability_bitmap.test_range(self.room, self.at(2, 9), self.at(2, 12)))
+        self.assertFalse(availability_bitmap.test_range(self.room, self.at(2, 11), self.at(2, 15)))
+        availability_bitmap.clear_range(self.room, self.at(2, 10), self.at(2, 11))
+        self.assertFalse(availability_bitmap.test_range(self.room, self.at(2, 9), self.at(2, 12)))
+        self.assertEqual(
+            availability_bitmap.free_intervals(self.room, self.at(2, 0).date(), self.at(2, 0).date()),
+            [(self.at(2, 9), self.at(2, 10)), (self.at(2, 11), self.at(2, 12)), (self.at(2, 14), self.at(2, 16))]
+        )
+
+    def test_overnight_availability_is_one_interval(self):
+        availability_bitmap.set_range(self.room, self.at(2, 22), self.at(3, 2))
+        self.assertEqual(
+            availability_bitmap.free_intervals(self.room, self.at(2, 0).date(), self.at(3, 0).date()),
+            [(self.at(2, 22), self.at(3, 2))]
+        )
+
+    def test_time_slot_writes_are_mirrored(self):
+        slot = TimeSlot.objects.create(room=self.room, start_time=self.at(2, 9), end_time=self.at(2, 10))
+        self.assertTrue(availability_bitmap.test_range(self.room, self.at(2, 9), self.at(2, 10)))
+        slot.is_available = False
+        slot.save()
+        self.assertFalse(availability_bitmap.test_range(self.room, self.at(2, 9), self.at(2, 10)))
+        slot.is_available = True
+        slot.save()
+        slot.delete()
+        self.assertFalse(availability_bitmap.test_range(self.room, self.at(2, 9), self.at(2, 10)))
+
+
+class VirtualSlotTests(FixtureMixin, TestCase):
+
+    def day(self, days):
+        return timezone.localdate() + timedelta(days=days)
+
+    def test_default_schedule_gives_hourly_slots(self):
+        slots = schedules.virtual_slots(self.room, self.day(2), self.day(2))
+        self.assertEqual(len(slots), 12)
+        self.assertEqual((slots[0].start_time, slots[-1].end_time), (self.at(2, 9), self.at(2, 21)))
+        self.assertIsNone(slots[0].pk)
+
+    def test_category_defaults(self):
+        restaurant = make_room(make_venue(self.host, category=VenueCategory.objects.create(name='Restaurant')))
+        slots = schedules.virtual_slots(restaurant, self.day(2), self.day(2))
+        self.assertEqual([slot.end_time - slot.start_time for slot in slots], [timedelta(hours=2)] * 6)
+
+        hotel = make_room(make_venue(self.host, category=VenueCategory.objects.create(name='Hotel')))
+        [stay] = schedules.virtual_slots(hotel, self.day(2), self.day(2))
+        self.assertEqual((stay.start_time, stay.end_time), (self.at(2, 14), self.at(3, 12)))
+
+    def test_bookings_and_blackouts_mark_slots_taken(self):
+        self.book(self.at(2, 10), self.at(2, 11))
+        SlotException.objects.create(room=self.room, start_time=self.at(2, 15), end_time=self.at(2, 17))
+        free = schedules.virtual_slots(self.room, self.day(2), self.day(2), available_only=True)
+        self.assertEqual(len(free), 12 - 3)
+        self.assertNotIn(self.at(2, 10), [slot.start_time for slot in free])
+
+    def test_is_bookable(self):
+        self.assertTrue(schedules.is_bookable(self.room, self.at(2, 9), self.at(2, 12)))
+        self.assertFalse(schedules.is_bookable(self.room, self.at(2, 20), self.at(2, 22)))
+        self.assertFalse(schedules.is_bookable(self.room, self.at(2, 8), self.at(2, 10)))
+        SlotException.objects.create(room=self.room, start_time=self.at(2, 11), end_time=self.at(2, 12))
+        self.assertFalse(schedules.is_bookable(self.room, self.at(2, 9), self.at(2, 12)))
+
+    def test_booking_page_materializes_nothing(self):
+        self.client.force_login(self.user)
+        with self.settings(VIRTUAL_TIME_SLOTS=True):
+            response = self.client.get(f'/bookings/rooms/{self.room.pk}/book/', {'date': self.day(2).isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['available_slots']), 12)
+        self.assertFalse(TimeSlot.objects.exists())
+
+
+class AvailabilityMatrixTests(FixtureMixin, TestCase):
+
+    def test_busy_matrix_marks_bookings_holds_and_blackouts(self):
+        other = make_room(self.venue, name='Room B')
+        self.book(self.at(2, 1), self.at(2, 2))
+        holds.acquire_hold(self.host, self.room, self.at(2, 4) + timedelta(minutes=30), self.at(2, 5))
+        SlotException.objects.create(room=other, start_time=self.at(2, 0), end_time=self.at(2, 3))
+        busy = availability_matrix.busy_matrix([self.room.pk, other.pk], self.at(2, 0), self.at(2, 6))
+        self.assertEqual(availability_matrix.bit_string(busy[0]), '010010')
+        self.assertEqual(availability_matrix.bit_string(busy[1]), '111000')
+
+    def test_free_runs(self):
+        busy = availability_matrix.busy_matrix([self.room.pk], self.at(2, 0), self.at(2, 4))
+        self.assertEqual(availability_matrix.free_runs(busy[0], self.at(2, 0), 60), [(self.at(2, 0), self.at(2, 4))])
+        self.book(self.at(2, 1), self.at(2, 2))
+        busy = availability_matrix.busy_matrix([self.room.pk], self.at(2, 0), self.at(2, 4))
+        self.assertEqual(
+            availability_matrix.free_runs(busy[0], self.at(2, 0), 60),
+            [(self.at(2, 0), self.at(2, 1)), (self.at(2, 2), self.at(2, 4))]
+        )
+
+    def test_endpoint_layouts(self):
+        day = timezone.localdate() + timedelta(days=2)
+        self.book(self.at(2, 9), self.at(2, 10))
+        params = {'venue': self.venue.pk, 'start_date': day.isoformat(), 'end_date': day.isoformat()}
+        response = self.api().get('/api/availability/matrix/', dict(params, layout='grid'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['rooms'][0]['busy'], '0' * 9 + '1' + '0' * 14)
+        response = self.api().get('/api/availability/matrix/', params)
+        self.assertEqual(len(response.data['rooms'][0]['free']), 2)
+
+    def test_endpoint_validates_parameters(self):
+        self.assertEqual(self.api().get('/api/availability/matrix/', {'rooms': 'x'}).status_code, 400)
+        self.assertEqual(self.api().get('/api/availability/matrix/', {'rooms': self.room.pk, 'bucket': 1}).status_code, 400)
+        self.assertEqual(self.api().get('/api/availability/matrix/', {'rooms': 999999}).status_code, 404)
+
+
+class BatchBookingTests(FixtureMixin, TestCase):
+
+    def setUp(self):
+        interval_index.booking_index.invalidate()
+        self.other = make_room(self.venue, name='Room B')
+
+    def post(self, *items):
+        return self.api().post('/api/bookings/batch/', {'bookings': [
+            {'room': room.pk, 'start_time': start.isoformat(), 'end_time': end.isoformat(), 'num_guests': 2}
+            for room, start, end in items
+        ]}, format='json')
+
+    def balance(self):
+        return CustomUser.objects.get(pk=self.user.pk).wallet_balance
+
+    def test_books_everything_with_a_single_debit(self):
+        balance = self.balance()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post((self.room, self.at(2, 9), self.at(2, 11)), (self.other, self.at(2, 9), self.at(2, 10)))
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(self.balance(), balance - 300)
+        [debit] = WalletTransaction.objects.filter(user=self.user)
+        self.assertEqual(debit.amount, -300)
+        self.assertFalse(interval_index.is_free(self.other, self.at(2, 9), self.at(2, 10)))
+
+    def test_items_overlapping_each_other_are_rejected(self):
+        response = self.post((self.room, self.at(2, 9), self.at(2, 11)), (self.room, self.at(2, 10), self.at(2, 12)))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data['errors']), {0, 1})
+        self.assertFalse(Booking.objects.exists())
+
+    def test_one_taken_interval_fails_the_whole_batch(self):
+        self.book(self.at(2, 10), self.at(2, 11), room=self.other, user=self.host)
+        balance = self.balance()
+        response = self.post((self.room, self.at(2, 9), self.at(2, 11)), (self.other, self.at(2, 9), self.at(2, 12)))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data['errors']), [1])
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(self.balance(), balance)
+
+    def test_blackouts_are_refused(self):
+        SlotException.objects.create(room=self.other, start_time=self.at(2, 10), end_time=self.at(2, 12), reason='Repairs')
+        response = self.post((self.room, self.at(2, 9), self.at(2, 11)), (self.other, self.at(2, 11), self.at(2, 13)))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data['errors']), [1])
+        self.assertFalse(Booking.objects.exists())
+
+    def test_closed_hours_are_refused_with_virtual_slots(self):
+        with self.settings(VIRTUAL_TIME_SLOTS=True):
+            response = self.post((self.room, self.at(2, 20), self.at(2, 22)))
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(list(response.data['errors']), [0])
+            self.assertEqual(self.post((self.room, self.at(2, 19), self.at(2, 21))).status_code, 201)
+
+    def test_other_users_hold_blocks_but_own_hold_is_consumed(self):
+        holds.acquire_hold(self.user, self.room, self.at(2, 9), self.at(2, 11))
+        holds.acquire_hold(self.host, self.other, self.at(2, 9), self.at(2, 10))
+        self.assertEqual(self.post((self.other, self.at(2, 9), self.at(2, 10))).status_code, 400)
+        self.assertEqual(self.post((self.room, self.at(2, 9), self.at(2, 11))).status_code, 201)
+        self.assertFalse(holds.live_holds(self.room, self.at(2, 9), self.at(2, 11)).exists())
+
+    def test_insufficient_balance_books_nothing(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(wallet_balance=150)
+        response = self.post((self.room, self.at(2, 9), self.at(2, 11)))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('wallet', response.data['errors'])
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(WalletTransaction.objects.exists())
+
+
+class RecurrenceTests(FixtureMixin, TestCase):
+
+    def rule(self, **fields):
+        start, end = fields.pop('first', (self.at(2, 10), self.at(2, 11)))
+        return RecurrenceRule(**dict(
+            {'user': self.user, 'room': self.room, 'first_start': start, 'first_end': end, 'num_guests': 2}, **fields
+        ))
+
+    def test_weekly_count_includes_skipped_dates(self):
+        skipped = (timezone.localdate() + timedelta(days=9)).isoformat()
+        starts = [start for start, end in recurrence.occurrences(self.rule(count=4, exceptions=[skipped]))]
+        self.assertEqual(starts, [self.at(2, 10), self.at(16, 10), self.at(23, 10)])
+
+    def test_until_and_interval(self):
+        rule = self.rule(interval=2, until=self.at(30, 0))
+        self.assertEqual([start for start, end in recurrence.occurrences(rule)], [self.at(2, 10), self.at(16, 10)])
+
+    def test_monthly_skips_months_without_the_day(self):
+        first = timezone.make_aware(datetime(2027, 1, 31, 10))
+        rule = self.rule(frequency='monthly', count=3, first=(first, first + timedelta(hours=1)))
+        self.assertEqual(
+            [start.date().isoformat() for start, end in recurrence.occurrences(rule)],
+            ['2027-01-31', '2027-03-31', '2027-05-31']
+        )
+
+    def test_materialize_books_up_to_the_horizon_then_extends(self):
+        rule = self.rule(count=5)
+        rule.save()
+        with self.settings(RECURRING_BOOKING_HORIZON_DAYS=14):
+            created = recurrence.materialize(rule)
+        self.assertEqual(len(created), 2)
+        self.assertEqual(rule.bookings.count(), 2)
+
+        with self.settings(RECURRING_BOOKING_HORIZON_DAYS=40):
+            call_command('materialize_recurring_bookings', stdout=mock.Mock())
+        self.assertEqual(rule.bookings.count(), 5)
+        self.assertEqual(WalletTransaction.objects.filter(user=self.user).count(), 2)
+
+    def test_materialize_skips_taken_occurrences(self):
+        self.book(self.at(9, 10), self.at(9, 11), user=self.host)
+        rule = self.rule(count=3)
+        rule.save()
+        self.assertEqual([booking.start_time for booking in recurrence.materialize(rule)], [self.at(2, 10), self.at(16, 10)])
+
+    def test_materialize_skips_blacked_out_occurrences(self):
+        SlotException.objects.create(room=self.room, start_time=self.at(9, 0), end_time=self.at(10, 0))
+        rule = self.rule(count=3)
+        rule.save()
+        self.assertEqual([booking.start_time for booking in recurrence.materialize(rule)], [self.at(2, 10), self.at(16, 10)])
+
+    def test_api_rejects_series_with_a_taken_first_window(self):
+        self.book(self.at(9, 10), self.at(9, 11), user=self.host)
+        response = self.api().post('/api/recurring-bookings/', {
+            'room': self.room.pk, 'first_start': self.at(2, 10).isoformat(), 'first_end': self.at(2, 11).isoformat(),
+            'count': 3, 'num_guests': 2
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(RecurrenceRule.objects.exists())
+        self.assertEqual(Booking.objects.filter(user=self.user).count(), 0)
+
+
+class SweepAvailabilityTests(FixtureMixin, TestCase):
+
+    def test_mark_slots_sweeps_sorted_blockers(self):
+        at = lambda hour: self.at(2, hour)
+        slots = [(at(hour), at(hour + 1)) for hour in range(9, 14)]
+        marked = schedules._mark_slots(slots, [(at(8), at(10)), (at(11) + timedelta(minutes=30), at(12)), (at(20), at(21))])
+        self.assertEqual([available for start, end, available in marked], [False, True, False, True, True])
+
+    def test_slot_availability_uses_bookings_and_blackouts_once(self):
+        day = timezone.localdate() + timedelta(days=2)
+        self.book(self.at(2, 10), self.at(2, 11))
+        self.book(self.at(3, 9), self.at(3, 10))
+        SlotException.objects.create(room=self.room, start_time=self.at(2, 12), end_time=self.at(2, 13))
+        with self.assertNumQueries(2):
+            marked = schedules.slot_availability(self.room, day, day + timedelta(days=1), time(9), time(14), 60)
+        taken = [start for start, end, available in marked if not available]
+        self.assertEqual(taken, [self.at(2, 10), self.at(2, 12), self.at(3, 9)])
+        self.assertEqual(len(marked), 10)
+
+    def test_available_times_endpoint(self):
+        day = timezone.localdate() + timedelta(days=2)
+        self.book(self.at(2, 10), self.at(2, 12))
+        self.client.force_login(self.user)
+        response = self.client.get(f'/bookings/rooms/{self.room.pk}/available-times/', {
+            'date': day.isoformat(), 'duration': 120
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [slot['start'] for slot in response.json()['slots']],
+            ['13:00', '15:00', '17:00']
+        )
+
+
+class FullTextSearchTests(FixtureMixin, TestCase):
+
+    def search(self, query):
+        return list(search.search_venues(Venue.objects.all(), query))
+
+    def test_prefix_words_all_match_and_name_ranks_first(self):
+        lakeside = make_venue(self.host, name='Lakeside Pavilion', description='Weddings')
+        mentions = make_venue(self.host, name='Garden Room', description='Near the lakeside promenade')
+        self.assertEqual(self.search('lakes'), [lakeside, mentions])
+        self.assertEqual(self.search('lake wedd'), [lakeside])
+        # FTS5 syntax in the query is stripped rather than passed through
+        self.assertEqual(self.search('"lake* ('), [lakeside, mentions])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.assertEqual(self.search('grand'), [self.venue])
+        other = make_venue(self.host, name='Skyline Loft')
+        other.name = 'Harbour Loft'
+        other.save()
+        self.assertEqual(self.search('skyline'), [])
+        self.assertEqual(self.search('harbour'), [other])
+        other.delete()
+        self.assertEqual(self.search('harbour'), [])
+
+    def test_reviews_are_indexed_with_their_venue_name(self):
+        review = Review.objects.create(user=self.user, venue=self.venue, rating=5, comment='Spotless acoustics')
+        self.assertEqual(list(search.search_reviews(Review.objects.all(), 'spotless grand')), [review])
+
+    def test_ranking_is_taken_within_the_other_filters(self):
+        for number in range(3):
+            make_venue(self.host, name=f'Grand Hall {number}', city='Mumbai')
+        nashik = make_venue(self.host, name='Grand Annex', city='Nashik')
+        with mock.patch.object(search, 'max_results', return_value=2):
+            # Matches past the ranked ones are kept, in primary-key order
+            found = self.search('grand')
+            self.assertEqual(len(found), 5)
+            self.assertEqual(found[2:], sorted(found[2:], key=lambda venue: venue.pk))
+            self.assertEqual(list(search.search_venues(Venue.objects.filter(city='Nashik'), 'grand')), [nashik])
+            view = views.VenueSearchView()
+            view.request = RequestFactory().get('/', {'q': 'grand', 'location': 'nashik'})
+            self.assertEqual(list(view.build_queryset()), [nashik])
+
+    def test_reviews_follow_the_reviewer_email(self):
+        review = Review.objects.create(user=self.user, venue=self.venue, rating=5, comment='Great')
+        self.user.email = 'renamed@example.com'
+        self.user.save()
+        self.assertEqual(list(search.search_reviews(Review.objects.all(), 'renamed')), [review])
+        self.assertEqual(list(search.search_reviews(Review.objects.all(), 'customer')), [])
+
+    def test_rebuild_restores_the_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.venue_index.table}")
+        self.assertEqual(self.search('grand'), [])
+        search.venue_index.rebuild(Venue.objects.all())
+        self.assertEqual(self.search('grand'), [self.venue])
+
+    def test_unsupported_backends_fall_back_to_icontains(self):
+        with mock.patch.object(search.SearchIndex, 'supported', return_value=False):
+            self.assertEqual(self.search('gran pune'), [self.venue])
+            self.assertEqual(self.search('mumbai'), [])
+
+    def test_api_search_parameter(self):
+        make_venue(self.host, name='Skyline Loft')
+        response = self.api().get('/api/venues/', {'search': 'skyline', 'fields': 'name'})
+        self.assertEqual([venue['name'] for venue in response.data['results']], ['Skyline Loft'])
+
+
+class GeoSearchTests(FixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Venue.objects.filter(pk=cls.venue.pk).delete()
+        cls.pune = make_venue(cls.host, name='Pune Hall', latitude='18.520400', longitude='73.856700')
+        cls.lonavala = make_venue(cls.host, name='Lonavala Hall', latitude='18.754600', longitude='73.406200')
+        cls.mumbai = make_venue(cls.host, name='Mumbai Hall', latitude='19.076000', longitude='72.877700')
+        cls.unplaced = make_venue(cls.host, name='Unplaced Hall')
+
+    def test_encode_and_haversine(self):
+        self.assertEqual(geo.encode(42.6, -5.6, 5), 'ezs42')
+        self.assertEqual(len(self.pune.geohash), geo.PRECISION)
+        self.assertIsNone(self.unplaced.geohash)
+        self.assertAlmostEqual(geo.haversine(18.5204, 73.8567, 19.0760, 72.8777), 120, delta=5)
+
+    def test_prefix_ranges_use_geohash_characters(self):
+        self.assertEqual(geo.next_prefix('tek'), 'tem')
+        self.assertEqual(geo.next_prefix('te9'), 'teb')
+        self.assertEqual(geo.next_prefix('tez'), 'tf')
+        self.assertIsNone(geo.next_prefix('zz'))
+        cell = self.pune.geohash[:4]
+        self.assertEqual(list(Venue.objects.filter(geo.prefix_filter([cell]))), [self.pune])
+        self.assertEqual(Venue.objects.filter(geo.prefix_filter(['zz'])).count(), 0)
+
+    def test_geohash_follows_moves(self):
+        self.pune.latitude, self.pune.longitude = self.mumbai.latitude, self.mumbai.longitude
+        self.pune.save()
+        self.assertEqual(Venue.objects.get(pk=self.pune.pk).geohash, self.mumbai.geohash)
+
+    def test_within_radius_nearest_first(self):
+        venues = list(geo.near(Venue.objects.all(), 18.52, 73.85, radius_km=80))
+        self.assertEqual(venues, [self.pune, self.lonavala])
+        self.assertLess(venues[0].distance_km, 1)
+
+    def test_nearest_k_widens_until_found(self):
+        self.assertEqual(list(geo.near(Venue.objects.all(), 19.07, 72.87, k=2)), [self.mumbai, self.lonavala])
+        self.assertEqual(list(geo.near(Venue.objects.all(), 19.07, 72.87, k=2, radius_km=10)), [self.mumbai])
+
+    def test_api_near_me(self):
+        response = self.api().get('/api/venues/', {'lat': 18.52, 'lng': 73.85, 'radius': 80})
+        self.assertEqual([venue['name'] for venue in response.data['results']], ['Pune Hall', 'Lonavala Hall'])
+        self.assertEqual(self.api().get('/api/venues/', {'lat': 95, 'lng': 0}).status_code, 400)
+
+
+class FacetTests(FixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        wifi = Amenity.objects.create(name='WiFi')
+        parking = Amenity.objects.create(name='Parking')
+        cls.hotel = make_venue(cls.host, name='Hotel Blue', max_capacity=30,
+                               category=VenueCategory.objects.create(name='Hotel'))
+        make_room(cls.hotel, price_per_hour=1500)
+        cls.hotel.amenities.add(wifi)
+        cls.restaurant = make_venue(cls.host, name='Spice Restaurant', max_capacity=200,
+                                    category=VenueCategory.objects.create(name='Restaurant'))
+        make_room(cls.restaurant, price_per_hour=6000)
+        cls.restaurant.amenities.add(wifi, parking)
+
+    def counts(self, query=''):
+        return facets.facet_counts(QueryDict(query))
+
+    def test_counts_for_every_option_in_one_aggregate(self):
+        with self.assertNumQueries(2):
+            counts = self.counts()
+        self.assertEqual(counts['type'], {'hotel': 1, 'restaurant': 1, 'event_space': 0})
+        self.assertEqual((counts['amenities']['wifi'], counts['amenities']['parking'], counts['amenities']['spa']), (2, 1, 0))
+        self.assertEqual(counts['price_range'], {'0-1000': 1, '1000-2000': 1, '2000-5000': 0, '5000+': 1})
+        self.assertEqual(counts['capacity']['11-50'], 1)
+
+    def test_counts_apply_other_groups_but_not_their_own(self):
+        counts = self.counts('type=hotel')
+        self.assertEqual(counts['type'], {'hotel': 1, 'restaurant': 1, 'event_space': 0})
+        self.assertEqual(counts['price_range']['5000+'], 0)
+        self.assertEqual(counts['amenities']['wifi'], 1)
+
+    def test_amenity_counts_keep_other_picked_amenities(self):
+        counts = self.counts('amenities=parking')
+        self.assertEqual(counts['amenities']['wifi'], 1)
+        self.assertEqual(counts['type']['hotel'], 0)
+
+    def test_filter_and_normalize(self):
+        params = QueryDict('amenities=WiFi&amenities=parking&price_range=bogus')
+        self.assertEqual(list(facets.filter_venues(Venue.objects.all(), params)), [self.restaurant])
+        self.assertEqual(facets.normalized(params), (('amenities', ('parking', 'wifi')),))
+        self.assertEqual(facets.sort_option(QueryDict('sort=nonsense')), facets.DEFAULT_SORT)
+
+    def test_venue_list_page(self):
+        response = self.client.get('/bookings/venues/', {'type': 'hotel'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['venue_list']), [self.hotel])
+        hotel_option = next(option for option in response.context['facets']['type'] if option['value'] == 'hotel')
+        self.assertEqual((hotel_option['count'], hotel_option['selected']), (1, True))
+
+
+class VenueRoomStatsTests(FixtureMixin, TestCase):
+
+    def stats(self):
+        return Venue.objects.values_list(
+            'min_price_per_hour', 'max_price_per_hour', 'active_room_count', 'max_room_capacity'
+        ).get(pk=self.venue.pk)
+
+    def test_room_writes_keep_venue_bounds_current(self):
+        self.assertEqual(self.stats(), (100, 100, 1, 10))
+        big = make_room(self.venue, name='Big', capacity=40, price_per_hour=250)
+        self.assertEqual(self.stats(), (100, 250, 2, 40))
+        big.is_active = False
+        big.save()
+        self.assertEqual(self.stats(), (100, 100, 1, 10))
+        self.room.delete()
+        self.assertEqual(self.stats(), (None, None, 0, 0))
+
+    def test_saving_a_stale_venue_keeps_the_bounds(self):
+        stale = Venue.objects.get(pk=self.venue.pk)
+        make_room(self.venue, name='Big', capacity=40, price_per_hour=250)
+        stale.description = 'Edited'
+        stale.save()
+        self.assertEqual(self.stats(), (100, 250, 2, 40))
+
+    def test_price_filter_and_ordering_use_the_stored_bounds(self):
+        cheap = make_venue(self.host, name='Cheap Hall')
+        make_room(cheap, price_per_hour=40)
+        response = self.api().get('/api/venues/', {'ordering': 'min_price_per_hour', 'fields': 'name'})
+        self.assertEqual([venue['name'] for venue in response.data['results']], ['Cheap Hall', 'Grand Hall'])
+        self.assertEqual(set(facets.filter_venues(Venue.objects.all(), QueryDict('price_range=0-1000'))), {self.venue, cheap})
+        self.assertFalse(facets.filter_venues(Venue.objects.all(), QueryDict('price_range=1000-2000')).exists())
+
+    def test_refresh_command_repairs_bulk_updates(self):
+        Room.objects.filter(pk=self.room.pk).update(price_per_hour=900)
+        self.assertEqual(self.stats()[0], 100)
+        call_command('refresh_venue_stats', stdout=mock.Mock())
+        self.assertEqual(self.stats(), (900, 900, 1, 10))
+
+
+class RatingAggregateTests(FixtureMixin, TestCase):
+
+    def ratings(self, venue=None):
+        return Venue.objects.values_list('rating_count', 'rating_avg', 'rating_5_count', 'rating_3_count').get(
+            pk=(venue or self.venue).pk
+        )
+
+    def test_reviews_update_aggregates_incrementally(self):
+        review = Review.objects.create(user=self.user, venue=self.venue, rating=5, comment='Great')
+        Review.objects.create(user=self.host, venue=self.venue, rating=3, comment='Fine')
+        self.assertEqual(self.ratings(), (2, 4.0, 1, 1))
+
+        review.rating = 3
+        review.save()
+        self.assertEqual(self.ratings(), (2, 3.0, 0, 2))
+
+        review.delete()
+        self.assertEqual(self.ratings(), (1, 3.0, 0, 1))
+
+    def test_review_moved_to_another_venue(self):
+        other = make_venue(self.host, name='Other Hall')
+        review = Review.objects.create(user=self.user, venue=self.venue, rating=5, comment='Great')
+        review.venue = other
+        review.save()
+        self.assertEqual(self.ratings(), (0, 0.0, 0, 0))
+        self.assertEqual(self.ratings(other), (1, 5.0, 1, 0))
+
+    def test_saving_a_stale_venue_keeps_the_aggregates(self):
+        stale = Venue.objects.get(pk=self.venue.pk)
+        Review.objects.create(user=self.user, venue=self.venue, rating=5, comment='Great')
+        stale.name = 'Renamed Hall'
+        stale.save()
+        self.assertEqual(self.ratings(), (1, 5.0, 1, 0))
+        self.assertEqual(Venue.objects.get(pk=self.venue.pk).name, 'Renamed Hall')
+
+    def test_reconcile_command_repairs_drift(self):
+        Review.objects.create(user=self.user, venue=self.venue, rating=5, comment='Great')
+        Venue.objects.filter(pk=self.venue.pk).update(rating_count=7, rating_avg=1.5, rating_5_count=0)
+        call_command('reconcile_venue_ratings', stdout=mock.Mock())
+        self.assertEqual(self.ratings(), (1, 5.0, 1, 0))
+
+
+class KeysetPaginationTests(FixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Repeated names make the primary key tiebreaker matter
+        for index in range(11):
+            make_venue(cls.host, name=f'Hall {index % 4}')
+
+    def test_keyset_ordering(self):
+        self.assertEqual(keyset.keyset_ordering(Venue.objects.order_by('name')), ('name', 'id'))
+        self.assertEqual(keyset.keyset_ordering(Venue.objects.order_by('-created_at')), ('-created_at', '-id'))
+        self.assertIsNone(keyset.keyset_ordering(Venue.objects.order_by('owner__username')))
+        self.assertIsNone(keyset.keyset_ordering(Venue.objects.order_by('latitude')))
+
+    def test_pages_walk_forwards_and_back_without_gaps(self):
+        queryset = Venue.objects.order_by('name')
+        expected = list(queryset.order_by('name', 'id'))
+        pages, cursor = [], None
+        while True:
+            page = keyset.paginate(queryset, cursor, page_size=5)
+            pages.append(page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+        self.assertEqual([venue for page in pages for venue in page], expected)
+        self.assertFalse(pages[0].has_previous())
+
+        back = keyset.paginate(queryset, pages[-1].previous_cursor, page_size=5)
+        self.assertEqual(list(back), list(pages[1]))
+
+    def test_bad_cursors(self):
+        with self.assertRaises(keyset.InvalidCursor):
+            keyset.paginate(Venue.objects.order_by('name'), 'garbage', page_size=5)
+        cursor = keyset.paginate(Venue.objects.order_by('name'), page_size=5).next_cursor
+        with self.assertRaises(keyset.InvalidCursor):
+            keyset.paginate(Venue.objects.order_by('-created_at'), cursor, page_size=5)
+
+    def test_api_cursor_links(self):
+        client = self.api()
+        first = client.get('/api/venues/', {'ordering': 'name', 'page_size': 5, 'fields': 'id'})
+        self.assertEqual(first.data['count'], 12)
+        self.assertIsNone(first.data['previous'])
+        second = client.get(first.data['next'])
+        self.assertEqual(len(second.data['results']), 5)
+        self.assertFalse({v['id'] for v in first.data['results']} & {v['id'] for v in second.data['results']})
+
+        self.assertNotIn('count', client.get('/api/venues/', {'count': 'false'}).data)
+        self.assertEqual(client.get('/api/venues/', {'cursor': 'garbage'}).status_code, 404)
+
+
+class AutocompleteTests(FixtureMixin, TestCase):
+
+    def setUp(self):
+        autocomplete.index.loaded_at = None
+
+    def labels(self, prefix, **kwargs):
+        return [(entry['type'], entry['label']) for entry in autocomplete.complete(prefix, **kwargs)]
+
+    def test_prefix_of_any_word_and_accents(self):
+        make_venue(self.host, name='Café Rouge', city='Mumbai')
+        self.assertEqual(self.labels('hall'), [('venue', 'Grand Hall')])
+        self.assertEqual(self.labels('cafe'), [('venue', 'Café Rouge')])
+        self.assertEqual(self.labels('MUM'), [('city', 'Mumbai')])
+        self.assertEqual(self.labels(''), [])
+
+    def test_ranking_and_kinds(self):
+        make_venue(self.host, name='Punekar Lounge')
+        make_venue(self.host, name='The Pune Club')
+        self.assertEqual(self.labels('pune'), [
+            ('city', 'Pune'), ('venue', 'Punekar Lounge'), ('venue', 'The Pune Club')
+        ])
+        self.assertEqual(self.labels('pune', kinds=['venue'], limit=1), [('venue', 'Punekar Lounge')])
+        self.assertEqual(autocomplete.complete('pune')[0]['count'], 3)
+        self.assertEqual(self.labels('maha'), [('state', 'Maharashtra')])
+        self.assertEqual(self.labels('conf'), [('category', 'Conference')])
+
+    def test_index_follows_committed_changes_without_queries(self):
+        self.labels('x')
+        with self.captureOnCommitCallbacks(execute=True):
+            venue = make_venue(self.host, name='Skyline Loft', city='Nashik')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.labels('sky'), [('venue', 'Skyline Loft')])
+        venue.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            venue.save()
+        self.assertEqual(self.labels('nash'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+        self.assertEqual(self.labels('conf'), [])
+
+    def test_other_kinds_do_not_use_up_the_scan(self):
+        make_venue(self.host, name='Surat Hall', city='Surat')
+        for name in ('Sapphire Room', 'Sky Deck', 'Studio Nine'):
+            make_venue(self.host, name=name)
+        with mock.patch.object(autocomplete, 'SCAN_LIMIT', 2):
+            self.assertEqual(self.labels('s', kinds=['city']), [('city', 'Surat')])
+            self.assertEqual(len(self.labels('s', kinds=['venue'])), 2)
+
+    def test_stale_index_reloads_in_the_background(self):
+        self.labels('x')
+        Venue.objects.filter(pk=self.venue.pk).update(name='Harbour Hall')
+        autocomplete.index.loaded_at -= autocomplete.refresh_seconds() + 1
+        with mock.patch.object(autocomplete.threading, 'Thread') as thread, self.assertNumQueries(0):
+            self.assertEqual(self.labels('harb'), [])
+            self.labels('harb')
+        thread.assert_called_once()
+        # Run the reload here, keeping the test's connection open
+        with mock.patch.object(autocomplete, 'connections'):
+            thread.call_args.kwargs['target']()
+        self.assertEqual(self.labels('harb'), [('venue', 'Harbour Hall')])
+
+    def test_api(self):
+        response = APIClient().get('/api/autocomplete/', {'q': 'gra', 'types': 'venue'})
+        self.assertEqual([entry['label'] for entry in response.data['results']], ['Grand Hall'])
+        self.assertEqual(APIClient().get('/api/autocomplete/', {'q': 'gra', 'types': 'planet'}).status_code, 400)
+
+
+class PopularityTests(FixtureMixin, TestCase):
+
+    def score(self, venue=None):
+        return VenueScore.objects.get(venue=venue or self.venue)
+
+    def test_events_add_weighted_counters(self):
+        self.assertEqual(self.score().score, 0)
+        start, end = self.hours_from_now(10, 12)
+        booking = self.book(start, end)
+        Favorite.objects.create(user=self.user, venue=self.venue)
+        Review.objects.create(user=self.user, venue=self.venue, rating=4, comment='Good')
+        score = self.score()
+        self.assertAlmostEqual(score.bookings, 1, places=3)
+        self.assertAlmostEqual(score.favorites, 1, places=3)
+        self.assertAlmostEqual(score.reviews, 0.8, places=3)
+        self.assertAlmostEqual(score.score, 3 + 2 + 0.8, places=3)
+
+        booking.status = 'cancelled'
+        booking.save()
+        Favorite.objects.filter(venue=self.venue).delete()
+        score = self.score()
+        self.assertAlmostEqual(score.bookings, 0, places=3)
+        self.assertAlmostEqual(score.favorites, 0, places=3)
+        self.assertAlmostEqual(score.score, 0.8, places=3)
+
+    def test_undoing_an_old_event_takes_back_its_decayed_weight(self):
+        past = timezone.now() - timedelta(days=14)
+        popularity.record([(self.venue.pk, 'favorites', 1, past), (self.venue.pk, 'favorites', 1, None)])
+        self.assertAlmostEqual(self.score().favorites, 1.5, places=3)
+        popularity.record([(self.venue.pk, 'favorites', -1, past)])
+        self.assertAlmostEqual(self.score().favorites, 1, places=3)
+        popularity.record([(self.venue.pk, 'favorites', -5, None)])
+        self.assertEqual(self.score().favorites, 0)
+
+    def test_decay_command_halves_scores_after_a_half_life(self):
+        popularity.record([(self.venue.pk, 'bookings', 1, None)])
+        VenueScore.objects.filter(venue=self.venue).update(decayed_at=timezone.now() - timedelta(days=14))
+        call_command('decay_venue_scores', stdout=mock.Mock())
+        self.assertAlmostEqual(self.score().score, 1.5, places=3)
+
+    def test_decay_walks_every_row_in_locked_batches(self):
+        venues = [self.venue] + [make_venue(self.host, name=f'Hall {number}') for number in range(4)]
+        popularity.record([(venue.pk, 'favorites', 1, None) for venue in venues])
+        later = timezone.now() + timedelta(days=14)
+        with mock.patch.object(VenueScore.objects, 'select_for_update', wraps=VenueScore.objects.select_for_update) as lock:
+            self.assertEqual(popularity.decay_all(batch_size=2, now=later), 5)
+        self.assertEqual(lock.call_count, 4)
+        for score in VenueScore.objects.all():
+            self.assertAlmostEqual(score.score, 1, places=3)
+            self.assertEqual(score.decayed_at, later)
+
+    def test_rebuild_matches_incremental_scores(self):
+        start, end = self.hours_from_now(10, 12)
+        self.book(start, end)
+        self.book(start, end, status='cancelled')
+        Review.objects.create(user=self.user, venue=self.venue, rating=5, comment='Great')
+        expected = self.score().score
+        VenueScore.objects.update(bookings=0, reviews=0, score=0)
+        call_command('decay_venue_scores', '--rebuild', stdout=mock.Mock())
+        self.assertAlmostEqual(self.score().score, expected, places=3)
+
+    def test_api_orders_by_score(self):
+        busy = make_venue(self.host, name='Busy Hall')
+        Favorite.objects.create(user=self.user, venue=busy)
+        response = APIClient().get('/api/venues/', {'ordering': '-popularity__score'})
+        self.assertEqual([venue['name'] for venue in response.data['results']][:2], ['Busy Hall', 'Grand Hall'])
+
+
+class PrimaryImageTests(FixtureMixin, TestCase):
+
+    def primary(self, owner):
+        return type(owner).objects.values_list('primary_image', flat=True).get(pk=owner.pk)
+
+    def test_image_signals_keep_primary_image_current(self):
+        self.assertEqual(self.primary(self.venue), '')
+        oldest = VenueImage.objects.create(venue=self.venue, image='venue_images/front.jpg')
+        VenueImage.objects.create(venue=self.venue, image='venue_images/side.jpg')
+        self.assertEqual(self.primary(self.venue), 'venue_images/front.jpg')
+
+        chosen = VenueImage.objects.create(venue=self.venue, image='venue_images/hall.jpg', is_primary=True)
+        self.assertEqual(self.primary(self.venue), 'venue_images/hall.jpg')
+        chosen.delete()
+        oldest.delete()
+        self.assertEqual(self.primary(self.venue), 'venue_images/side.jpg')
+
+        image = RoomImage.objects.create(room=self.room, image='room_images/room.jpg')
+        self.assertEqual(self.primary(self.room), 'room_images/room.jpg')
+        image.delete()
+        self.assertEqual(self.primary(self.room), '')
+
+    def test_saving_a_stale_venue_or_room_keeps_the_image(self):
+        stale_venue, stale_room = Venue.objects.get(pk=self.venue.pk), Room.objects.get(pk=self.room.pk)
+        VenueImage.objects.create(venue=self.venue, image='venue_images/front.jpg')
+        RoomImage.objects.create(room=self.room, image='room_images/room.jpg')
+        stale_venue.save()
+        stale_room.save()
+        self.assertEqual(self.primary(self.venue), 'venue_images/front.jpg')
+        self.assertEqual(self.primary(self.room), 'room_images/room.jpg')
+
+    def test_refresh_repairs_stale_rows(self):
+        VenueImage.objects.create(venue=self.venue, image='venue_images/front.jpg')
+        Venue.objects.filter(pk=self.venue.pk).update(primary_image='')
+        venue_stats.refresh_primary_images(Venue, [self.venue.pk])
+        self.assertEqual(self.primary(self.venue), 'venue_images/front.jpg')
+
+    def test_venue_list_reads_images_without_a_query_per_venue(self):
+        def list_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = APIClient().get('/api/venues/')
+            return response, len(queries)
+
+        VenueImage.objects.create(venue=self.venue, image='venue_images/front.jpg')
+        _, one_venue = list_queries()
+        for name in ('North Hall', 'South Hall', 'East Hall'):
+            VenueImage.objects.create(venue=make_venue(self.host, name=name), image='venue_images/x.jpg')
+        response, four_venues = list_queries()
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertEqual(one_venue, four_venues)
+        images = {venue['name']: venue['primary_image'] for venue in response.data['results']}
+        self.assertTrue(images['Grand Hall'].endswith('venue_images/front.jpg'))
+
+
+class SparseFieldsetTests(FixtureMixin, TestCase):
+
+    def setUp(self):
+        start, end = self.hours_from_now(10, 12)
+        self.booking = self.book(start, end)
+
+    def bookings(self, **params):
+        return self.api().get('/api/bookings/', params)
+
+    def serializer(self, query):
+        request = Request(APIRequestFactory().get('/api/bookings/', query))
+        return BookingSerializer(context={'request': request})
+
+    def test_parse_tree(self):
+        self.assertIsNone(fieldsets.parse_tree(None))
+        self.assertEqual(fieldsets.parse_tree('id, room.name,room.venue.city,'), {
+            'id': {}, 'room': {'name': {}, 'venue': {'city': {}}}
+        })
+
+    def test_fields_keep_only_the_named_fields(self):
+        response = self.bookings(fields='booking_id,room_name')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [{'booking_id': str(self.booking.booking_id), 'room_name': 'Room A'}])
+
+    def test_expand_swaps_the_id_for_the_object(self):
+        self.assertEqual(self.bookings(fields='room').data['results'][0]['room'], self.room.pk)
+        room = self.bookings(fields='room', expand='room').data['results'][0]['room']
+        self.assertEqual((room['id'], room['name']), (self.room.pk, 'Room A'))
+        room = self.bookings(fields='room.name,room.venue.city', expand='room.venue').data['results'][0]['room']
+        self.assertEqual(room, {'name': 'Room A', 'venue': {'city': 'Pune'}})
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.bookings(fields='booking_id,colour')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['fields'], ['Unknown field: colour'])
+        self.assertEqual(self.bookings(fields='room.colour').data['fields'], ['Unknown field: room.colour'])
+        self.assertEqual(self.bookings(expand='user').data['expand'], ['Cannot expand: user'])
+
+    def test_queryset_loads_only_what_is_shown(self):
+        # The primary key, the shown fields, the join to the venue and the default ordering
+        queryset = fieldsets.optimize(Booking.objects.all(), self.serializer({'fields': 'booking_id,venue_name'}))
+        self.assertEqual(queryset.query.select_related, {'room': {'venue': {}}})
+        booking = queryset.get()
+        self.assertEqual(booking.get_deferred_fields(), {
+            field.attname for field in Booking._meta.concrete_fields
+        } - {'id', 'booking_id', 'room_id', 'created_at'})
+        with self.assertNumQueries(0):
+            self.assertEqual(booking.room.venue.name, 'Grand Hall')
+
+    def test_expanded_list_queries_do_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as one:
+            self.bookings(expand='room')
+        start, end = self.hours_from_now(14, 16)
+        self.book(start, end, room=make_room(self.venue, name='Room B'))
+        with CaptureQueriesContext(connection) as two:
+            response = self.bookings(expand='room')
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(len(one), len(two))
+
+    def test_writes_see_the_full_serializer(self):
+        start, end = self.hours_from_now(20, 22)
+        response = self.api().post('/api/bookings/?fields=booking_id', {
+            'room': self.room.pk, 'start_time': start.isoformat(), 'end_time': end.isoformat(), 'num_guests': 2
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertIn('total_price', response.data)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from . import views, host_views
 
@@ -13,6 +14,7 @@ urlpatterns = [
     path('bookings/<uuid:booking_id>/', views.booking_detail, name='booking_detail'),
     path('add-review/<int:venue_id>/', views.add_review, name='add_review'),
     path('rooms/<int:room_id>/book/', views.BookingCreateView.as_view(), name='booking_create'),
+    path('rooms/<int:room_id>/available-times/', views.get_available_times, name='available_times'),
     
     # Host views
     path('host/dashboard/', host_views.host_dashboard, name='host_dashboard'),
@@ -25,4 +27,8 @@ urlpatterns = [
     path('host/venues/<int:venue_id>/rooms/<int:pk>/delete/', host_views.room_delete, name='room_delete'),
     path('host/bookings/', host_views.host_bookings, name='host_bookings'),
     path('host/bookings/<uuid:booking_id>/confirm/', host_views.confirm_booking, name='confirm_booking'),
-] 
\ No newline at end of file
+]
+
+# The stream is only served by ASGI deployments
+if settings.LIVE_AVAILABILITY_ENABLED:
+    urlpatterns.append(path('live/availability/', views.availability_stream, name='availability_stream'))
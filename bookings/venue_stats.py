@@ -0,0 +1,127 @@
+"""
+Denormalized per-venue summaries.
+
+Venue list filters and cards need facts about a venue's rooms (price bounds,
+how many are bookable, the largest one) and reviews (sum, count, average and
+a per-star histogram). Keeping them on the venue row turns those filters and
+sorts into indexed single-table predicates instead of joins over ``rooms`` or
+``reviews``. Room columns are recomputed from the Room signals; review
+columns are adjusted in place with F-expressions from the Review signals.
+Venues and rooms also carry their first image (the primary one, else the
+oldest) in ``primary_image``, refreshed from the image signals, so cards
+and list serializers show it without a query per row.
+``refresh_venue_stats`` and ``reconcile_venue_ratings`` rebuild them.
+Ordinary venue saves leave these columns out (``Venue.MAINTAINED_FIELDS``),
+so an instance loaded before a room or review changed cannot write the old
+values back.
+"""
+
+from django.db.models import Case, Count, F, FloatField, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import Cast
+
+from .models import Review, Room, Venue
+
+
+def room_stats(venue_ids):
+    """{venue_id: field values} computed from active rooms, in one grouped query"""
+    stats = {
+        venue_id: {
+            'min_price_per_hour': None,
+            'max_price_per_hour': None,
+            'active_room_count': 0,
+            'max_room_capacity': 0,
+        }
+        for venue_id in venue_ids
+    }
+    rows = Room.objects.filter(venue_id__in=venue_ids, is_active=True).values('venue_id').annotate(
+        min_price=Min('price_per_hour'),
+        max_price=Max('price_per_hour'),
+        rooms=Count('pk'),
+        capacity=Max('capacity')
+    ).order_by()
+    for row in rows:
+        stats[row['venue_id']] = {
+            'min_price_per_hour': row['min_price'],
+            'max_price_per_hour': row['max_price'],
+            'active_room_count': row['rooms'],
+            'max_room_capacity': row['capacity'] or 0,
+        }
+    return stats
+
+
+def refresh_room_stats(venue_ids):
+    """Recompute the room summary columns for ``venue_ids``"""
+    venue_ids = list(venue_ids)
+    for venue_id, fields in room_stats(venue_ids).items():
+        # update() rather than save() so venue signals and auto_now stay untouched
+        Venue.objects.filter(pk=venue_id).update(**fields)
+
+
+def apply_rating_change(venue_id, removed=None, added=None):
+    """
+    Adjust the review aggregates of one venue in a single UPDATE.
+
+    ``removed`` and ``added`` are star ratings leaving and joining the venue;
+    an edited review passes both. The average is computed in SQL from the
+    pre-update values, so concurrent reviews never overwrite each other.
+    """
+    delta_sum = (added or 0) - (removed or 0)
+    delta_count = (added is not None) - (removed is not None)
+    fields = {}
+    for stars, delta in ((removed, -1), (added, 1)):
+        if stars is not None:
+            column = f'rating_{stars}_count'
+            fields[column] = fields.get(column, F(column)) + delta
+    if not fields and not delta_sum:
+        return
+    new_count = F('rating_count') + delta_count
+    Venue.objects.filter(pk=venue_id).update(
+        rating_sum=F('rating_sum') + delta_sum,
+        rating_count=new_count,
+        rating_avg=Case(
+            When(**{'rating_count__lte': -delta_count}, then=Value(0.0)),
+            default=Cast(F('rating_sum') + delta_sum, FloatField()) / new_count,
+            output_field=FloatField()
+        ),
+        **fields
+    )
+
+
+def reconcile_ratings(venue_ids):
+    """Recompute the review aggregates for ``venue_ids`` from the reviews, in one grouped query"""
+    histogram = {f'rating_{stars}_count': Count('pk', filter=Q(rating=stars)) for stars in range(1, 6)}
+    rows = {
+        row['venue_id']: row
+        for row in Review.objects.filter(venue_id__in=venue_ids).values('venue_id').annotate(
+            total=Sum('rating'),
+            reviews=Count('pk'),
+            **histogram
+        ).order_by()
+    }
+    for venue_id in venue_ids:
+        row = rows.get(venue_id)
+        fields = {column: row[column] if row else 0 for column in histogram}
+        total = row['total'] if row else 0
+        reviews = row['reviews'] if row else 0
+        Venue.objects.filter(pk=venue_id).update(
+            rating_sum=total,
+            rating_count=reviews,
+            rating_avg=total / reviews if reviews else 0,
+            **fields
+        )
+
+
+def first_image(image_model, owner_field, owner_id):
+    """Stored name of an owner's first image in display order, or ''"""
+    return image_model.objects.filter(**{owner_field: owner_id}).order_by(
+        '-is_primary', 'uploaded_at', 'pk'
+    ).values_list('image', flat=True).first() or ''
+
+
+def refresh_primary_images(owner_model, owner_ids):
+    """Recompute ``primary_image`` for venues or rooms from their images"""
+    relation = owner_model._meta.get_field('images')
+    for owner_id in owner_ids:
+        owner_model.objects.filter(pk=owner_id).update(
+            primary_image=first_image(relation.related_model, relation.field.attname, owner_id)
+        )
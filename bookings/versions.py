@@ -0,0 +1,112 @@
+"""
+Change counters and conditional responses for venues and rooms.
+
+Every venue and room has a ``VenueVersion``/``RoomVersion`` row whose
+``version`` goes up on any write that changes what its pages and payloads
+show: the venue or room itself, its images, time slots, schedule and
+blackouts, bookings, reviews, favorites and amenities. A venue's pages list
+its rooms and a room's show its venue, so a change to either moves both.
+Counters advance when the transaction commits, one ``UPDATE`` per table.
+
+``validators`` turns one counter row into a strong ETag (the counter hashed
+with everything else the response varies on) and a Last-Modified time, so
+``If-None-Match``/``If-Modified-Since`` are answered with a 304 from a
+single primary-key lookup, before the object or anything under it is loaded.
+Writes that skip signals (``bulk_create``, ``QuerySet.update``) call ``bump``
+themselves.
+"""
+
+import hashlib
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def _counters():
+    from .models import Room, RoomVersion, Venue, VenueVersion
+
+    return {
+        'venue': (Venue, VenueVersion, 'venue_id'),
+        'room': (Room, RoomVersion, 'room_id'),
+    }
+
+
+def bump(venue_ids=(), room_ids=()):
+    """Give the venues and rooms (with each one's rooms or venue) new versions on commit"""
+    venue_ids = {pk for pk in venue_ids if pk is not None}
+    room_ids = {pk for pk in room_ids if pk is not None}
+    if venue_ids or room_ids:
+        transaction.on_commit(lambda: advance(venue_ids, room_ids))
+
+
+def advance(venue_ids, room_ids):
+    """Increment the counters now"""
+    from .models import Room
+
+    venue_ids, room_ids = set(venue_ids), set(room_ids)
+    for room_id, venue_id in Room.objects.filter(
+        Q(pk__in=room_ids) | Q(venue_id__in=venue_ids)
+    ).values_list('pk', 'venue_id'):
+        if room_id in room_ids:
+            venue_ids.add(venue_id)
+        else:
+            room_ids.add(room_id)
+
+    now = timezone.now()
+    for kind, ids in (('venue', venue_ids), ('room', room_ids)):
+        if not ids:
+            continue
+        owner_model, counter_model, owner_field = _counters()[kind]
+        counters = counter_model.objects.filter(**{f'{owner_field}__in': ids})
+        if counters.update(version=F('version') + 1, changed_at=now) < len(ids):
+            # New venues and rooms get their first version; deleted ones none
+            missing = ids - set(counters.values_list(owner_field, flat=True))
+            counter_model.objects.bulk_create([
+                counter_model(**{owner_field: pk}, changed_at=now)
+                for pk in owner_model.objects.filter(pk__in=missing).values_list('pk', flat=True)
+            ], ignore_conflicts=True)
+
+
+def etag(*parts):
+    return '"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def validators(kind, pk, variant=(), fresh_from=None):
+    """
+    (ETag, Last-Modified timestamp) of venue or room ``pk`` as rendered for
+    ``variant``, or None if it has no counter.
+
+    ``fresh_from`` is when a time-dependent part of the response (a window
+    that starts now) last moved; Last-Modified is never earlier.
+    """
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    _, counter_model, owner_field = _counters()[kind]
+    row = counter_model.objects.filter(**{owner_field: pk}).values_list('version', 'changed_at').first()
+    if row is None:
+        return None
+    version, changed_at = row
+    last_modified = max(changed_at, fresh_from) if fresh_from else changed_at
+    return etag(kind, pk, version, changed_at, *variant), int(last_modified.timestamp())
+
+
+def set_validators(response, tags):
+    if tags is not None and response.status_code in (200, 304):
+        response.headers['ETag'] = tags[0]
+        response.headers['Last-Modified'] = http_date(tags[1])
+    return response
+
+
+def not_modified(request, tags):
+    """The 304 (or 412) answering ``request``'s conditional headers, or None to render in full"""
+    if tags is None:
+        return None
+    response = get_conditional_response(request, etag=tags[0], last_modified=tags[1])
+    if response is not None:
+        set_validators(response, tags)
+    return response
@@ -1,20 +1,62 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse_lazy, reverse
-from django.http import JsonResponse, HttpResponseRedirect
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, HttpResponseRedirect, StreamingHttpResponse
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Q, Avg, Count, Sum, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
 
 from .models import Venue, Room, Booking, Review, Favorite, TimeSlot, VenueCategory, Amenity
+from .interval_index import is_free, is_free_locked
+from . import availability_bitmap, facets, geo, holds, live, result_cache, schedules, search, versions
 from accounts.models import WalletTransaction
 from payments.models import Transaction
 
 
+def listed_venues(params):
+    """Active venues matching the sidebar filters in the chosen order, via the result cache"""
+    sort = facets.sort_option(params)
+    
+    def build():
+        # Sidebar filters: type, amenities, price range, capacity and rating
+        queryset = facets.filter_venues(Venue.objects.filter(is_active=True), params)
+        return facets.sort_venues(queryset, sort)
+    
+    ids = result_cache.venue_ids(('list', sort) + facets.normalized(params), build)
+    return result_cache.IdList(Venue.objects.all(), ids)
+
+
+def filter_choices():
+    """Cached categories and amenities for the filter forms"""
+    return (
+        result_cache.cached(('categories',), lambda: list(VenueCategory.objects.all())),
+        result_cache.cached(('amenities',), lambda: list(Amenity.objects.all())),
+    )
+
+
+def facet_sidebar(params):
+    """Sidebar options with counts, the counts coming from the result cache"""
+    counts = result_cache.cached(('facets',) + facets.normalized(params), lambda: facets.facet_counts(params))
+    return facets.sidebar(params, counts)
+
+
+def page_validators(request, kind, pk, *variant, fresh_from=None):
+    """ETag and Last-Modified of a detail page, which also shows the signed-in user in the navigation"""
+    if len(messages.get_messages(request)):
+        # A 304 would swallow the pending messages
+        return None
+    user = request.user
+    viewer = (user.pk, user.email, user.user_type, user.wallet_balance) if user.is_authenticated else None
+    return versions.validators(kind, pk, (viewer,) + variant, fresh_from)
+
+
 class VenueListView(ListView):
     model = Venue
     template_name = 'bookings/venue_list.html'
@@ -22,59 +64,11 @@ class VenueListView(ListView):
     paginate_by = 9
     
     def get_queryset(self):
-        queryset = Venue.objects.filter(is_active=True).annotate(avg_rating=Avg('reviews__rating'))
-        
-        # Filter by venue type (restaurant or hotel)
-        venue_type = self.request.GET.get('type')
-        if venue_type:
-            queryset = queryset.filter(category__name__icontains=venue_type)
-            
-        # Filter by amenities
-        amenities = self.request.GET.getlist('amenities')
-        if amenities:
-            for amenity in amenities:
-                queryset = queryset.filter(amenities__name__icontains=amenity)
-            
-        # Filter by price range
-        price_range = self.request.GET.get('price_range')
-        if price_range:
-            if price_range == '0-1000':
-                queryset = queryset.filter(rooms__price_per_hour__lte=1000)
-            elif price_range == '1000-2000':
-                queryset = queryset.filter(rooms__price_per_hour__gte=1000, rooms__price_per_hour__lte=2000)
-            elif price_range == '2000-5000':
-                queryset = queryset.filter(rooms__price_per_hour__gte=2000, rooms__price_per_hour__lte=5000)
-            elif price_range == '5000+':
-                queryset = queryset.filter(rooms__price_per_hour__gte=5000)
-        
-        # Filter by capacity
-        capacity = self.request.GET.get('capacity')
-        if capacity:
-            if capacity == '1-10':
-                queryset = queryset.filter(max_capacity__lte=10)
-            elif capacity == '11-50':
-                queryset = queryset.filter(max_capacity__gte=11, max_capacity__lte=50)
-            elif capacity == '51-100':
-                queryset = queryset.filter(max_capacity__gte=51, max_capacity__lte=100)
-            elif capacity == '100+':
-                queryset = queryset.filter(max_capacity__gte=100)
-            
-        # Filter by rating
-        rating = self.request.GET.get('rating')
-        if rating:
-            if rating == '4+':
-                queryset = queryset.filter(avg_rating__gte=4)
-            elif rating == '3+':
-                queryset = queryset.filter(avg_rating__gte=3)
-            elif rating == '2+':
-                queryset = queryset.filter(avg_rating__gte=2)
-            
-        return queryset.distinct()
+        return listed_venues(self.request.GET)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = VenueCategory.objects.all()
-        context['amenities'] = Amenity.objects.all()
+        context['categories'], context['amenities'] = filter_choices()
         
         # Add filters to context
         context['venue_type'] = self.request.GET.get('type', '')
@@ -82,6 +76,10 @@ class VenueListView(ListView):
         context['price_range'] = self.request.GET.get('price_range', '')
         context['capacity'] = self.request.GET.get('capacity', '')
         context['rating'] = self.request.GET.get('rating', '')
+        context['sort'] = self.request.GET.get('sort', '')
+        
+        # Counts for every filter option, from one query or the result cache
+        context['facets'] = facet_sidebar(self.request.GET)
         
         return context
 
@@ -100,7 +98,7 @@ class VenueDetailView(DetailView):
         
         # Get reviews for this venue
         context['reviews'] = venue.reviews.all().order_by('-created_at')[:5]
-        context['review_count'] = venue.reviews.count()
+        context['review_count'] = venue.rating_count
         
         # Check if user has favorited this venue
         if self.request.user.is_authenticated:
@@ -119,7 +117,38 @@ class VenueSearchView(ListView):
     paginate_by = 9
     
     def get_queryset(self):
-        queryset = Venue.objects.filter(is_active=True).annotate(avg_rating=Avg('reviews__rating'))
+        # Distance-ranked searches are per user and not worth caching
+        near = self.near_point()
+        if near is None:
+            ids = result_cache.venue_ids(self.cache_key(), self.build_queryset)
+            return result_cache.IdList(Venue.objects.all(), ids)
+        return geo.near(self.build_queryset(), *near)
+    
+    def near_point(self):
+        """(lat, lng, radius km) for a valid near-me search, else None"""
+        try:
+            latitude = float(self.request.GET.get('lat', ''))
+            longitude = float(self.request.GET.get('lng', ''))
+            radius = float(self.request.GET.get('radius') or geo.DEFAULT_RADIUS_KM)
+        except ValueError:
+            return None
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return latitude, longitude, radius
+        return None
+    
+    def cache_key(self):
+        params = self.request.GET
+        return (
+            'search',
+            ' '.join(search.tokens(params.get('q'))),
+            (params.get('location') or '').strip().lower(),
+            params.get('category') or '',
+            (params.get('venue_type') or '').lower(),
+            params.get('sort') == 'popularity',
+        )
+    
+    def build_queryset(self):
+        queryset = Venue.objects.filter(is_active=True)
         
         # Filter by location
         location = self.request.GET.get('location')
@@ -140,17 +169,31 @@ class VenueSearchView(ListView):
         if venue_type:
             queryset = queryset.filter(category__name__icontains=venue_type)
         
+        # Full-text search over name, description and address, best matches
+        # first; last, so the ranking sees the other filters
+        q = self.request.GET.get('q')
+        if q:
+            queryset = search.search_venues(queryset, q)
+        
+        # Most popular first instead of by relevance
+        if self.request.GET.get('sort') == 'popularity':
+            queryset = facets.sort_venues(queryset, 'popularity')
+        
         return queryset
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = VenueCategory.objects.all()
-        context['amenities'] = Amenity.objects.all()
+        context['categories'], context['amenities'] = filter_choices()
         
         # Add search parameters to context
+        context['q'] = self.request.GET.get('q', '')
+        context['lat'] = self.request.GET.get('lat', '')
+        context['lng'] = self.request.GET.get('lng', '')
+        context['radius'] = self.request.GET.get('radius', '')
         context['location'] = self.request.GET.get('location', '')
         context['category'] = self.request.GET.get('category', '')
         context['venue_type'] = self.request.GET.get('venue_type', '')
+        context['sort'] = self.request.GET.get('sort', '')
         
         return context
 
@@ -185,11 +228,14 @@ class RoomDetailView(DetailView):
         # Get available time slots for the next 7 days
         today = timezone.now().date()
         next_week = today + timezone.timedelta(days=7)
-        context['time_slots'] = room.time_slots.filter(
-            start_time__date__gte=today,
-            start_time__date__lte=next_week,
-            is_available=True
-        ).order_by('start_time')
+        if schedules.virtual_slots_enabled():
+            context['time_slots'] = schedules.virtual_slots(room, today, next_week, available_only=True)
+        else:
+            context['time_slots'] = room.time_slots.filter(
+                start_time__date__gte=today,
+                start_time__date__lte=next_week,
+                is_available=True
+            ).order_by('start_time')
         
         # Add user wallet balance to context
         if self.request.user.is_authenticated:
@@ -223,10 +269,13 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
         context['is_hotel'] = 'hotel' in venue_category
         context['is_restaurant'] = 'restaurant' in venue_category or 'café' in venue_category or 'cafe' in venue_category
         
+        if settings.LIVE_AVAILABILITY_ENABLED:
+            context['live_availability_url'] = f"{reverse('bookings:availability_stream')}?rooms={room.pk}"
+        
         # Generate available time slots for the next 7 days
         today = timezone.now().date()
-        if not TimeSlot.objects.filter(room=room, start_time__date__gte=today).exists():
-            self.generate_time_slots(room)
+        if not schedules.virtual_slots_enabled() and not TimeSlot.objects.filter(room=room, start_time__date__gte=today).exists():
+            self.generate_time_slots(room, today)
         
         # Get available time slots for today by default
         date_str = self.request.GET.get('date', today.strftime('%Y-%m-%d'))
@@ -236,15 +285,18 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
             selected_date = today
         
         # Get all time slots for the selected date
-        start_of_day = timezone.make_aware(datetime.combine(selected_date, datetime.min.time()))
-        end_of_day = timezone.make_aware(datetime.combine(selected_date, datetime.max.time()))
-        
-        available_slots = TimeSlot.objects.filter(
-            room=room,
-            start_time__gte=start_of_day,
-            start_time__lte=end_of_day,
-            is_available=True
-        ).order_by('start_time')
+        if schedules.virtual_slots_enabled():
+            available_slots = schedules.virtual_slots(room, selected_date, selected_date, available_only=True)
+        else:
+            start_of_day = timezone.make_aware(datetime.combine(selected_date, datetime.min.time()))
+            end_of_day = timezone.make_aware(datetime.combine(selected_date, datetime.max.time()))
+            
+            available_slots = TimeSlot.objects.filter(
+                room=room,
+                start_time__gte=start_of_day,
+                start_time__lte=end_of_day,
+                is_available=True
+            ).order_by('start_time')
         
         # Format slots for template
         context['available_slots'] = [
@@ -259,9 +311,9 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
         
         return context
     
-    def generate_time_slots(self, room):
-        """Generate time slots for the next 7 days"""
-        today = timezone.now().date()
+    def generate_time_slots(self, room, today):
+        """Generate time slots for the next 7 days, unless a concurrent request already has"""
+        slots = []
         for day_offset in range(7):
             current_date = today + timedelta(days=day_offset)
             
@@ -271,12 +323,12 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
                 checkin_time = timezone.make_aware(datetime.combine(current_date, datetime.strptime("14:00", "%H:%M").time()))
                 checkout_time = timezone.make_aware(datetime.combine(current_date + timedelta(days=1), datetime.strptime("12:00", "%H:%M").time()))
                 
-                TimeSlot.objects.create(
+                slots.append(TimeSlot(
                     room=room,
                     start_time=checkin_time,
                     end_time=checkout_time,
                     is_available=True
-                )
+                ))
             
             # For restaurants, create 2-hour slots from 10am to 10pm
             elif 'restaurant' in (room.venue.category.name.lower() if room.venue.category else "") or 'café' in (room.venue.category.name.lower() if room.venue.category else "") or 'cafe' in (room.venue.category.name.lower() if room.venue.category else ""):
@@ -284,12 +336,12 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
                     start_time = timezone.make_aware(datetime.combine(current_date, datetime.strptime(f"{hour}:00", "%H:%M").time()))
                     end_time = start_time + timedelta(hours=2)
                     
-                    TimeSlot.objects.create(
+                    slots.append(TimeSlot(
                         room=room,
                         start_time=start_time,
                         end_time=end_time,
                         is_available=True
-                    )
+                    ))
             
             # For regular venues, create hourly slots from 9am to 9pm
             else:
@@ -297,12 +349,24 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
                     start_time = timezone.make_aware(datetime.combine(current_date, datetime.strptime(f"{hour}:00", "%H:%M").time()))
                     end_time = start_time + timedelta(hours=1)
                     
-                    TimeSlot.objects.create(
+                    slots.append(TimeSlot(
                         room=room,
                         start_time=start_time,
                         end_time=end_time,
                         is_available=True
-                    )
+                    ))
+        
+        with transaction.atomic():
+            # Page views race to fill an empty week; the room lock lets one win
+            Room.objects.select_for_update().filter(pk=room.pk).first()
+            if not slots or TimeSlot.objects.filter(room=room, start_time__date__gte=today).exists():
+                return
+            
+            # bulk_create skips the TimeSlot signals, so update the bitmaps and
+            # version directly; the version only moves when rows were created
+            TimeSlot.objects.bulk_create(slots)
+            availability_bitmap.set_ranges(room, [(slot.start_time, slot.end_time) for slot in slots])
+            versions.bump(room_ids=[room.pk])
     
     def form_valid(self, form):
         room_id = self.kwargs.get('room_id')
@@ -351,18 +415,21 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
                 return self.form_invalid(form)
             
             # Check if the time slot is available (no overlapping bookings)
-            existing_bookings = Booking.objects.filter(
-                room=room,
-                status__in=['pending', 'confirmed'],
-                start_time__lt=end_time,
-                end_time__gt=start_time
-            ).exists()
-            
-            if existing_bookings:
+            if not is_free(room, start_time, end_time):
                 messages.error(self.request, "The selected time slot is already booked by someone else.")
                 return self.form_invalid(form)
             
-            # Check if corresponding TimeSlot objects are available
+            # Check the requested period is offered: by the room schedule in virtual
+            # slot mode, otherwise by the room's availability bitmap
+            if schedules.virtual_slots_enabled():
+                slot_available = schedules.is_bookable(room, start_time, end_time)
+            else:
+                slot_available = availability_bitmap.test_range(room, start_time, end_time)
+            
+            if not slot_available:
+                messages.error(self.request, "The selected time slot is no longer available.")
+                return self.form_invalid(form)
+            
             overlapping_slots = TimeSlot.objects.filter(
                 room=room,
                 start_time__lte=end_time,
@@ -370,32 +437,50 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
                 is_available=True
             )
             
-            if not overlapping_slots.exists():
-                messages.error(self.request, "The selected time slot is no longer available.")
+            # Hold the interval so concurrent checkouts cannot claim it meanwhile
+            try:
+                hold = holds.acquire_hold(self.request.user, room, start_time, end_time)
+            except holds.HoldUnavailable as e:
+                messages.error(self.request, str(e))
                 return self.form_invalid(form)
             
             # Process the payment
-            if self.request.user.deduct_from_wallet(total_price):
-                # Create wallet transaction record
-                WalletTransaction.objects.create(
-                    user=self.request.user,
-                    amount=-Decimal(str(total_price)),
-                    transaction_type='booking',
-                    description=f"Payment for booking at {room.venue.name} - {room.name}",
-                    reference_id=f"BOOK-{timezone.now().strftime('%Y%m%d%H%M%S')}"
-                )
-                
-                # Mark time slots as unavailable
-                overlapping_slots.update(is_available=False)
-                
-                # Set status as confirmed by default (can be changed to pending if needed)
-                form.instance.status = 'confirmed'
+            with transaction.atomic():
+                # The index may not have seen other workers' bookings yet
+                if not is_free_locked(room, start_time, end_time):
+                    holds.release_hold(hold)
+                    messages.error(self.request, "The selected time slot is already booked by someone else.")
+                    return self.form_invalid(form)
                 
-                messages.success(self.request, f"{total_price} coins deducted from your wallet. Booking confirmed!")
-                return super().form_valid(form)
-            else:
-                messages.error(self.request, "Payment failed! Please try again.")
-                return self.form_invalid(form)
+                if self.request.user.deduct_from_wallet(total_price):
+                    # Create wallet transaction record
+                    WalletTransaction.objects.create(
+                        user=self.request.user,
+                        amount=-Decimal(str(total_price)),
+                        transaction_type='booking',
+                        description=f"Payment for booking at {room.venue.name} - {room.name}",
+                        reference_id=f"BOOK-{timezone.now().strftime('%Y%m%d%H%M%S')}"
+                    )
+                    
+                    # Mark time slots as unavailable
+                    slot_ranges = list(overlapping_slots.values_list('start_time', 'end_time'))
+                    overlapping_slots.update(is_available=False)
+                    availability_bitmap.clear_ranges(room, slot_ranges)
+                    versions.bump(room_ids=[room.pk])
+                    
+                    # Set status as confirmed by default (can be changed to pending if needed)
+                    form.instance.status = 'confirmed'
+                    
+                    # The booking now covers the interval, so the hold can go
+                    response = super().form_valid(form)
+                    holds.release_hold(hold)
+                    
+                    messages.success(self.request, f"{total_price} coins deducted from your wallet. Booking confirmed!")
+                    return response
+            
+            holds.release_hold(hold)
+            messages.error(self.request, "Payment failed! Please try again.")
+            return self.form_invalid(form)
                 
         except ValueError:
             messages.error(self.request, "Invalid date or time format.")
@@ -482,7 +567,10 @@ def cancel_booking(request, booking_id):
             start_time__lte=booking.end_time,
             end_time__gte=booking.start_time
         )
+        slot_ranges = list(time_slots.values_list('start_time', 'end_time'))
         time_slots.update(is_available=True)
+        availability_bitmap.set_ranges(booking.room, slot_ranges)
+        versions.bump(room_ids=[booking.room_id])
         
         messages.success(
             request, 
@@ -553,62 +641,61 @@ def remove_from_favorites(request, venue_id):
     return redirect('bookings:venue_detail', pk=venue_id)
 
 
+# Default opening hours for the availability pages (can be stored in venue/room model in a real app)
+AVAILABILITY_OPENING_TIME = datetime.strptime('09:00', '%H:%M').time()
+AVAILABILITY_CLOSING_TIME = datetime.strptime('20:00', '%H:%M').time()
+
+# Longest range the availability pages will sweep in one request
+AVAILABILITY_MAX_DAYS = 31
+
+
+def _availability_params(request):
+    """Parse date, end_date and duration (minutes) for the availability pages"""
+    try:
+        start_date = datetime.strptime(request.GET.get('date'), '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        start_date = timezone.now().date()
+    
+    try:
+        end_date = datetime.strptime(request.GET.get('end_date'), '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        end_date = start_date
+    end_date = min(max(end_date, start_date), start_date + timedelta(days=AVAILABILITY_MAX_DAYS - 1))
+    
+    try:
+        slot_minutes = max(int(request.GET.get('duration', 60)), 15)
+    except ValueError:
+        slot_minutes = 60
+    
+    return start_date, end_date, slot_minutes
+
+
 @login_required
 def check_availability(request, room_id):
     """Check availability for a specific room"""
     room = get_object_or_404(Room, pk=room_id)
     
-    # Get the date from request parameters or use today
-    date_str = request.GET.get('date')
-    if date_str:
-        try:
-            selected_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        except ValueError:
-            selected_date = timezone.now().date()
-    else:
-        selected_date = timezone.now().date()
+    # Get the dates and slot length from request parameters or use today, hourly
+    selected_date, end_date, slot_minutes = _availability_params(request)
     
-    # Get existing bookings for this room on the selected date
-    bookings = Booking.objects.filter(
-        room=room,
-        booking_date=selected_date,
-        status__in=['pending', 'confirmed']
-    )
-    
-    # Get the room's opening hours
-    opening_time = datetime.strptime('09:00', '%H:%M').time()  # Default 9 AM
-    closing_time = datetime.strptime('20:00', '%H:%M').time()  # Default 8 PM
-    
-    # Create time slots (hourly for simplicity)
     time_slots = []
-    current_time = datetime.combine(selected_date, opening_time)
-    end_time = datetime.combine(selected_date, closing_time)
-    
-    while current_time < end_time:
-        time_slot = {
-            'time': current_time.time().strftime('%H:%M'),
-            'available': True
-        }
-        
-        # Check if this slot is booked
-        slot_end = (current_time + timedelta(hours=1)).time()
-        for booking in bookings:
-            booking_start = booking.start_time.time()
-            booking_end = booking.end_time.time()
-            
-            if (booking_start <= current_time.time() < booking_end) or \
-               (booking_start < slot_end <= booking_end) or \
-               (current_time.time() <= booking_start and slot_end >= booking_end):
-                time_slot['available'] = False
-                break
-        
-        time_slots.append(time_slot)
-        current_time += timedelta(hours=1)
+    for start, end, available in schedules.slot_availability(
+        room, selected_date, end_date,
+        AVAILABILITY_OPENING_TIME, AVAILABILITY_CLOSING_TIME, slot_minutes
+    ):
+        start = timezone.localtime(start)
+        time_slots.append({
+            'date': start.date(),
+            'time': start.strftime('%H:%M'),
+            'end': timezone.localtime(end).strftime('%H:%M'),
+            'available': available
+        })
     
     context = {
         'room': room,
         'venue': room.venue,
         'date': selected_date,
+        'end_date': end_date,
         'time_slots': time_slots,
     }
     
@@ -617,58 +704,51 @@ def check_availability(request, room_id):
 
 @login_required
 def get_available_times(request, room_id):
-    """Get available times for a room on a specific date (AJAX endpoint)"""
+    """Get available times for a room on a specific date or date range (AJAX endpoint)"""
     room = get_object_or_404(Room, pk=room_id)
     
-    # Get date from request
-    date_str = request.GET.get('date')
-    try:
-        selected_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-    except (ValueError, TypeError):
-        selected_date = timezone.now().date()
-    
-    # Get bookings for this room on selected date
-    bookings = Booking.objects.filter(
-        room=room,
-        booking_date=selected_date,
-        status__in=['pending', 'confirmed']
-    )
+    selected_date, end_date, slot_minutes = _availability_params(request)
     
-    # Default opening hours (can be stored in venue/room model in a real app)
-    opening_time = datetime.strptime('09:00', '%H:%M').time()
-    closing_time = datetime.strptime('20:00', '%H:%M').time()
-    
-    # Generate time slots
     slots = []
-    current = datetime.combine(selected_date, opening_time)
-    end = datetime.combine(selected_date, closing_time)
-    
-    while current < end:
-        slot_end = current + timedelta(hours=1)
-        is_available = True
-        
-        # Check against existing bookings
-        for booking in bookings:
-            booking_start = datetime.combine(selected_date, booking.start_time.time())
-            booking_end = datetime.combine(selected_date, booking.end_time.time())
-            
-            if (booking_start <= current < booking_end) or \
-               (booking_start < slot_end <= booking_end) or \
-               (current <= booking_start and slot_end >= booking_end):
-                is_available = False
-                break
-        
-        if is_available:
+    for start, end, available in schedules.slot_availability(
+        room, selected_date, end_date,
+        AVAILABILITY_OPENING_TIME, AVAILABILITY_CLOSING_TIME, slot_minutes
+    ):
+        if available:
+            start = timezone.localtime(start)
             slots.append({
-                'start': current.strftime('%H:%M'),
-                'end': slot_end.strftime('%H:%M')
+                'date': start.date().isoformat(),
+                'start': start.strftime('%H:%M'),
+                'end': timezone.localtime(end).strftime('%H:%M')
             })
-        
-        current = slot_end
     
     return JsonResponse({'slots': slots})
 
 
+# Most rooms one live availability stream may watch
+LIVE_MAX_ROOMS = 50
+
+
+@login_required
+async def availability_stream(request):
+    """Server-Sent Events stream of availability changes for ?rooms=1,2,3"""
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI the endless stream would be read to the end before sending
+        # anything; 204 tells EventSource to stop reconnecting
+        return HttpResponse(status=204)
+    try:
+        room_ids = {int(room_id) for room_id in request.GET.get('rooms', '').split(',') if room_id.strip()}
+    except ValueError:
+        return JsonResponse({'error': 'Invalid room ids'}, status=400)
+    if not room_ids or len(room_ids) > LIVE_MAX_ROOMS:
+        return JsonResponse({'error': f'Watch between 1 and {LIVE_MAX_ROOMS} rooms'}, status=400)
+    
+    response = StreamingHttpResponse(live.stream(room_ids), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 class HostVenueListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
     model = Venue
     template_name = 'bookings/host_venues.html'
@@ -942,12 +1022,16 @@ def index_view(request):
     # Recently added venues
     recent_venues = Venue.objects.filter(is_active=True).order_by('-created_at')[:4]
     
+    # Trending venues by decayed bookings, favorites and reviews
+    popular_venues = Venue.objects.filter(is_active=True).order_by(*facets.SORT_OPTIONS['popularity'])[:4]
+    
     # Get venue types from the model
     venue_types = dict(Venue.VENUE_TYPES)
     
     context = {
         'featured_venues': featured_venues,
         'recent_venues': recent_venues,
+        'popular_venues': popular_venues,
         'venue_types': venue_types,
     }
     
@@ -1169,72 +1253,40 @@ def room_delete(request, room_id):
 
 def venue_list(request):
     """List all active venues with filtering options"""
-    queryset = Venue.objects.filter(is_active=True).annotate(avg_rating=Avg('reviews__rating'))
-    
-    # Filter by venue type (category)
+    # Sidebar filters and sort, from the result cache for repeated filter sets
+    queryset = listed_venues(request.GET)
+    sort = request.GET.get('sort')
     venue_type = request.GET.get('type')
-    if venue_type:
-        queryset = queryset.filter(category__name__icontains=venue_type)
-        
-    # Filter by amenities
     amenities = request.GET.getlist('amenities')
-    if amenities:
-        for amenity in amenities:
-            queryset = queryset.filter(amenities__name__icontains=amenity)
-        
-    # Filter by price range
     price_range = request.GET.get('price_range')
-    if price_range:
-        if price_range == '0-1000':
-            queryset = queryset.filter(rooms__price_per_hour__lte=1000)
-        elif price_range == '1000-2000':
-            queryset = queryset.filter(rooms__price_per_hour__gte=1000, rooms__price_per_hour__lte=2000)
-        elif price_range == '2000-5000':
-            queryset = queryset.filter(rooms__price_per_hour__gte=2000, rooms__price_per_hour__lte=5000)
-        elif price_range == '5000+':
-            queryset = queryset.filter(rooms__price_per_hour__gte=5000)
-    
-    # Filter by capacity
     capacity = request.GET.get('capacity')
-    if capacity:
-        if capacity == '1-10':
-            queryset = queryset.filter(max_capacity__lte=10)
-        elif capacity == '11-50':
-            queryset = queryset.filter(max_capacity__gte=11, max_capacity__lte=50)
-        elif capacity == '51-100':
-            queryset = queryset.filter(max_capacity__gte=51, max_capacity__lte=100)
-        elif capacity == '100+':
-            queryset = queryset.filter(max_capacity__gte=100)
-        
-    # Filter by rating
     rating = request.GET.get('rating')
-    if rating:
-        if rating == '4+':
-            queryset = queryset.filter(avg_rating__gte=4)
-        elif rating == '3+':
-            queryset = queryset.filter(avg_rating__gte=3)
-        elif rating == '2+':
-            queryset = queryset.filter(avg_rating__gte=2)
     
     # Get filters for context
-    categories = VenueCategory.objects.all()
-    amenities_list = Amenity.objects.all()
+    categories, amenities_list = filter_choices()
     
     context = {
-        'venue_list': queryset.distinct(),
+        'venue_list': queryset,
         'categories': categories,
         'amenities': amenities_list,
         'venue_type': venue_type or '',
         'selected_amenities': amenities or [],
         'price_range': price_range or '',
         'capacity': capacity or '',
-        'rating': rating or ''
+        'rating': rating or '',
+        'sort': sort or '',
+        'facets': facet_sidebar(request.GET)
     }
     
     return render(request, 'bookings/venue_list.html', context)
 
 def venue_detail(request, pk):
-    """Show details for a specific venue"""
+    """Show details for a specific venue, or 304 if the client's copy is current"""
+    tags = page_validators(request, 'venue', pk)
+    not_modified = versions.not_modified(request, tags)
+    if not_modified is not None:
+        return not_modified
+    
     venue = get_object_or_404(Venue, pk=pk)
     
     # Get rooms for this venue
@@ -1242,7 +1294,7 @@ def venue_detail(request, pk):
     
     # Get reviews for this venue
     reviews = venue.reviews.all().order_by('-created_at')[:5]
-    review_count = venue.reviews.count()
+    review_count = venue.rating_count
     
     # Check if user has favorited this venue
     is_favorite = False
@@ -1260,21 +1312,31 @@ def venue_detail(request, pk):
         'is_favorite': is_favorite
     }
     
-    return render(request, 'bookings/venue_detail.html', context)
+    return versions.set_validators(render(request, 'bookings/venue_detail.html', context), tags)
 
 def room_detail(request, venue_id, room_id):
-    """Show details for a specific room"""
+    """Show details for a specific room, or 304 if the client's copy is current"""
+    # The slots shown move on at midnight
+    midnight = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    today = midnight.date()
+    tags = page_validators(request, 'room', room_id, venue_id, today, fresh_from=midnight)
+    not_modified = versions.not_modified(request, tags)
+    if not_modified is not None:
+        return not_modified
+    
     venue = get_object_or_404(Venue, pk=venue_id)
     room = get_object_or_404(Room, pk=room_id, venue=venue)
     
     # Get available time slots for the next 7 days
-    today = timezone.now().date()
     next_week = today + timezone.timedelta(days=7)
-    time_slots = room.time_slots.filter(
-        start_time__date__gte=today,
-        start_time__date__lte=next_week,
-        is_available=True
-    ).order_by('start_time')
+    if schedules.virtual_slots_enabled():
+        time_slots = schedules.virtual_slots(room, today, next_week, available_only=True)
+    else:
+        time_slots = room.time_slots.filter(
+            start_time__date__gte=today,
+            start_time__date__lte=next_week,
+            is_available=True
+        ).order_by('start_time')
     
     # Add user wallet balance to context
     wallet_balance = 0
@@ -1288,12 +1350,12 @@ def room_detail(request, venue_id, room_id):
         'wallet_balance': wallet_balance
     }
     
-    return render(request, 'bookings/room_detail.html', context)
+    return versions.set_validators(render(request, 'bookings/room_detail.html', context), tags)
 
 @login_required
 def user_bookings(request):
     """Show bookings for the logged-in user"""
-    bookings = Booking.objects.filter(user=request.user).order_by('-created_at')
+    bookings = Booking.objects.filter(user=request.user).select_related('room__venue').order_by('-created_at')
     
     # Add status colors for UI display
     for booking in bookings:
@@ -72,6 +72,9 @@ class Transaction(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='transaction_user_keyset_idx'),
+        ]
         
     def __str__(self):
         return f"Transaction {self.transaction_id} - {self.status}"
@@ -11,6 +11,7 @@ from django.views.decorators.http import require_POST
 
 from .models import PaymentMethod, Transaction, Invoice
 from bookings.models import Booking
+from bookings.keyset import KeysetPaginationMixin
 
 import stripe
 import json
@@ -84,7 +85,7 @@ def set_default_payment_method(request, pk):
     return redirect('payments:payment_methods')
 
 
-class TransactionListView(LoginRequiredMixin, ListView):
+class TransactionListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Transaction
     template_name = 'payments/transaction_list.html'
     context_object_name = 'transactions'
@@ -2,6 +2,8 @@
 ASGI config for reservehub project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. uvicorn or daphne) so the live availability
+stream at /bookings/live/availability/ holds no worker thread per client.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
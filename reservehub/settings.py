@@ -217,6 +217,44 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
 }
 
+# Booking conflict index
+# Seconds before a room's in-process interval index is reloaded from the
+# database, so bookings written by other workers become visible.
+BOOKING_INDEX_TTL = int(os.getenv('BOOKING_INDEX_TTL', '30'))
+
+# Compute booking time slots on demand from room schedules instead of
+# materializing TimeSlot rows. Only schedule exceptions are persisted.
+VIRTUAL_TIME_SLOTS = os.getenv('VIRTUAL_TIME_SLOTS', 'False').lower() in ('true', '1', 't')
+
+# Minutes a reservation hold keeps a room interval claimed during checkout
+RESERVATION_HOLD_MINUTES = int(os.getenv('RESERVATION_HOLD_MINUTES', '10'))
+
+# Days ahead that recurring booking occurrences are materialized as bookings
+RECURRING_BOOKING_HORIZON_DAYS = int(os.getenv('RECURRING_BOOKING_HORIZON_DAYS', '30'))
+
+# Serve the live availability stream. Each stream stays open for as long as
+# the page does, so only enable this when serving reservehub.asgi with an
+# ASGI server (uvicorn); under WSGI every viewer would hold a worker.
+LIVE_AVAILABILITY_ENABLED = os.getenv('LIVE_AVAILABILITY_ENABLED', 'False') == 'True'
+
+# Seconds between keepalive frames on idle live availability streams
+LIVE_AVAILABILITY_KEEPALIVE_SECONDS = int(os.getenv('LIVE_AVAILABILITY_KEEPALIVE_SECONDS', '15'))
+
+# Most ranked matches a full-text search returns
+SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', '1000'))
+
+# Seconds before a process reloads its autocomplete index to see other processes' changes
+AUTOCOMPLETE_REFRESH_SECONDS = int(os.getenv('AUTOCOMPLETE_REFRESH_SECONDS', '300'))
+
+# Filter combinations kept in each process's venue listing result cache
+VENUE_RESULT_CACHE_SIZE = int(os.getenv('VENUE_RESULT_CACHE_SIZE', '256'))
+
+# Days for a booking, favorite or review to lose half its weight in venue popularity
+VENUE_SCORE_HALF_LIFE_DAYS = float(os.getenv('VENUE_SCORE_HALF_LIFE_DAYS', '14'))
+
+# Days of upcoming time slots nested in room and venue API payloads by default
+API_TIME_SLOT_WINDOW_DAYS = int(os.getenv('API_TIME_SLOT_WINDOW_DAYS', '7'))
+
 # Email settings for development
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
@@ -40,6 +40,7 @@ urlpatterns = [
     path('bookings/', include('bookings.urls')),
     path('accounts/', include('accounts.urls')),
     path('payments/', include('payments.urls')),
+    path('api/', include('bookings.api.urls')),
 ]
 
 if settings.DEBUG:
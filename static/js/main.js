@@ -85,6 +85,35 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
+    // Live availability: mark slots taken or freed by other users as it happens
+    const slotsContainer = document.getElementById('time-slots-container');
+    // Only rendered when the site is served over ASGI with the stream enabled
+    if (slotsContainer && slotsContainer.dataset.liveUrl && window.EventSource) {
+        const source = new EventSource(slotsContainer.dataset.liveUrl);
+        
+        source.addEventListener('availability', function(e) {
+            const change = JSON.parse(e.data);
+            slotsContainer.querySelectorAll('.time-slot').forEach(slot => {
+                // Local 'YYYY-MM-DD HH:MM' strings compare in time order
+                const overlaps = slot.dataset.startTime < change.local_end && slot.dataset.endTime > change.local_start;
+                if (!overlaps) {
+                    return;
+                }
+                slot.classList.toggle('available', change.available);
+                slot.classList.toggle('unavailable', !change.available);
+                if (!change.available && slot.classList.contains('selected')) {
+                    slot.classList.remove('selected');
+                    alert('The time slot you selected was just booked by someone else. Please choose another.');
+                }
+            });
+        });
+        
+        // Too many changes were missed, so reload the current slots
+        source.addEventListener('resync', function() {
+            window.location.reload();
+        });
+    }
+    
     // Payment animation
     const paymentButtons = document.querySelectorAll('.pay-with-coins-btn');
     paymentButtons.forEach(btn => {